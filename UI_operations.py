@@ -1,16 +1,46 @@
 # 各種ライブラリインポート
 if "bpy" in locals():
     import importlib
+    if "batch_material_meshes" in locals():
+        importlib.reload(batch_material_meshes)
+    if "cache_material_signature" in locals():
+        importlib.reload(cache_material_signature)
     if "check_surface_bsdf" in locals():
         importlib.reload(check_surface_bsdf)
+    if "cleanup_orphan_data" in locals():
+        importlib.reload(cleanup_orphan_data)
     if "comp_material_bsdf" in locals():
         importlib.reload(comp_material_bsdf)
     if "control_materialslot_utilities" in locals():
         importlib.reload(control_materialslot_utilities)
+    if "dedup_image_content" in locals():
+        importlib.reload(dedup_image_content)
+    if "library_material_index" in locals():
+        importlib.reload(library_material_index)
+    if "modal_material_merge" in locals():
+        importlib.reload(modal_material_merge)
+    if "plan_material_merge" in locals():
+        importlib.reload(plan_material_merge)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+    if "stats_material_slots" in locals():
+        importlib.reload(stats_material_slots)
+    if "watch_material_signature" in locals():
+        importlib.reload(watch_material_signature)
 import bpy
+from . import batch_material_meshes
+from . import cache_material_signature
 from . import check_surface_bsdf
+from . import cleanup_orphan_data
 from . import comp_material_bsdf
 from . import control_materialslot_utilities
+from . import dedup_image_content
+from . import library_material_index
+from . import modal_material_merge
+from . import plan_material_merge
+from . import profile_material_merge
+from . import stats_material_slots
+from . import watch_material_signature
 
 
 # BSDFマテリアルマージ実行ボタンの処理を実行する
@@ -21,49 +51,365 @@ def UI_bsdf_material_marge(arg_target_object:bpy.types.Object) -> str:
         str: エラーメッセージ(正常時 None)
     """
 
-    # 対象オブジェクトのマテリアルが全てプリンシプルBSDFを使用したノードかチェックする
-    for check_material_slot in arg_target_object.material_slots:
-        # スロットのマテリアルを取得
-        check_mat = check_material_slot.material
+    # 単一オブジェクトを対象として複数オブジェクトのマージ処理を実行する
+    return UI_bsdf_material_merge_objects(arg_target_objects=[arg_target_object])
 
-        # マテリアルがプリンシプルBSDFを使用したノードかチェックする
-        if check_surface_bsdf.check_surface_bsdf(arg_material=check_mat) == False:
-            # プリンシプルBSDFを使用していないマテリアルが含まれている場合はエラーメッセージを表示する
-            return "Material : " + check_mat.name + " is not BsdfPrincipled."
+
+# 複数オブジェクトを対象としたBSDFマテリアルマージ実行ボタンの処理を実行する
+def UI_bsdf_material_merge_objects(arg_target_objects:list, arg_tolerance:float=0.0,
+  arg_signature_cache:str='NONE', arg_profile_result:dict=None, arg_dedup_images:bool=False,
+  arg_cleanup_result:dict=None, arg_stats_result:list=None, arg_batch_mode:str='NONE',
+  arg_batch_result:list=None) -> str:
+    """複数オブジェクトを対象としたBSDFマテリアルマージ実行ボタンの処理を実行する
+    全オブジェクトのマテリアルを共通の索引でマージするため、オブジェクトを跨いだ重複もマージされる
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+        arg_tolerance (float, optional): 入力端子の値の許容誤差(0 の場合は完全一致)
+        arg_signature_cache (str, optional): 永続キャッシュの保存先('NONE', 'PROPERTY', 'SIDECAR')
+        arg_profile_result (dict, optional): 指定した場合、段階毎の経過時間とカウンタの計測結果を格納する
+        arg_dedup_images (bool, optional): マージ前に内容が同じ画像の参照を1つの画像にまとめるか
+        arg_cleanup_result (dict, optional): 指定した場合、マージで未使用となったマテリアルと
+            その参照先のデータを削除し、削除結果を格納する
+        arg_stats_result (list, optional): 指定した場合、オブジェクト毎のスロット数と描画コール数の削減結果を格納する
+        arg_batch_mode (str, optional): マージ後にマテリアル毎のメッシュを作成する方法
+            ('NONE' : 作成しない, 'OBJECT' : オブジェクト毎に分割する, 'MATERIAL' : 全オブジェクトをまとめる)
+        arg_batch_result (list, optional): 指定した場合、作成したオブジェクト名を格納する
+
+    Returns:
+        str: エラーメッセージ(正常時 None)
+    """
+
+    # 計測結果の格納先が指定されている場合は計測を開始する
+    if arg_profile_result != None:
+        profile_material_merge.begin_merge_profile()
+
+    # 実行中のノード解決キャッシュを開始する
+    check_surface_bsdf.begin_resolve_cache()
+
+    # 永続キャッシュが指定されている場合は開始する
+    if arg_signature_cache != 'NONE':
+        cache_material_signature.begin_persistent_cache(arg_use_sidecar=(arg_signature_cache == 'SIDECAR'))
+
+    try:
+        # マージ処理を実行する
+        error_message = execute_bsdf_material_merge(arg_target_objects=arg_target_objects,
+            arg_tolerance=arg_tolerance, arg_dedup_images=arg_dedup_images, arg_cleanup_result=arg_cleanup_result,
+            arg_stats_result=arg_stats_result, arg_batch_mode=arg_batch_mode, arg_batch_result=arg_batch_result)
+    finally:
+        # 実行後はノードの参照が無効となる可能性があるためキャッシュを終了する
+        check_surface_bsdf.end_resolve_cache()
+
+        # 永続キャッシュを終了する(サイドカーファイルを使用している場合は書き出す)
+        cache_material_signature.end_persistent_cache()
+
+        # 計測を終了して結果を格納する
+        if arg_profile_result != None:
+            arg_profile_result.update(profile_material_merge.end_merge_profile())
+
+    return error_message
+
+
+# BSDFマテリアルマージのプレビューボタンの処理を実行する
+def UI_bsdf_material_merge_preview(arg_target_objects:list, arg_tolerance:float=0.0) -> dict:
+    """BSDFマテリアルマージのプレビューボタンの処理を実行する
+    データを変更せずにマージ計画を作成する
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+        arg_tolerance (float, optional): 入力端子の値の許容誤差(0 の場合は完全一致)
+
+    Returns:
+        dict: マージ計画
+    """
+
+    # 実行中のノード解決キャッシュを開始する
+    check_surface_bsdf.begin_resolve_cache()
+
+    try:
+        # シェーダーのノードタイプ毎の許容誤差を取得する
+        shader_tolerance_dict = comp_material_bsdf.get_shader_tolerance_dict(arg_tolerance=arg_tolerance)
+
+        # マージ計画を作成する
+        merge_plan = plan_material_merge.create_merge_plan(arg_objects=arg_target_objects,
+            arg_shader_tolerance_dict=shader_tolerance_dict)
+    finally:
+        # キャッシュを終了する
+        check_surface_bsdf.end_resolve_cache()
+
+    return merge_plan
+
+
+# マテリアルのシグネチャの記録を取得する
+def UI_bsdf_material_signature_records(arg_materials:list) -> list:
+    """マテリアルのシグネチャの記録を取得する
+    データを変更せずにマテリアル毎のシグネチャのハッシュ、値の行、リンクが接続された列を求める
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        list: [マテリアル名, シグネチャのハッシュ, シェーダーのノードタイプ, 値のリスト, リンクが接続された列番号のリスト]
+              のリスト(マージしないマテリアルはハッシュとノードタイプが None、値と列番号が空のリスト)
+    """
+
+    # 実行中のノード解決キャッシュを開始する
+    check_surface_bsdf.begin_resolve_cache()
+
+    try:
+        # シグネチャの記録を求める
+        signature_records = library_material_index.get_material_signature_records(arg_materials=arg_materials)
+    finally:
+        # キャッシュを終了する
+        check_surface_bsdf.end_resolve_cache()
+
+    return [[check_mat.name] + (signature_record or [None, None, [], []])
+        for check_mat, signature_record in zip(arg_materials, signature_records)]
+
+
+# 差分マージの監視ボタンの処理を実行する
+def UI_bsdf_material_merge_live(arg_target_objects:list) -> bool:
+    """差分マージの監視ボタンの処理を実行する
+    監視中の場合は監視を終了し、監視していない場合は対象オブジェクトの監視を開始する
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+
+    Returns:
+        bool: 実行後に監視中か否か
+    """
+
+    # 監視中か確認する
+    if watch_material_signature.check_live_signature_index() == True:
+        # 監視を終了する
+        watch_material_signature.end_live_signature_index()
+        return False
+
+    # 未検出のシェーダーノードのシグネチャのレイアウトを検出する
+    comp_material_bsdf.discover_surface_shader_layouts()
+
+    # 監視を開始する
+    watch_material_signature.begin_live_signature_index(arg_objects=arg_target_objects)
+
+    return True
+
+
+# 差分マージの実行ボタンの処理を実行する
+def UI_bsdf_material_merge_remerge() -> str:
+    """差分マージの実行ボタンの処理を実行する
+    監視開始以降に変更されたマテリアルを含む分類のみを再マージする
+
+    Returns:
+        str: エラーメッセージ(正常時 None)
+    """
+
+    # 監視中か確認する
+    if watch_material_signature.check_live_signature_index() == False:
+        return "Execute : Live index is not running."
+
+    # マテリアルスロットの編集を行うため、オブジェクトモードに移行する
+    if control_materialslot_utilities.set_mode_object() == False:
+        return "Execute : Mode Change failed."
+
+    # 未検出のシェーダーノードのシグネチャのレイアウトを検出する
+    comp_material_bsdf.discover_surface_shader_layouts()
+
+    # 構成が変化した分類のみを再マージする
+    if watch_material_signature.remerge_live_signature_index() == False:
+        return "Execute : Merge failed."
+
+    return None
+
+
+# ライブラリのマテリアルへの差し替えボタンの処理を実行する
+def UI_bsdf_material_merge_library(arg_target_objects:list, arg_library_path:str,
+  arg_link:bool=True, arg_remap_result:dict=None) -> str:
+    """ライブラリのマテリアルへの差し替えボタンの処理を実行する
+    対象オブジェクトのマテリアルのうち、ライブラリのマテリアルと一致するものをライブラリのマテリアルに差し替える
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+        arg_library_path (str): ライブラリの .blend ファイルのパス
+        arg_link (bool, optional): ライブラリのマテリアルをリンクするか(False の場合はアペンドする)
+        arg_remap_result (dict, optional): 指定した場合、差し替えたマテリアル名とライブラリのマテリアル名を格納する
+
+    Returns:
+        str: エラーメッセージ(正常時 None)
+    """
+
+    # ライブラリのパスを確認する
+    if arg_library_path == "":
+        return "Nothing : library file."
 
     # マテリアルスロットの編集を行うため、オブジェクトモードに移行する
+    if control_materialslot_utilities.set_mode_object() == False:
+        return "Execute : Mode Change failed."
+
+    # 未検出のシェーダーノードのシグネチャのレイアウトを検出する
+    comp_material_bsdf.discover_surface_shader_layouts()
+
+    # 実行中のノード解決キャッシュを開始する
+    check_surface_bsdf.begin_resolve_cache()
+
+    try:
+        # ライブラリのマテリアルに差し替える
+        remap_names = library_material_index.merge_library_materials(arg_objects=arg_target_objects,
+            arg_library_path=arg_library_path, arg_link=arg_link)
+    finally:
+        # キャッシュを終了する
+        check_surface_bsdf.end_resolve_cache()
+
+    # 実行結果を確認する
+    if remap_names == None:
+        return "Execute : Library file not found."
+
+    # 差し替え結果の格納先が指定されている場合は格納する
+    if arg_remap_result != None:
+        arg_remap_result.update(remap_names)
+
+    return None
+
+
+# マージ範囲の指定に従って対象オブジェクトを取得する
+def get_target_objects(arg_scope:str, arg_target_object:bpy.types.Object,
+  arg_target_collection:bpy.types.Collection, arg_scene:bpy.types.Scene,
+  arg_selected_objects:list) -> list:
+    """マージ範囲の指定に従って対象オブジェクトを取得する
+
+    Args:
+        arg_scope (str): マージ範囲('OBJECT', 'SELECTED', 'COLLECTION', 'SCENE')
+        arg_target_object (bpy.types.Object): 指定オブジェクト
+        arg_target_collection (bpy.types.Collection): 指定コレクション
+        arg_scene (bpy.types.Scene): 対象シーン
+        arg_selected_objects (list): 選択中のオブジェクト
+
+    Returns:
+        list: 対象のメッシュオブジェクトのリスト
+    """
+
+    # 候補となるオブジェクトのリスト
+    candidate_objects = []
+
+    # マージ範囲毎に候補を取得する
+    if arg_scope == 'OBJECT':
+        # 指定オブジェクトのみを対象とする
+        if arg_target_object != None:
+            candidate_objects = [arg_target_object]
+    elif arg_scope == 'SELECTED':
+        # 選択中のオブジェクトを対象とする
+        candidate_objects = list(arg_selected_objects)
+    elif arg_scope == 'COLLECTION':
+        # 指定コレクション(子コレクションを含む)のオブジェクトを対象とする
+        if arg_target_collection != None:
+            candidate_objects = list(arg_target_collection.all_objects)
+    elif arg_scope == 'SCENE':
+        # シーン内の全オブジェクトを対象とする
+        candidate_objects = list(arg_scene.objects)
+
+    # メッシュオブジェクトのみを対象とする
+    target_objects = [check_object for check_object in candidate_objects if check_object.type == 'MESH']
+
+    return target_objects
+
+
+# BSDFマテリアルマージの各処理を順に実行する
+def execute_bsdf_material_merge(arg_target_objects:list, arg_tolerance:float=0.0,
+  arg_dedup_images:bool=False, arg_cleanup_result:dict=None, arg_stats_result:list=None,
+  arg_batch_mode:str='NONE', arg_batch_result:list=None) -> str:
+    """BSDFマテリアルマージの各処理を順に実行する
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+        arg_tolerance (float, optional): 入力端子の値の許容誤差(0 の場合は完全一致)
+        arg_dedup_images (bool, optional): マージ前に内容が同じ画像の参照を1つの画像にまとめるか
+        arg_cleanup_result (dict, optional): 指定した場合、マージで未使用となったデータを削除し、削除結果を格納する
+        arg_stats_result (list, optional): 指定した場合、オブジェクト毎のスロット数と描画コール数の削減結果を格納する
+        arg_batch_mode (str, optional): マージ後にマテリアル毎のメッシュを作成する方法('NONE', 'OBJECT', 'MATERIAL')
+        arg_batch_result (list, optional): 指定した場合、作成したオブジェクト名を格納する
+
+    Returns:
+        str: エラーメッセージ(正常時 None)
+    """
+
+    # 未検出のシェーダーノードのシグネチャのレイアウトを検出する
+    comp_material_bsdf.discover_surface_shader_layouts()
+
+    # 対象オブジェクトのマテリアルのノードを有効化し、比較方法が登録されたシェーダーかチェックする
+    # (未登録のシェーダーを使用したマテリアルはエラーとせず、マージの対象外とする)
+    profile_material_merge.start_profile_stage("check_shader")
+    slot_materials = comp_material_bsdf.get_slot_materials_unique(arg_objects=arg_target_objects)
+    for check_mat in slot_materials:
+        check_surface_bsdf.check_surface_shader(arg_material=check_mat)
+    profile_material_merge.stop_profile_stage("check_shader")
+
+    # マテリアルスロットの編集を行うため、オブジェクトモードに移行する
+    # (マージ中に呼び出す唯一のオペレーターのため、データを変更する前に実行する
+    #  以降の処理はデータの書き換えのみで行い、取り消し履歴は呼び出し元のオペレーターの1回のみとなる)
+    profile_material_merge.start_profile_stage("mode_change")
     mode_result = control_materialslot_utilities.set_mode_object()
+    profile_material_merge.stop_profile_stage("mode_change")
 
     # 実行結果を確認する
     if mode_result == False:
         # 実行結果がエラーの場合はエラーメッセージを表示する
         return "Execute : Mode Change failed."
 
-    # 指定オブジェクトのマテリアルを類似マテリアルでマージする
-    comp_result = comp_material_bsdf.material_marge_object(arg_object=arg_target_object)
+    # 指定に従って内容が同じ画像の参照をまとめる
+    # (画像が異なるだけのテクスチャ付きマテリアルもマージの対象となる)
+    if arg_dedup_images == True:
+        profile_material_merge.start_profile_stage("dedup_images")
+        dedup_image_content.deduplicate_material_images(arg_materials=slot_materials)
+        profile_material_merge.stop_profile_stage("dedup_images")
+
+    # シェーダーのノードタイプ毎の許容誤差を取得する
+    shader_tolerance_dict = comp_material_bsdf.get_shader_tolerance_dict(arg_tolerance=arg_tolerance)
+
+    # 統計の格納先が指定されている場合はマージ前の統計を取得する
+    if arg_stats_result != None:
+        profile_material_merge.start_profile_stage("collect_stats")
+        before_stats = stats_material_slots.begin_merge_stats(arg_objects=arg_target_objects)
+        profile_material_merge.stop_profile_stage("collect_stats")
+
+    # 指定オブジェクトのマテリアルを共通の索引でマージする計画を作成する
+    profile_material_merge.start_profile_stage("create_plan")
+    merge_plan = plan_material_merge.create_merge_plan(arg_objects=arg_target_objects,
+        arg_shader_tolerance_dict=shader_tolerance_dict)
+    profile_material_merge.stop_profile_stage("create_plan")
+
+    # 計画に従ってマテリアルの差し替えとスロットのソート、重複削除を一括で実行する
+    # (オペレーターを使わずにポリゴンのマテリアル番号を一括で書き換える)
+    profile_material_merge.start_profile_stage("apply_plan")
+    apply_result = plan_material_merge.apply_merge_plan(arg_plan=merge_plan)
+    profile_material_merge.stop_profile_stage("apply_plan")
 
     # 実行結果を確認する
-    if comp_result == False:
+    if apply_result == False:
         # 実行結果がエラーの場合はエラーメッセージを表示する
         return "Execute : Merge failed."
 
-    # 指定オブジェクトのマテリアルスロットをソートする
-    sort_result = control_materialslot_utilities.sort_materialslot_name(arg_object=arg_target_object)
-    
-    # 実行結果を確認する
-    if sort_result == False:
-        # 実行結果がエラーの場合はエラーメッセージを表示する
-        return "Execute : Sort failed."
+    # 統計の格納先が指定されている場合はマージ後の統計を取得し、削減結果を格納する
+    if arg_stats_result != None:
+        profile_material_merge.start_profile_stage("collect_stats")
+        arg_stats_result.extend(stats_material_slots.collect_merge_stats(arg_objects=arg_target_objects,
+            arg_before_stats=before_stats))
+        profile_material_merge.stop_profile_stage("collect_stats")
 
-    # 指定オブジェクトのマテリアルスロットをソートする
-    delete_result = control_materialslot_utilities.delate_materialslot_duplicate(arg_object=arg_target_object)
-    
-    # 実行結果を確認する
-    if delete_result == False:
-        # 実行結果がエラーの場合はエラーメッセージを表示する
-        return "Execute : Delete failed."
+    # 指定に従ってマージ後のマテリアル毎のメッシュを作成する
+    # (オペレーターを使わずにメッシュの配列から直接作成する)
+    if arg_batch_mode != 'NONE':
+        profile_material_merge.start_profile_stage("batch_meshes")
+        batch_objects = batch_material_meshes.batch_material_meshes(arg_objects=arg_target_objects,
+            arg_batch_mode=arg_batch_mode)
+        profile_material_merge.stop_profile_stage("batch_meshes")
+        if arg_batch_result != None:
+            arg_batch_result.extend(batch_object.name for batch_object in batch_objects)
+
+    # 削除結果の格納先が指定されている場合は、マージ前のスロットのマテリアルのうち未使用となったデータを一括で削除する
+    # (マージ前から未使用のデータや対象外のデータは削除しない)
+    if arg_cleanup_result != None:
+        profile_material_merge.start_profile_stage("cleanup_orphans")
+        arg_cleanup_result.update(cleanup_orphan_data.cleanup_orphan_materials(arg_materials=slot_materials))
+        profile_material_merge.stop_profile_stage("cleanup_orphans")
 
     # 正常終了時は None を返す
     return None
-
-
@@ -88,15 +88,115 @@ class HOLOMON_PT_addon_bsdf_material_merge(Panel):
         # Operatorをボタンとして配置する
         draw_layout = self.layout
 
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
+
+        # 要素行を作成する
+        scopeselect_row = draw_layout.row()
+        # マージ範囲選択用のカスタムプロパティを配置する
+        scopeselect_row.prop(merge_properties, "prop_mergescope", text="Scope")
+
+        # マージ範囲に応じた対象の選択欄を配置する
+        if merge_properties.prop_mergescope == 'OBJECT':
+            # 要素行を作成する
+            objectslect_row = draw_layout.row()
+            # オブジェクト選択用のカスタムプロパティを配置する
+            objectslect_row.prop(merge_properties, "prop_objectselect", text="Target")
+        elif merge_properties.prop_mergescope == 'COLLECTION':
+            # 要素行を作成する
+            collectionselect_row = draw_layout.row()
+            # コレクション選択用のカスタムプロパティを配置する
+            collectionselect_row.prop(merge_properties, "prop_collectionselect", text="Target")
+
+        # 要素行を作成する
+        tolerance_row = draw_layout.row()
+        # 許容誤差指定用のカスタムプロパティを配置する
+        tolerance_row.prop(merge_properties, "prop_tolerance", text="Tolerance")
+
+        # 要素行を作成する
+        signaturecache_row = draw_layout.row()
+        # 永続キャッシュ選択用のカスタムプロパティを配置する
+        signaturecache_row.prop(merge_properties, "prop_signaturecache", text="Cache")
+
+        # 要素行を作成する
+        dedupimages_row = draw_layout.row()
+        # 画像の重複統合指定用のカスタムプロパティを配置する
+        dedupimages_row.prop(merge_properties, "prop_dedupimages", text="Deduplicate Images")
+
+        # 要素行を作成する
+        cleanuporphans_row = draw_layout.row()
+        # 未使用データの削除指定用のカスタムプロパティを配置する
+        cleanuporphans_row.prop(merge_properties, "prop_cleanuporphans", text="Remove Orphans")
+
+        # 要素行を作成する
+        batchmeshes_row = draw_layout.row()
+        # マテリアル毎のメッシュ作成方法選択用のカスタムプロパティを配置する
+        batchmeshes_row.prop(merge_properties, "prop_batchmeshes", text="Batch Meshes")
+
         # 要素行を作成する
-        objectslect_row = draw_layout.row()
-        # オブジェクト選択用のカスタムプロパティを配置する
-        objectslect_row.prop(context.scene.holomon_mrtk_channelmap_maker, "prop_objectselect", text="Target")
+        profile_row = draw_layout.row()
+        # 計測結果表示用のカスタムプロパティを配置する
+        profile_row.prop(merge_properties, "prop_profile", text="Profile")
 
         # 要素行を作成する
         button_row = draw_layout.row()
+        # マージ計画をプレビューするボタンを配置する
+        button_row.operator("holomon.bsdf_material_merge_preview")
         # ベイクを実行するボタンを配置する
         button_row.operator("holomon.bsdf_material_merge")
+        # 分割実行でマージするボタンを配置する
+        button_row.operator("holomon.bsdf_material_merge_modal")
+
+        # 要素行を作成する
+        libraryfile_row = draw_layout.row()
+        # ライブラリ指定用のカスタムプロパティを配置する
+        libraryfile_row.prop(merge_properties, "prop_libraryfilepath", text="Library")
+
+        # 要素行を作成する
+        librarylink_row = draw_layout.row()
+        # ライブラリの読み込み方法指定用のカスタムプロパティを配置する
+        librarylink_row.prop(merge_properties, "prop_librarylink", expand=True)
+        # ライブラリのマテリアルへの差し替えボタンを配置する
+        librarylink_row.operator("holomon.bsdf_material_merge_library")
+
+        # 直前のマージの統計が存在する場合は削減結果を表示する
+        merge_stats = UI_operations.stats_material_slots.last_merge_stats
+        if merge_stats != None:
+            # 削減結果の合計を取得する
+            stats_summary = UI_operations.stats_material_slots.get_merge_stats_summary(arg_merge_stats=merge_stats)
+
+            # 削減結果の表示枠を作成する
+            stats_box = draw_layout.box()
+            # 合計を表示する
+            stats_box.label(text="Objects : {}  Slots : {} -> {}".format(
+                stats_summary["objects"], stats_summary["slots_before"], stats_summary["slots_after"]))
+            stats_box.label(text="Draw Calls : {} -> {} (-{})".format(stats_summary["draw_calls_before"],
+                stats_summary["draw_calls_after"], stats_summary["draw_calls_saved"]))
+
+            # 削減数の多いオブジェクトを表示する
+            for object_stats in sorted(merge_stats, key=lambda object_stats: -object_stats["draw_calls_saved"]) \
+              [:UI_operations.stats_material_slots.def_stats_panel_rows]:
+                stats_box.label(text="{} : {} -> {}".format(object_stats["name"],
+                    object_stats["draw_calls_before"], object_stats["draw_calls_after"]))
+
+            # 削減結果の書き出しボタンを配置する
+            stats_box.operator("holomon.bsdf_material_merge_stats_export")
+
+        # 差分マージの監視中か確認する
+        is_live = UI_operations.watch_material_signature.check_live_signature_index()
+
+        # 要素行を作成する
+        live_row = draw_layout.row()
+        # 差分マージの監視を切り替えるボタンを配置する
+        live_row.operator("holomon.bsdf_material_merge_live", text="Stop Live" if is_live == True else "Start Live",
+            depress=is_live)
+
+        # 監視中の場合は差分マージの実行ボタンを配置する
+        if is_live == True:
+            # 再マージで差し替わるスロット数を取得する
+            # (索引の再計算は更新ハンドラから予約した処理で行い、描画時は保持した値のみ参照する)
+            mergeable_count = UI_operations.watch_material_signature.get_live_mergeable_count()
+            live_row.operator("holomon.bsdf_material_merge_remerge", text="Re-merge ({})".format(mergeable_count))
 
 # マテリアルベイクの実行オペレーター
 class HOLOMON_OT_addon_bsdf_material_merge(Operator):
@@ -126,17 +226,63 @@ class HOLOMON_OT_addon_bsdf_material_merge(Operator):
 
     # Operator実行時の処理
     def execute(self, context):
-        # カスタムプロパティから指定中のオブジェクトを取得する
-        target_object = context.scene.holomon_mrtk_channelmap_maker.prop_objectselect
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
 
-        # 指定中のオブジェクトを確認する
-        if target_object == None:
+        # マージ範囲に従って対象オブジェクトを取得する
+        target_objects = UI_operations.get_target_objects(
+            arg_scope=merge_properties.prop_mergescope,
+            arg_target_object=merge_properties.prop_objectselect,
+            arg_target_collection=merge_properties.prop_collectionselect,
+            arg_scene=context.scene,
+            arg_selected_objects=context.selected_objects,
+        )
+
+        # 対象オブジェクトを確認する
+        if len(target_objects) == 0:
             # オブジェクトが指定されていない場合はエラーメッセージを表示する
             self.report({'ERROR'}, "Nothing : target object.")
             return {'CANCELLED'}
 
-        # チャネルマップ作成を実行する
-        error_message = UI_operations.UI_bsdf_material_merge(arg_target_object=target_object)
+        # 計測が指定されている場合は計測結果の格納先を作成する
+        profile_result = {} if merge_properties.prop_profile == True else None
+
+        # 未使用データの削除が指定されている場合は削除結果の格納先を作成する
+        cleanup_result = {} if merge_properties.prop_cleanuporphans == True else None
+
+        # 削減結果の格納先を作成する
+        stats_result = []
+
+        # 作成したオブジェクト名の格納先を作成する
+        batch_result = []
+
+        # マテリアルマージを実行する
+        error_message = UI_operations.UI_bsdf_material_merge_objects(arg_target_objects=target_objects,
+            arg_tolerance=merge_properties.prop_tolerance,
+            arg_signature_cache=merge_properties.prop_signaturecache,
+            arg_profile_result=profile_result,
+            arg_dedup_images=merge_properties.prop_dedupimages,
+            arg_cleanup_result=cleanup_result,
+            arg_stats_result=stats_result,
+            arg_batch_mode=merge_properties.prop_batchmeshes,
+            arg_batch_result=batch_result)
+
+        # 削減結果をパネルに表示するため保持する
+        if error_message == None:
+            UI_operations.stats_material_slots.last_merge_stats = stats_result
+
+        # 計測結果を表示する
+        if profile_result != None:
+            self.report({'INFO'}, UI_operations.profile_material_merge.format_merge_profile(arg_profile=profile_result))
+
+        # 作成したオブジェクト数を表示する
+        if merge_properties.prop_batchmeshes != 'NONE' and error_message == None:
+            self.report({'INFO'}, "Batch : {} objects created in '{}'.".format(len(batch_result),
+                UI_operations.batch_material_meshes.def_batch_collection_name))
+
+        # 削除結果を表示する
+        if cleanup_result != None and len(cleanup_result) > 0:
+            self.report({'INFO'}, UI_operations.cleanup_orphan_data.format_cleanup_report(arg_cleanup_report=cleanup_result))
         
         # エラーメッセージの有無を確認する
         if error_message != None:
@@ -147,6 +293,335 @@ class HOLOMON_OT_addon_bsdf_material_merge(Operator):
         return {'FINISHED'}
 
 
+# マテリアルマージの分割実行オペレーター
+# (タイマーで処理を分割して実行し、進捗を表示する。Esc キーで中断し、変更を元に戻す)
+class HOLOMON_OT_addon_bsdf_material_merge_modal(Operator):
+    # クラスのIDを定義する
+    bl_idname = "holomon.bsdf_material_merge_modal"
+    # クラスのラベルを定義する
+    bl_label = "Merge (Modal)"
+    # クラスの説明文
+    bl_description = "Merge materials in time-sliced steps with a progress bar (Esc to cancel and roll back)"
+    # クラスの属性
+    # (完了時のみ取り消し履歴を積み、中断時は変更を元に戻して履歴を積まない)
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Operator起動時の処理
+    def invoke(self, context, event):
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
+
+        # マージ範囲に従って対象オブジェクトを取得する
+        target_objects = UI_operations.get_target_objects(
+            arg_scope=merge_properties.prop_mergescope,
+            arg_target_object=merge_properties.prop_objectselect,
+            arg_target_collection=merge_properties.prop_collectionselect,
+            arg_scene=context.scene,
+            arg_selected_objects=context.selected_objects,
+        )
+
+        # 対象オブジェクトを確認する
+        if len(target_objects) == 0:
+            # オブジェクトが指定されていない場合はエラーメッセージを表示する
+            self.report({'ERROR'}, "Nothing : target object.")
+            return {'CANCELLED'}
+
+        # 分割実行を開始する
+        error_message = UI_operations.modal_material_merge.begin_modal_merge(arg_target_objects=target_objects,
+            arg_tolerance=merge_properties.prop_tolerance,
+            arg_signature_cache=merge_properties.prop_signaturecache,
+            arg_dedup_images=merge_properties.prop_dedupimages,
+            arg_cleanup=merge_properties.prop_cleanuporphans,
+            arg_stats=True,
+            arg_batch_mode=merge_properties.prop_batchmeshes,
+            arg_profile=merge_properties.prop_profile)
+        if error_message != None:
+            self.report({'ERROR'}, error_message)
+            return {'CANCELLED'}
+
+        # タイマーと進捗表示を開始する
+        window_manager = context.window_manager
+        self.modal_timer = window_manager.event_timer_add(UI_operations.modal_material_merge.def_modal_timer_interval,
+            window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    # Operator実行中のイベント処理
+    def modal(self, context, event):
+        # Esc キーで中断する
+        if event.type == 'ESC':
+            self.finish_modal(context=context)
+            UI_operations.modal_material_merge.end_modal_merge()
+            self.report({'WARNING'}, "Cancel : Merge cancelled and changes rolled back.")
+            return {'CANCELLED'}
+
+        # タイマー以外のイベントは処理中のデータを変更させないため受け付けない
+        if event.type != 'TIMER' or event.timer != self.modal_timer:
+            return {'RUNNING_MODAL'}
+
+        # 処理を時間の上限まで進めて進捗を表示する
+        is_finished = UI_operations.modal_material_merge.step_modal_merge()
+        context.window_manager.progress_update(int(UI_operations.modal_material_merge.get_modal_merge_progress() * 100))
+        if is_finished == False:
+            return {'RUNNING_MODAL'}
+
+        # 分割実行を終了する
+        self.finish_modal(context=context)
+        merge_result = UI_operations.modal_material_merge.end_modal_merge()
+
+        # エラーメッセージの有無を確認する
+        if merge_result["error"] != None:
+            # エラーの場合は変更を元に戻してエラーメッセージを表示する
+            self.report({'ERROR'}, merge_result["error"])
+            return {'CANCELLED'}
+
+        # 削減結果をパネルに表示するため保持する
+        UI_operations.stats_material_slots.last_merge_stats = merge_result["stats"]
+
+        # 計測結果を表示する
+        if merge_result["profile"] != None:
+            self.report({'INFO'}, UI_operations.profile_material_merge.format_merge_profile(arg_profile=merge_result["profile"]))
+
+        # 作成したオブジェクト数を表示する
+        if context.scene.holomon_bsdf_material_merge.prop_batchmeshes != 'NONE':
+            self.report({'INFO'}, "Batch : {} objects created in '{}'.".format(len(merge_result["batch"]),
+                UI_operations.batch_material_meshes.def_batch_collection_name))
+
+        # 削除結果を表示する
+        if merge_result["cleanup"] != None:
+            self.report({'INFO'}, UI_operations.cleanup_orphan_data.format_cleanup_report(arg_cleanup_report=merge_result["cleanup"]))
+
+        return {'FINISHED'}
+
+    # Operator中断時の処理(ファイルの読み込みなどで中断された場合)
+    def cancel(self, context):
+        self.finish_modal(context=context)
+        UI_operations.modal_material_merge.end_modal_merge()
+
+    # タイマーと進捗表示を終了する
+    def finish_modal(self, context):
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.modal_timer)
+        window_manager.progress_end()
+
+
+# マテリアルマージの計画のプレビューオペレーター
+class HOLOMON_OT_addon_bsdf_material_merge_preview(Operator):
+    # クラスのIDを定義する
+    # (Blender内部で参照する際のIDに利用)
+    bl_idname = "holomon.bsdf_material_merge_preview"
+    # クラスのラベルを定義する
+    # (デフォルトのテキスト表示などに利用)
+    bl_label = "Preview"
+    # クラスの説明文
+    # (マウスオーバー時に表示)
+    bl_description = "Preview the material merge without changing any data"
+    # クラスの属性
+    # データを変更しないため、元に戻すイベントはプッシュしない
+    bl_options = {'REGISTER'}
+
+    # Operator実行時の処理
+    def execute(self, context):
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
+
+        # マージ範囲に従って対象オブジェクトを取得する
+        target_objects = UI_operations.get_target_objects(
+            arg_scope=merge_properties.prop_mergescope,
+            arg_target_object=merge_properties.prop_objectselect,
+            arg_target_collection=merge_properties.prop_collectionselect,
+            arg_scene=context.scene,
+            arg_selected_objects=context.selected_objects,
+        )
+
+        # 対象オブジェクトを確認する
+        if len(target_objects) == 0:
+            # オブジェクトが指定されていない場合はエラーメッセージを表示する
+            self.report({'ERROR'}, "Nothing : target object.")
+            return {'CANCELLED'}
+
+        # マージ計画を作成する
+        merge_plan = UI_operations.UI_bsdf_material_merge_preview(arg_target_objects=target_objects,
+            arg_tolerance=merge_properties.prop_tolerance)
+
+        # マージ計画の概要を表示する
+        plan_summary = UI_operations.plan_material_merge.get_merge_plan_summary(arg_plan=merge_plan)
+        self.report({'INFO'}, "Preview : {} of {} materials merged, slots {} -> {}.".format(
+            plan_summary["merged_count"], plan_summary["material_count"],
+            plan_summary["slots_before"], plan_summary["slots_after"]))
+
+        return {'FINISHED'}
+
+
+# 差分マージの監視の切り替えオペレーター
+class HOLOMON_OT_addon_bsdf_material_merge_live(Operator):
+    # クラスのIDを定義する
+    # (Blender内部で参照する際のIDに利用)
+    bl_idname = "holomon.bsdf_material_merge_live"
+    # クラスのラベルを定義する
+    # (デフォルトのテキスト表示などに利用)
+    bl_label = "Live"
+    # クラスの説明文
+    # (マウスオーバー時に表示)
+    bl_description = "Track material edits of the target objects and keep their signatures up to date"
+    # クラスの属性
+    # データを変更しないため、元に戻すイベントはプッシュしない
+    bl_options = {'REGISTER'}
+
+    # Operator実行時の処理
+    def execute(self, context):
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
+
+        # マージ範囲に従って対象オブジェクトを取得する
+        target_objects = UI_operations.get_target_objects(
+            arg_scope=merge_properties.prop_mergescope,
+            arg_target_object=merge_properties.prop_objectselect,
+            arg_target_collection=merge_properties.prop_collectionselect,
+            arg_scene=context.scene,
+            arg_selected_objects=context.selected_objects,
+        )
+
+        # 監視を開始する場合は対象オブジェクトを確認する
+        if UI_operations.watch_material_signature.check_live_signature_index() == False and len(target_objects) == 0:
+            # オブジェクトが指定されていない場合はエラーメッセージを表示する
+            self.report({'ERROR'}, "Nothing : target object.")
+            return {'CANCELLED'}
+
+        # 監視を切り替える
+        is_live = UI_operations.UI_bsdf_material_merge_live(arg_target_objects=target_objects)
+        self.report({'INFO'}, "Live : started." if is_live == True else "Live : stopped.")
+
+        return {'FINISHED'}
+
+
+# 差分マージの実行オペレーター
+class HOLOMON_OT_addon_bsdf_material_merge_remerge(Operator):
+    # クラスのIDを定義する
+    # (Blender内部で参照する際のIDに利用)
+    bl_idname = "holomon.bsdf_material_merge_remerge"
+    # クラスのラベルを定義する
+    # (デフォルトのテキスト表示などに利用)
+    bl_label = "Re-merge"
+    # クラスの説明文
+    # (マウスオーバー時に表示)
+    bl_description = "Merge only the materials whose signatures changed since the last merge"
+    # クラスの属性
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Operator実行時の処理
+    def execute(self, context):
+        # 構成が変化した分類のみを再マージする
+        error_message = UI_operations.UI_bsdf_material_merge_remerge()
+
+        # エラーメッセージの有無を確認する
+        if error_message != None:
+            # エラーメッセージが設定されている場合はエラーメッセージを表示する
+            self.report({'ERROR'}, error_message)
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+# ライブラリのマテリアルへの差し替えオペレーター
+class HOLOMON_OT_addon_bsdf_material_merge_library(Operator):
+    # クラスのIDを定義する
+    # (Blender内部で参照する際のIDに利用)
+    bl_idname = "holomon.bsdf_material_merge_library"
+    # クラスのラベルを定義する
+    # (デフォルトのテキスト表示などに利用)
+    bl_label = "Use Library"
+    # クラスの説明文
+    # (マウスオーバー時に表示)
+    bl_description = "Replace materials that match a material of the library file with the library material"
+    # クラスの属性
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Operator実行時の処理
+    def execute(self, context):
+        # パネルのカスタムプロパティを取得する
+        merge_properties = context.scene.holomon_bsdf_material_merge
+
+        # マージ範囲に従って対象オブジェクトを取得する
+        target_objects = UI_operations.get_target_objects(
+            arg_scope=merge_properties.prop_mergescope,
+            arg_target_object=merge_properties.prop_objectselect,
+            arg_target_collection=merge_properties.prop_collectionselect,
+            arg_scene=context.scene,
+            arg_selected_objects=context.selected_objects,
+        )
+
+        # 対象オブジェクトを確認する
+        if len(target_objects) == 0:
+            # オブジェクトが指定されていない場合はエラーメッセージを表示する
+            self.report({'ERROR'}, "Nothing : target object.")
+            return {'CANCELLED'}
+
+        # ライブラリのマテリアルに差し替える
+        remap_result = {}
+        error_message = UI_operations.UI_bsdf_material_merge_library(arg_target_objects=target_objects,
+            arg_library_path=merge_properties.prop_libraryfilepath,
+            arg_link=(merge_properties.prop_librarylink == 'LINK'),
+            arg_remap_result=remap_result)
+
+        # エラーメッセージの有無を確認する
+        if error_message != None:
+            # エラーメッセージが設定されている場合はエラーメッセージを表示する
+            self.report({'ERROR'}, error_message)
+            return {'CANCELLED'}
+
+        # 差し替えたマテリアル数を表示する
+        self.report({'INFO'}, "Library : {} materials replaced.".format(len(remap_result)))
+
+        return {'FINISHED'}
+
+
+# マージの削減結果の書き出しオペレーター
+class HOLOMON_OT_addon_bsdf_material_merge_stats_export(Operator):
+    # クラスのIDを定義する
+    # (Blender内部で参照する際のIDに利用)
+    bl_idname = "holomon.bsdf_material_merge_stats_export"
+    # クラスのラベルを定義する
+    # (デフォルトのテキスト表示などに利用)
+    bl_label = "Export Stats"
+    # クラスの説明文
+    # (マウスオーバー時に表示)
+    bl_description = "Export the slot and draw call reduction of the last merge as CSV or JSON"
+    # クラスの属性
+    # データを変更しないため、元に戻すイベントはプッシュしない
+    bl_options = {'REGISTER'}
+
+    # 書き出し先のパス(拡張子が .csv の場合は CSV、それ以外の場合は JSON)
+    filepath: StringProperty(subtype='FILE_PATH')
+    # ファイルブラウザに表示するファイルの絞り込み
+    filter_glob: StringProperty(default="*.csv;*.json", options={'HIDDEN'})
+
+    # Operator起動時の処理
+    def invoke(self, context, event):
+        # 書き出し先のファイルを選択する
+        if self.filepath == "":
+            self.filepath = "material_merge_stats.csv"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    # Operator実行時の処理
+    def execute(self, context):
+        # 直前のマージの統計を確認する
+        if UI_operations.stats_material_slots.last_merge_stats == None:
+            # マージを実行していない場合はエラーメッセージを表示する
+            self.report({'ERROR'}, "Nothing : merge stats.")
+            return {'CANCELLED'}
+
+        # 削減結果を書き出す
+        UI_operations.stats_material_slots.export_merge_stats(
+            arg_merge_stats=UI_operations.stats_material_slots.last_merge_stats, arg_filepath=self.filepath)
+        self.report({'INFO'}, "Stats : exported to {}.".format(self.filepath))
+
+        return {'FINISHED'}
+
+
 # マテリアルベイクパネルのプロパティ
 class HOLOMON_addon_bsdf_material_merge_properties(PropertyGroup):
     # オブジェクト選択時のチェック関数を定義する
@@ -164,12 +639,112 @@ class HOLOMON_addon_bsdf_material_merge_properties(PropertyGroup):
         poll = prop_object_select_poll, # チェック関数
     )
 
+    # シーン上のパネルに表示するマージ範囲選択用のカスタムプロパティを定義する
+    prop_mergescope: EnumProperty(
+        name = "Merge Scope",           # プロパティ名
+        items = [                       # 選択肢
+            ('OBJECT', "Object", "Merge materials of the target object"),
+            ('SELECTED', "Selected", "Merge materials across the selected objects"),
+            ('COLLECTION', "Collection", "Merge materials across the objects in the target collection"),
+            ('SCENE', "Scene", "Merge materials across all objects in the scene"),
+        ],
+        default = 'OBJECT',             # デフォルト値
+        description = "",               # 説明文
+    )
+
+    # シーン上のパネルに表示するコレクション選択用のカスタムプロパティを定義する
+    prop_collectionselect: PointerProperty(
+        name = "Select Collection",     # プロパティ名
+        type = bpy.types.Collection,    # タイプ
+        description = "",               # 説明文
+    )
+
+    # シーン上のパネルに表示する許容誤差指定用のカスタムプロパティを定義する
+    prop_tolerance: FloatProperty(
+        name = "Tolerance",             # プロパティ名
+        default = 0.0,                  # デフォルト値
+        min = 0.0,                      # 最小値
+        soft_max = 0.01,                # 表示上の最大値
+        precision = 6,                  # 表示桁数
+        description = "Maximum difference of each socket value to merge (0 : exact match)", # 説明文
+    )
+
+    # シーン上のパネルに表示する永続キャッシュ選択用のカスタムプロパティを定義する
+    prop_signaturecache: EnumProperty(
+        name = "Signature Cache",       # プロパティ名
+        items = [                       # 選択肢
+            ('NONE', "None", "Resolve every material node tree on each run"),
+            ('PROPERTY', "Material Property", "Store resolved nodes as a custom property on each material"),
+            ('SIDECAR', "Sidecar File", "Store resolved nodes in a JSON file next to the .blend file"),
+        ],
+        default = 'NONE',               # デフォルト値
+        description = "",               # 説明文
+    )
+
+    # シーン上のパネルに表示する画像の重複統合指定用のカスタムプロパティを定義する
+    prop_dedupimages: BoolProperty(
+        name = "Deduplicate Images",    # プロパティ名
+        default = False,                # デフォルト値
+        description = "Remap image textures with identical content to one image before merging", # 説明文
+    )
+
+    # シーン上のパネルに表示する未使用データの削除指定用のカスタムプロパティを定義する
+    prop_cleanuporphans: BoolProperty(
+        name = "Remove Orphans",        # プロパティ名
+        default = False,                # デフォルト値
+        description = "Remove the materials, node groups and images left without users by the merge", # 説明文
+    )
+
+    # シーン上のパネルに表示するマテリアル毎のメッシュ作成方法選択用のカスタムプロパティを定義する
+    prop_batchmeshes: EnumProperty(
+        name = "Batch Meshes",          # プロパティ名
+        items = [                       # 選択肢
+            ('NONE', "None", "Keep the merged objects as they are"),
+            ('OBJECT', "Per Object", "Create one mesh per material of each object"),
+            ('MATERIAL', "Per Material", "Create one mesh per material joining all target objects"),
+        ],
+        default = 'NONE',               # デフォルト値
+        description = "Create meshes split by merged material for export batching", # 説明文
+    )
+
+    # シーン上のパネルに表示する計測結果表示用のカスタムプロパティを定義する
+    prop_profile: BoolProperty(
+        name = "Profile",               # プロパティ名
+        default = False,                # デフォルト値
+        description = "Report the time of each merge stage and the operation counters", # 説明文
+    )
+
+    # シーン上のパネルに表示するライブラリ指定用のカスタムプロパティを定義する
+    prop_libraryfilepath: StringProperty(
+        name = "Library File",          # プロパティ名
+        default = "",                   # デフォルト値
+        subtype = 'FILE_PATH',          # サブタイプ
+        description = "Material library .blend file to deduplicate against", # 説明文
+    )
+
+    # シーン上のパネルに表示するライブラリの読み込み方法選択用のカスタムプロパティを定義する
+    prop_librarylink: EnumProperty(
+        name = "Library Load",          # プロパティ名
+        items = [                       # 選択肢
+            ('LINK', "Link", "Link the matching library materials"),
+            ('APPEND', "Append", "Append the matching library materials"),
+        ],
+        default = 'LINK',               # デフォルト値
+        description = "",               # 説明文
+    )
+
 
 # 登録に関する処理
 # 登録対象のクラス名
 regist_classes = (
     HOLOMON_PT_addon_bsdf_material_merge,
     HOLOMON_OT_addon_bsdf_material_merge,
+    HOLOMON_OT_addon_bsdf_material_merge_modal,
+    HOLOMON_OT_addon_bsdf_material_merge_preview,
+    HOLOMON_OT_addon_bsdf_material_merge_live,
+    HOLOMON_OT_addon_bsdf_material_merge_remerge,
+    HOLOMON_OT_addon_bsdf_material_merge_library,
+    HOLOMON_OT_addon_bsdf_material_merge_stats_export,
     HOLOMON_addon_bsdf_material_merge_properties,
 )
 
@@ -180,9 +755,19 @@ def register():
         bpy.utils.register_class(regist_cls)
     # シーン情報にカスタムプロパティを登録する
     bpy.types.Scene.holomon_bsdf_material_merge = PointerProperty(type=HOLOMON_addon_bsdf_material_merge_properties)
+    # 雛形のノードから比較対象の入力端子を検出する
+    # (登録中はデータを変更できないため、登録後のタイマーで実行する)
+    bpy.app.timers.register(UI_operations.comp_material_bsdf.discover_surface_shader_layouts, first_interval=0.0)
+    # ファイルの読み込み前に差分マージの監視を終了するハンドラを登録する
+    if UI_operations.watch_material_signature.on_load_pre not in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.append(UI_operations.watch_material_signature.on_load_pre)
 
 # 作成クラスと定義の登録解除メソッド
 def unregister():
+    # 差分マージの監視を終了し、ファイルの読み込み前のハンドラを解除する
+    UI_operations.watch_material_signature.end_live_signature_index()
+    if UI_operations.watch_material_signature.on_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(UI_operations.watch_material_signature.on_load_pre)
     # シーン情報のカスタムプロパティを削除する
     del bpy.types.Scene.holomon_bsdf_material_merge
     # カスタムクラスを解除する
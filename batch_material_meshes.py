@@ -0,0 +1,274 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "control_materialslot_utilities" in locals():
+        importlib.reload(control_materialslot_utilities)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+import bpy
+import numpy as np
+from . import control_materialslot_utilities
+from . import profile_material_merge
+
+# 作成したメッシュオブジェクトを格納するコレクション名
+def_batch_collection_name = "BSDFMerge Batches"
+
+# マテリアル毎に作成するオブジェクトの名前
+# ('OBJECT' はオブジェクト名とマテリアル名、'MATERIAL' はマテリアル名から作成する)
+def_batch_object_name_format = {
+    'OBJECT': "{object_name}.{material_name}",
+    'MATERIAL': "Batch.{material_name}",
+}
+
+# 空のスロットのポリゴンをまとめたオブジェクトに使用するマテリアル名
+def_batch_empty_material_name = "None"
+
+# 指定オブジェクトのポリゴンをマテリアル毎のメッシュオブジェクトに分割する
+def batch_material_meshes(arg_objects:list, arg_batch_mode:str='OBJECT') -> list:
+    """指定オブジェクトのポリゴンをマテリアル毎のメッシュオブジェクトに分割する
+    オペレーターを使わずに、頂点、ループ、ポリゴンの配列を foreach_get で1回ずつ読み込み、
+    マテリアル毎のメッシュを foreach_set で一括して作成する
+    元のオブジェクトは変更せず、作成したオブジェクトは専用のコレクションに格納する
+    (頂点グループ、シェイプキー、カスタム法線などの UV マップ以外の属性は引き継がない)
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_batch_mode (str, optional): 分割方法
+            ('OBJECT' : オブジェクト毎にマテリアル毎のメッシュを作成する,
+             'MATERIAL' : 同じマテリアルを使用する全オブジェクトのポリゴンを1つのメッシュにまとめる)
+
+    Returns:
+        list: 作成したオブジェクトのリスト
+    """
+
+    # 対象のメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in arg_objects if check_object.type == 'MESH']
+
+    # 作成したオブジェクトを格納するコレクションを取得する
+    batch_collection = get_batch_collection()
+
+    # 作成したオブジェクトのリスト
+    batch_objects = []
+
+    # 全オブジェクトをまとめる場合のマテリアル毎の断片
+    # (マテリアルのポインタ値をキーとして (マテリアル, 断片のリスト) を保持する)
+    material_chunks = {}
+
+    for target_object in target_objects:
+        # オブジェクトをまとめる場合はワールド座標に変換する
+        object_chunks = get_mesh_material_chunks(arg_object=target_object,
+            arg_use_world=(arg_batch_mode == 'MATERIAL'))
+
+        for material_key, (chunk_mat, mesh_chunk) in object_chunks.items():
+            if arg_batch_mode == 'MATERIAL':
+                # 全オブジェクトの断片をマテリアル毎にまとめる
+                material_chunks.setdefault(material_key, (chunk_mat, []))[1].append(mesh_chunk)
+                continue
+
+            # オブジェクト毎にマテリアル毎のオブジェクトを作成する
+            batch_object = create_batch_object(arg_name=def_batch_object_name_format['OBJECT'].format(
+                object_name=target_object.name, material_name=get_batch_material_name(arg_material=chunk_mat)),
+                arg_material=chunk_mat, arg_mesh_chunks=[mesh_chunk], arg_collection=batch_collection)
+
+            # 元のオブジェクトの位置に配置する
+            batch_object.matrix_world = target_object.matrix_world.copy()
+            batch_objects.append(batch_object)
+
+    # マテリアル毎に全オブジェクトの断片をまとめたオブジェクトを作成する
+    for chunk_mat, mesh_chunks in material_chunks.values():
+        batch_objects.append(create_batch_object(arg_name=def_batch_object_name_format['MATERIAL'].format(
+            material_name=get_batch_material_name(arg_material=chunk_mat)),
+            arg_material=chunk_mat, arg_mesh_chunks=mesh_chunks, arg_collection=batch_collection))
+
+    # 作成したオブジェクト数を記録する
+    profile_material_merge.add_profile_counter("batch_objects", len(batch_objects))
+
+    return batch_objects
+
+# 指定オブジェクトのポリゴンをマテリアル毎の断片に分ける
+def get_mesh_material_chunks(arg_object:bpy.types.Object, arg_use_world:bool=False) -> dict:
+    """指定オブジェクトのポリゴンをマテリアル毎の断片に分ける
+    同じマテリアルのスロットが複数ある場合は1つの断片にまとめる
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+        arg_use_world (bool, optional): 頂点座標をワールド座標に変換するか
+
+    Returns:
+        dict: マテリアルのポインタ値(空のスロットは None)をキーとした (マテリアル, 断片) の組
+              断片は {"co": 頂点座標の配列(頂点数 x 3), "loop_vertices": ループ毎の頂点番号の配列,
+                      "loop_totals": ポリゴン毎のループ数の配列, "use_smooth": ポリゴン毎のスムーズの配列,
+                      "uv_layers": UV マップ名をキーとしたループ毎の UV 座標の配列(ループ数 x 2)}
+    """
+
+    # メッシュデータを取得する
+    target_mesh = arg_object.data
+    vertex_count = len(target_mesh.vertices)
+    loop_count = len(target_mesh.loops)
+    polygon_count = len(target_mesh.polygons)
+
+    # ポリゴンがない場合は処理しない
+    if polygon_count == 0:
+        return {}
+
+    # 頂点、ループ、ポリゴンの配列を一括で取得する
+    vertex_co = np.empty(vertex_count * 3, dtype=np.float32)
+    target_mesh.vertices.foreach_get("co", vertex_co)
+    vertex_co = vertex_co.reshape(vertex_count, 3)
+    loop_vertices = np.empty(loop_count, dtype=np.int32)
+    target_mesh.loops.foreach_get("vertex_index", loop_vertices)
+    loop_starts = np.empty(polygon_count, dtype=np.int32)
+    target_mesh.polygons.foreach_get("loop_start", loop_starts)
+    loop_totals = np.empty(polygon_count, dtype=np.int32)
+    target_mesh.polygons.foreach_get("loop_total", loop_totals)
+    use_smooth = np.empty(polygon_count, dtype=bool)
+    target_mesh.polygons.foreach_get("use_smooth", use_smooth)
+    uv_layers = {}
+    for uv_layer in target_mesh.uv_layers:
+        uv_values = np.empty(loop_count * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uv_values)
+        uv_layers[uv_layer.name] = uv_values.reshape(loop_count, 2)
+
+    # 指定に従って頂点座標をワールド座標に変換する
+    if arg_use_world == True:
+        world_matrix = np.array(arg_object.matrix_world, dtype=np.float64)
+        vertex_co = (vertex_co @ world_matrix[:3, :3].T + world_matrix[:3, 3]).astype(np.float32)
+
+    # ポリゴン毎のスロット番号を取得する(スロット数を超える番号は最後のスロットとして扱う)
+    slot_materials = [check_material_slot.material for check_material_slot in arg_object.material_slots]
+    if len(slot_materials) == 0:
+        slot_materials = [None]
+    polygon_slots = control_materialslot_utilities.get_polygon_material_indices(arg_mesh=target_mesh)
+    np.clip(polygon_slots, 0, len(slot_materials) - 1, out=polygon_slots)
+
+    # 同じマテリアルのスロット番号をまとめる
+    material_slot_dict = {}
+    for slot_index, slot_mat in enumerate(slot_materials):
+        material_key = slot_mat.as_pointer() if slot_mat != None else None
+        material_slot_dict.setdefault(material_key, (slot_mat, []))[1].append(slot_index)
+
+    # マテリアル毎の断片を作成する
+    object_chunks = {}
+    for material_key, (slot_mat, slot_indices) in material_slot_dict.items():
+        # マテリアルのポリゴンを取得する
+        polygon_mask = np.isin(polygon_slots, slot_indices)
+        if not polygon_mask.any():
+            continue
+        chunk_starts = loop_starts[polygon_mask]
+        chunk_totals = loop_totals[polygon_mask]
+
+        # ポリゴンのループ番号を一括で求める
+        # (ポリゴン毎の元のループ開始位置と断片内の開始位置の差を、断片内の連番に加える)
+        chunk_offsets = np.cumsum(chunk_totals) - chunk_totals
+        chunk_loops = np.repeat(chunk_starts - chunk_offsets, chunk_totals) + np.arange(int(chunk_totals.sum()))
+
+        # 使用する頂点のみを取り出し、ループの頂点番号を断片内の番号に振り直す
+        used_vertices, chunk_loop_vertices = np.unique(loop_vertices[chunk_loops], return_inverse=True)
+
+        object_chunks[material_key] = (slot_mat, {
+            "co": vertex_co[used_vertices],
+            "loop_vertices": chunk_loop_vertices.astype(np.int32),
+            "loop_totals": chunk_totals,
+            "use_smooth": use_smooth[polygon_mask],
+            "uv_layers": {uv_name: uv_values[chunk_loops] for uv_name, uv_values in uv_layers.items()},
+        })
+
+    return object_chunks
+
+# 断片を結合したメッシュオブジェクトを作成する
+def create_batch_object(arg_name:str, arg_material:bpy.types.Material, arg_mesh_chunks:list,
+  arg_collection:bpy.types.Collection) -> bpy.types.Object:
+    """断片を結合したメッシュオブジェクトを作成する
+    頂点、ループ、ポリゴンを一括で追加し、foreach_set で配列を設定する
+
+    Args:
+        arg_name (str): オブジェクトとメッシュの名前
+        arg_material (bpy.types.Material): メッシュに設定するマテリアル(None の場合は空のスロット)
+        arg_mesh_chunks (list): get_mesh_material_chunks で作成した断片のリスト
+        arg_collection (bpy.types.Collection): オブジェクトを格納するコレクション
+
+    Returns:
+        bpy.types.Object: 作成したオブジェクト
+    """
+
+    # 断片毎の頂点番号をずらして結合する
+    vertex_offsets = np.cumsum([0] + [len(mesh_chunk["co"]) for mesh_chunk in arg_mesh_chunks])
+    vertex_co = np.concatenate([mesh_chunk["co"] for mesh_chunk in arg_mesh_chunks])
+    loop_vertices = np.concatenate([mesh_chunk["loop_vertices"] + vertex_offset
+        for mesh_chunk, vertex_offset in zip(arg_mesh_chunks, vertex_offsets)]).astype(np.int32)
+    loop_totals = np.concatenate([mesh_chunk["loop_totals"] for mesh_chunk in arg_mesh_chunks]).astype(np.int32)
+    loop_starts = (np.cumsum(loop_totals) - loop_totals).astype(np.int32)
+    use_smooth = np.concatenate([mesh_chunk["use_smooth"] for mesh_chunk in arg_mesh_chunks])
+
+    # メッシュを作成し、要素を一括で追加する
+    batch_mesh = bpy.data.meshes.new(arg_name)
+    batch_mesh.vertices.add(len(vertex_co))
+    batch_mesh.loops.add(len(loop_vertices))
+    batch_mesh.polygons.add(len(loop_totals))
+
+    # 配列を一括で設定する
+    # (Blender 4.0 以降はループ数がループ開始位置から求められ、設定できない)
+    batch_mesh.vertices.foreach_set("co", vertex_co.ravel())
+    batch_mesh.loops.foreach_set("vertex_index", loop_vertices)
+    batch_mesh.polygons.foreach_set("loop_start", loop_starts)
+    if bpy.app.version < (4, 0, 0):
+        batch_mesh.polygons.foreach_set("loop_total", loop_totals)
+    batch_mesh.polygons.foreach_set("use_smooth", use_smooth)
+
+    # UV マップを設定する(断片に存在しない UV マップは原点とする)
+    uv_names = []
+    for mesh_chunk in arg_mesh_chunks:
+        uv_names.extend(uv_name for uv_name in mesh_chunk["uv_layers"] if uv_name not in uv_names)
+    for uv_name in uv_names:
+        uv_values = np.concatenate([mesh_chunk["uv_layers"].get(uv_name,
+            np.zeros((len(mesh_chunk["loop_vertices"]), 2), dtype=np.float32)) for mesh_chunk in arg_mesh_chunks])
+        batch_mesh.uv_layers.new(name=uv_name).data.foreach_set("uv", uv_values.ravel())
+
+    # 辺を作成してメッシュを更新する
+    batch_mesh.update(calc_edges=True)
+
+    # マテリアルを設定する
+    batch_mesh.materials.append(arg_material)
+
+    # オブジェクトを作成してコレクションに格納する
+    batch_object = bpy.data.objects.new(arg_name, batch_mesh)
+    arg_collection.objects.link(batch_object)
+
+    return batch_object
+
+# 作成したオブジェクトを格納するコレクションを取得する
+def get_batch_collection() -> bpy.types.Collection:
+    """作成したオブジェクトを格納するコレクションを取得する
+    存在しない場合は作成して現在のシーンにリンクする
+
+    Returns:
+        bpy.types.Collection: コレクション
+    """
+
+    # 既存のコレクションを取得する
+    batch_collection = bpy.data.collections.get(def_batch_collection_name)
+    if batch_collection == None:
+        batch_collection = bpy.data.collections.new(def_batch_collection_name)
+
+    # 現在のシーンにリンクする
+    scene_collection = bpy.context.scene.collection
+    if scene_collection.children.get(batch_collection.name) == None:
+        scene_collection.children.link(batch_collection)
+
+    return batch_collection
+
+# 作成するオブジェクトの名前に使用するマテリアル名を取得する
+def get_batch_material_name(arg_material:bpy.types.Material) -> str:
+    """作成するオブジェクトの名前に使用するマテリアル名を取得する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル(空のスロットは None)
+
+    Returns:
+        str: マテリアル名
+    """
+
+    if arg_material == None:
+        return def_batch_empty_material_name
+
+    return arg_material.name
@@ -0,0 +1,72 @@
+# ベンチマーク用の bpy 代替パッケージ
+# Blender をインストールしていない環境でアドオンのモジュールを読み込むための最小限の実装
+from . import types
+from . import props
+from . import ops
+from . import utils
+from . import path
+from . import msgbus
+from . import app
+from . import _blend_data as _data_module
+
+# 全データブロック
+data = _data_module.blend_data
+
+
+# ウィンドウマネージャー(進捗表示とタイマー)
+class _WindowManager:
+    def __init__(self):
+        self.progress = []
+        self.windows = []
+
+    def progress_begin(self, arg_min, arg_max):
+        self.progress.append(("begin", arg_min, arg_max))
+
+    def progress_update(self, arg_value):
+        self.progress.append(("update", arg_value))
+
+    def progress_end(self):
+        self.progress.append(("end",))
+
+    def event_timer_add(self, time_step, window=None):
+        return object()
+
+    def event_timer_remove(self, timer):
+        return
+
+    def modal_handler_add(self, operator):
+        return True
+
+
+# 実行コンテキスト
+class _Context:
+    def __init__(self):
+        self.object = None
+        self.window = None
+        self.window_manager = _WindowManager()
+        self.selected_objects = []
+
+    @property
+    def active_object(self):
+        return self.object
+
+    @property
+    def scene(self):
+        return data.scenes[0]
+
+    # 一時的にコンテキストを差し替える
+    def temp_override(self, **kwargs):
+        import contextlib
+        @contextlib.contextmanager
+        def override():
+            saved = {key: getattr(self, key) for key in kwargs if key in self.__dict__}
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+            try:
+                yield self
+            finally:
+                for key, value in saved.items():
+                    setattr(self, key, value)
+        return override()
+
+context = _Context()
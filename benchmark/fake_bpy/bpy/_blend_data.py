@@ -0,0 +1,197 @@
+# ベンチマーク用の bpy.data 代替モジュール
+import os
+from . import types
+
+# ライブラリとして読み込める .blend ファイルの代替
+# 絶対パスをキーとして {"materials": マテリアル名をキーとしたマテリアルを設定する関数} を保持する
+library_files = {}
+
+# IDデータブロックの一覧
+class IDCollection(types.bpy_prop_collection):
+    def __init__(self, arg_id_cls):
+        super().__init__()
+        self._id_cls = arg_id_cls
+        self._name_index = {}
+
+    # 重複しない名前を付けてデータブロックを登録する
+    def _link(self, arg_id):
+        base_name = arg_id.name
+        new_name = base_name
+        num = 0
+        while new_name in self._name_index:
+            num += 1
+            new_name = "%s.%03d" % (base_name, num)
+        arg_id.name = new_name
+        self._name_index[new_name] = arg_id
+        self.append(arg_id)
+        return arg_id
+
+    # 名前で取得する(辞書で高速に検索する)
+    # (名前とライブラリのパスの組を指定した場合は、ライブラリが一致するものを取得する)
+    def get(self, arg_key, arg_default=None):
+        if isinstance(arg_key, tuple):
+            for item in self:
+                item_path = item.library.filepath if item.library != None else None
+                if item.name == arg_key[0] and item_path == arg_key[1]:
+                    return item
+            return arg_default
+        found_id = self._name_index.get(arg_key)
+        if found_id != None and found_id.name == arg_key:
+            return found_id
+        return super().get(arg_key, arg_default)
+
+    # データブロックを追加する
+    def new(self, name:str, *args, **kwargs):
+        return self._link(self._id_cls(name, *args, **kwargs))
+
+    # データブロックを削除する
+    def remove(self, arg_id, do_unlink:bool=True):
+        if self._name_index.get(arg_id.name) is arg_id:
+            self._name_index.pop(arg_id.name)
+        list.remove(self, arg_id)
+
+# 画像の一覧
+class ImageCollection(IDCollection):
+    # 画像を追加する
+    def new(self, name:str, width:int, height:int, **kwargs):
+        return self._link(types.Image(name, width, height))
+
+# オブジェクトの一覧
+class ObjectCollection(IDCollection):
+    # オブジェクトを追加する
+    def new(self, name:str, object_data):
+        return self._link(types.Object(name, object_data))
+
+# ノードグループの一覧
+class NodeTreeCollection(IDCollection):
+    # ノードグループを追加する
+    def new(self, name:str, type:str="ShaderNodeTree"):
+        return self._link(types.ShaderNodeTree(name))
+
+# ライブラリの一覧
+class LibraryCollection(IDCollection):
+    # ライブラリのデータブロックを読み込む
+    def load(self, filepath:str, link:bool=False, relative:bool=False):
+        return _LibraryLoader(self, filepath, link)
+
+    # ライブラリとリンクしたデータブロックを削除する
+    def remove(self, arg_id, do_unlink:bool=True):
+        blend_data.batch_remove([check_mat for check_mat in blend_data.materials if check_mat.library is arg_id])
+        super().remove(arg_id)
+
+# ライブラリの読み込み元のデータ名一覧
+class _LibraryData:
+    def __init__(self, arg_materials:list):
+        self.materials = arg_materials
+
+# ライブラリの読み込み(with 文の終了時に data_to に指定したデータブロックを読み込む)
+class _LibraryLoader:
+    def __init__(self, arg_libraries, arg_filepath:str, arg_link:bool):
+        self._libraries = arg_libraries
+        self._filepath = arg_filepath
+        self._link = arg_link
+        self._source = library_files.get(arg_filepath)
+        if self._source == None:
+            raise OSError("Cannot read file '%s'" % arg_filepath)
+
+    def __enter__(self):
+        self._data_to = _LibraryData([])
+        return (_LibraryData(list(self._source["materials"].keys())), self._data_to)
+
+    def __exit__(self, *args):
+        if args[0] != None:
+            return False
+        library = None
+        if self._link == True:
+            for check_library in self._libraries:
+                if check_library.filepath == self._filepath:
+                    library = check_library
+            if library == None:
+                library = self._libraries._link(types.Library(os.path.basename(self._filepath), self._filepath))
+        loaded_materials = []
+        for material_name in self._data_to.materials:
+            builder = self._source["materials"].get(material_name)
+            if builder == None:
+                loaded_materials.append(None)
+                continue
+            # 読み込み済みのリンクしたマテリアルは再利用する
+            if library != None:
+                loaded_mat = next((check_mat for check_mat in blend_data.materials
+                    if check_mat.library is library and check_mat.name == material_name), None)
+                if loaded_mat != None:
+                    loaded_materials.append(loaded_mat)
+                    continue
+            loaded_mat = types.Material(material_name)
+            builder(loaded_mat)
+            if library != None:
+                # リンクしたデータブロックは名前を変更せずに登録する
+                loaded_mat.library = library
+                blend_data.materials.append(loaded_mat)
+            else:
+                blend_data.materials._link(loaded_mat)
+            loaded_materials.append(loaded_mat)
+        self._data_to.materials = loaded_materials
+        return False
+
+
+# 全データブロック
+class BlendData:
+    def __init__(self):
+        self.reset()
+
+    # 全データブロックを初期化する
+    def reset(self):
+        self.filepath = ""
+        self.is_dirty = False
+        self.materials = IDCollection(types.Material)
+        self.meshes = IDCollection(types.Mesh)
+        self.objects = ObjectCollection(types.Object)
+        self.images = ImageCollection(types.Image)
+        self.node_groups = NodeTreeCollection(types.ShaderNodeTree)
+        self.collections = IDCollection(types.Collection)
+        self.scenes = IDCollection(types.Scene)
+        self.libraries = LibraryCollection(types.Library)
+        self.scenes.new("Scene")
+
+    # 複数のデータブロックを一括で削除する
+    def batch_remove(self, ids):
+        for remove_id in list(ids):
+            for id_collection in (self.materials, self.meshes, self.objects, self.images, self.node_groups, self.collections, self.libraries):
+                if remove_id in id_collection:
+                    id_collection.remove(remove_id)
+                    break
+
+# 利用者数を数える
+def count_users(arg_id) -> int:
+    user_count = 0
+    if isinstance(arg_id, types.Material):
+        for check_mesh in blend_data.meshes:
+            user_count += sum(1 for check_mat in check_mesh.materials if check_mat is arg_id)
+        # オブジェクト側のマテリアルもリンク先に関わらず利用者として数える
+        for check_object in blend_data.objects:
+            user_count += sum(1 for slot_state in getattr(check_object, "_slot_states", []) if slot_state[1] is arg_id)
+    elif isinstance(arg_id, types.Image):
+        for check_tree in _all_node_trees():
+            user_count += sum(1 for check_node in check_tree.nodes if getattr(check_node, "image", None) is arg_id)
+    elif isinstance(arg_id, types.NodeTree):
+        for check_tree in _all_node_trees():
+            user_count += sum(1 for check_node in check_tree.nodes if getattr(check_node, "node_tree", None) is arg_id)
+    elif isinstance(arg_id, types.Mesh):
+        user_count += sum(1 for check_object in blend_data.objects if check_object.data is arg_id)
+    elif isinstance(arg_id, types.Object):
+        user_count += sum(1 for check_collection in blend_data.collections if arg_id in check_collection.objects)
+        user_count += sum(1 for check_scene in blend_data.scenes if arg_id in check_scene.collection.objects)
+    else:
+        user_count += 1
+    return user_count
+
+# マテリアルとノードグループの全ノードツリーを取得する
+def _all_node_trees():
+    for check_mat in blend_data.materials:
+        if check_mat.node_tree != None:
+            yield check_mat.node_tree
+    for check_group in blend_data.node_groups:
+        yield check_group
+
+# 唯一の BlendData インスタンス
+blend_data = BlendData()
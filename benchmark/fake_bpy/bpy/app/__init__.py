@@ -0,0 +1,9 @@
+# ベンチマーク用の bpy.app 代替モジュール
+from . import handlers
+from . import timers
+
+# 再現する Blender のバージョン
+version = (2, 83, 0)
+version_string = "2.83.0"
+background = True
+binary_path = ""
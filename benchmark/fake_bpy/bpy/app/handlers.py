@@ -0,0 +1,13 @@
+# ベンチマーク用の bpy.app.handlers 代替モジュール
+
+depsgraph_update_post = []
+load_pre = []
+load_post = []
+save_pre = []
+undo_post = []
+redo_post = []
+
+# ファイル読み込み後もハンドラを維持する指定
+def persistent(arg_function):
+    arg_function._bpy_persistent = True
+    return arg_function
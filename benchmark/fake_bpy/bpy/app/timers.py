@@ -0,0 +1,13 @@
+# ベンチマーク用の bpy.app.timers 代替モジュール
+
+# 登録中のタイマー関数の一覧
+registered_functions = []
+
+def register(function, first_interval:float=0.0, persistent:bool=False):
+    registered_functions.append(function)
+
+def unregister(function):
+    registered_functions.remove(function)
+
+def is_registered(function) -> bool:
+    return function in registered_functions
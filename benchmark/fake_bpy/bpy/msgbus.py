@@ -0,0 +1,10 @@
+# ベンチマーク用の bpy.msgbus 代替モジュール
+
+# 購読中の (キー, 所有者, 通知関数) の一覧
+subscriptions = []
+
+def subscribe_rna(key=None, owner=None, args=(), notify=None, options=set()):
+    subscriptions.append((key, owner, args, notify))
+
+def clear_by_owner(owner):
+    subscriptions[:] = [subscription for subscription in subscriptions if subscription[1] is not owner]
@@ -0,0 +1,85 @@
+# ベンチマーク用の bpy.ops 代替モジュール
+# オペレーターの呼び出し回数を call_counts に記録する
+import collections
+
+# オペレーター毎の呼び出し回数
+call_counts = collections.Counter()
+
+# 呼び出し回数を初期化する
+def reset_call_counts():
+    call_counts.clear()
+
+# 対象のオブジェクト(コンテキストのアクティブオブジェクト)を取得する
+def _context_object():
+    from . import context
+    return context.object
+
+# object カテゴリのオペレーター
+class _ObjectOps:
+    # モードを切り替える
+    def mode_set(self, mode:str="OBJECT", toggle:bool=False):
+        call_counts["object.mode_set"] += 1
+        target_object = _context_object()
+        if target_object != None:
+            target_object.mode = mode
+        return {'FINISHED'}
+
+    # アクティブなマテリアルスロットを移動する
+    def material_slot_move(self, direction:str="UP"):
+        call_counts["object.material_slot_move"] += 1
+        target_object = _context_object()
+        mesh_materials = target_object.data.materials
+        index_from = target_object.active_material_index
+        index_to = index_from + (1 if direction == "DOWN" else -1)
+        if index_to < 0 or index_to >= len(mesh_materials):
+            return {'CANCELLED'}
+        mesh_materials[index_from], mesh_materials[index_to] = mesh_materials[index_to], mesh_materials[index_from]
+        slot_states = target_object._get_slot_states()
+        slot_states[index_from], slot_states[index_to] = slot_states[index_to], slot_states[index_from]
+        for polygon in target_object.data.polygons:
+            if polygon.material_index == index_from:
+                polygon.material_index = index_to
+            elif polygon.material_index == index_to:
+                polygon.material_index = index_from
+        target_object.active_material_index = index_to
+        return {'FINISHED'}
+
+    # アクティブなマテリアルスロットを削除する
+    def material_slot_remove(self):
+        call_counts["object.material_slot_remove"] += 1
+        target_object = _context_object()
+        remove_index = target_object.active_material_index
+        target_object._get_slot_states().pop(remove_index)
+        target_object.data.materials.pop(index=remove_index)
+        # Blender と同様に削除位置以降の面のインデックスを1つ詰める
+        for polygon in target_object.data.polygons:
+            if polygon.material_index > 0 and polygon.material_index >= remove_index:
+                polygon.material_index -= 1
+        target_object.active_material_index = max(0, min(remove_index, len(target_object.data.materials) - 1))
+        return {'FINISHED'}
+
+# ed カテゴリのオペレーター
+class _EdOps:
+    # 取り消し履歴を積む
+    def undo_push(self, message:str=""):
+        call_counts["ed.undo_push"] += 1
+        return {'FINISHED'}
+
+# wm カテゴリのオペレーター
+class _WmOps:
+    # ファイルを開く
+    def open_mainfile(self, filepath:str=""):
+        call_counts["wm.open_mainfile"] += 1
+        from . import _blend_data as data
+        data.blend_data.reset()
+        data.blend_data.filepath = filepath
+        return {'FINISHED'}
+
+    # ファイルを保存する
+    def save_mainfile(self, filepath:str=""):
+        call_counts["wm.save_mainfile"] += 1
+        return {'FINISHED'}
+
+object = _ObjectOps()
+ed = _EdOps()
+wm = _WmOps()
@@ -0,0 +1,10 @@
+# ベンチマーク用の bpy.path 代替モジュール
+import os
+
+# 相対パス(// 始まり)を絶対パスに変換する
+def abspath(arg_path:str, start:str=None, library=None) -> str:
+    if arg_path.startswith("//"):
+        from . import _blend_data as data
+        base_dir = start if start != None else os.path.dirname(data.blend_data.filepath)
+        return os.path.join(base_dir, arg_path[2:])
+    return arg_path
@@ -0,0 +1,15 @@
+# ベンチマーク用の bpy.props 代替モジュール
+# プロパティ定義は (関数名, 引数) の組として保持する
+
+def _property(arg_name):
+    def define_property(**kwargs):
+        return (arg_name, kwargs)
+    return define_property
+
+PointerProperty = _property("PointerProperty")
+CollectionProperty = _property("CollectionProperty")
+BoolProperty = _property("BoolProperty")
+IntProperty = _property("IntProperty")
+FloatProperty = _property("FloatProperty")
+StringProperty = _property("StringProperty")
+EnumProperty = _property("EnumProperty")
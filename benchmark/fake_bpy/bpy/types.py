@@ -0,0 +1,928 @@
+# ベンチマーク用の bpy.types 代替モジュール
+# Blender をインストールしていない環境でアドオンの処理を実行するため
+# マテリアル、ノードツリー、ソケット、リンク、マテリアルスロット、メッシュを純粋な Python で再現する
+import itertools
+import struct
+
+# ポインタ値の採番用カウンタ
+_pointer_counter = itertools.count(1)
+
+# RNA 構造体の基底クラス
+class bpy_struct:
+    # ポインタ値を返す
+    def as_pointer(self) -> int:
+        # 初回参照時にポインタ値を採番する
+        if "_pointer" not in self.__dict__:
+            self.__dict__["_pointer"] = next(_pointer_counter)
+        return self.__dict__["_pointer"]
+
+# RNA と同様に単精度へ丸める
+def _float32(arg_value) -> float:
+    return struct.unpack("f", struct.pack("f", float(arg_value)))[0]
+
+# 単精度の浮動小数点数配列(ソケットの default_value)
+class _float_prop_array(list):
+    def __init__(self, arg_values=()):
+        super().__init__(_float32(value) for value in arg_values)
+
+    def __setitem__(self, arg_key, arg_value):
+        if isinstance(arg_key, slice):
+            list.__setitem__(self, arg_key, [_float32(value) for value in arg_value])
+        else:
+            list.__setitem__(self, arg_key, _float32(arg_value))
+
+    def foreach_get(self, arg_seq):
+        for num, value in enumerate(self):
+            arg_seq[num] = value
+
+    def foreach_set(self, arg_seq):
+        for num in range(len(self)):
+            self[num] = arg_seq[num]
+
+# RNA 配列プロパティ(default_value や pixels など)
+class bpy_prop_array(list):
+    # 配列の値を一括で取得する
+    def foreach_get(self, arg_seq):
+        for num, value in enumerate(self):
+            arg_seq[num] = value
+
+    # 配列の値を一括で設定する
+    def foreach_set(self, arg_seq):
+        for num in range(len(self)):
+            self[num] = arg_seq[num]
+
+# RNA コレクションプロパティ
+class bpy_prop_collection(list):
+    # 添字または名前で要素を取得する
+    def __getitem__(self, arg_key):
+        if isinstance(arg_key, str):
+            found_item = self.get(arg_key)
+            if found_item == None:
+                raise KeyError(arg_key)
+            return found_item
+        return list.__getitem__(self, arg_key)
+
+    # 名前で要素を取得する
+    def get(self, arg_key, arg_default=None):
+        for item in self:
+            if getattr(item, "name", None) == arg_key:
+                return item
+        return arg_default
+
+    # 名前の一覧を取得する
+    def keys(self) -> list:
+        return [item.name for item in self]
+
+    # 要素の属性を一括で取得する
+    def foreach_get(self, arg_attr:str, arg_seq):
+        num = 0
+        for item in self:
+            value = getattr(item, arg_attr)
+            if isinstance(value, (list, tuple)):
+                for element in value:
+                    arg_seq[num] = element
+                    num += 1
+            else:
+                arg_seq[num] = value
+                num += 1
+
+    # 要素の属性を一括で設定する
+    def foreach_set(self, arg_attr:str, arg_seq):
+        num = 0
+        for item in self:
+            value = getattr(item, arg_attr)
+            if isinstance(value, (list, tuple)):
+                size = len(value)
+                setattr(item, arg_attr, type(value)(arg_seq[num:num+size]))
+                num += size
+            else:
+                setattr(item, arg_attr, type(value)(arg_seq[num]))
+                num += 1
+
+
+# IDデータブロックの基底クラス
+class ID(bpy_struct):
+    def __init__(self, name:str):
+        self.name = name
+        self.use_fake_user = False
+        self.library = None
+        self.is_library_indirect = False
+        self._id_properties = {}
+
+    # カスタムプロパティの取得
+    def __getitem__(self, arg_key):
+        return self._id_properties[arg_key]
+
+    # カスタムプロパティの設定
+    def __setitem__(self, arg_key, arg_value):
+        self._id_properties[arg_key] = arg_value
+
+    # カスタムプロパティの削除
+    def __delitem__(self, arg_key):
+        del self._id_properties[arg_key]
+
+    # カスタムプロパティの存在確認
+    def __contains__(self, arg_key) -> bool:
+        return arg_key in self._id_properties
+
+    # カスタムプロパティを取得する
+    def get(self, arg_key, arg_default=None):
+        return self._id_properties.get(arg_key, arg_default)
+
+    # カスタムプロパティの名前一覧
+    def keys(self) -> list:
+        return list(self._id_properties.keys())
+
+    # ライブラリ名を含む一意な名前
+    @property
+    def name_full(self) -> str:
+        if self.library != None:
+            import os
+            return "%s [%s]" % (self.name, os.path.basename(self.library.filepath))
+        return self.name
+
+    # 評価前のデータブロック(依存グラフの評価は行わないため自身)
+    @property
+    def original(self):
+        return self
+
+    # 利用者数(BlendData から逆参照して数える)
+    @property
+    def users(self) -> int:
+        from . import _blend_data as _data_module
+        return _data_module.count_users(self) + (1 if self.use_fake_user else 0)
+
+    # データブロックを複製する
+    def copy(self):
+        raise NotImplementedError
+
+
+# ノードソケットの基底クラス
+class NodeSocket(bpy_struct):
+    bl_idname = "NodeSocket"
+
+    def __init__(self, arg_node, arg_name:str, arg_identifier:str=None, arg_is_output:bool=False):
+        self.node = arg_node
+        self.name = arg_name
+        self.identifier = arg_identifier if arg_identifier != None else arg_name
+        self.is_output = arg_is_output
+        self.enabled = True
+        self.hide_value = False
+        self._link_count = 0
+
+    # ソケットの型名
+    @property
+    def type(self) -> str:
+        return self._type_name
+
+    # リンクが接続されているか
+    @property
+    def is_linked(self) -> bool:
+        return self._link_count > 0
+
+    # 接続されたリンクの一覧
+    @property
+    def links(self) -> list:
+        tree = self.node.id_data
+        if self.is_output:
+            return [link for link in tree.links if link.from_socket is self]
+        return [link for link in tree.links if link.to_socket is self]
+
+class NodeSocketStandard(NodeSocket):
+    bl_idname = "NodeSocketStandard"
+
+class NodeSocketShader(NodeSocketStandard):
+    bl_idname = "NodeSocketShader"
+    _type_name = "SHADER"
+
+class NodeSocketFloat(NodeSocketStandard):
+    bl_idname = "NodeSocketFloat"
+    _type_name = "VALUE"
+
+    def __init__(self, arg_node, arg_name, arg_identifier=None, arg_is_output=False, arg_default=0.0):
+        super().__init__(arg_node, arg_name, arg_identifier, arg_is_output)
+        self.default_value = arg_default
+
+    @property
+    def default_value(self) -> float:
+        return self._default_value
+
+    @default_value.setter
+    def default_value(self, arg_value):
+        self._default_value = _float32(arg_value)
+
+class NodeSocketFloatFactor(NodeSocketStandard):
+    bl_idname = "NodeSocketFloatFactor"
+    _type_name = "VALUE"
+
+    def __init__(self, arg_node, arg_name, arg_identifier=None, arg_is_output=False, arg_default=0.0):
+        super().__init__(arg_node, arg_name, arg_identifier, arg_is_output)
+        self.default_value = arg_default
+
+    @property
+    def default_value(self) -> float:
+        return self._default_value
+
+    @default_value.setter
+    def default_value(self, arg_value):
+        self._default_value = _float32(arg_value)
+
+class NodeSocketVector(NodeSocketStandard):
+    bl_idname = "NodeSocketVector"
+    _type_name = "VECTOR"
+
+    def __init__(self, arg_node, arg_name, arg_identifier=None, arg_is_output=False, arg_default=(0.0, 0.0, 0.0)):
+        super().__init__(arg_node, arg_name, arg_identifier, arg_is_output)
+        self._default_value = _float_prop_array(arg_default)
+
+    @property
+    def default_value(self):
+        return self._default_value
+
+    @default_value.setter
+    def default_value(self, arg_value):
+        self._default_value[:] = list(arg_value)
+
+class NodeSocketColor(NodeSocketStandard):
+    bl_idname = "NodeSocketColor"
+    _type_name = "RGBA"
+
+    def __init__(self, arg_node, arg_name, arg_identifier=None, arg_is_output=False, arg_default=(0.0, 0.0, 0.0, 1.0)):
+        super().__init__(arg_node, arg_name, arg_identifier, arg_is_output)
+        self._default_value = _float_prop_array(arg_default)
+
+    @property
+    def default_value(self):
+        return self._default_value
+
+    @default_value.setter
+    def default_value(self, arg_value):
+        self._default_value[:] = list(arg_value)
+
+
+# ノードリンク
+class NodeLink(bpy_struct):
+    def __init__(self, arg_from_socket:NodeSocket, arg_to_socket:NodeSocket):
+        self.from_socket = arg_from_socket
+        self.to_socket = arg_to_socket
+        self.from_node = arg_from_socket.node
+        self.to_node = arg_to_socket.node
+        self.is_valid = True
+        self.is_muted = False
+
+
+# ノードの入力端子と出力端子の一覧
+class NodeInputs(bpy_prop_collection):
+    pass
+
+class NodeOutputs(bpy_prop_collection):
+    pass
+
+
+# ノードの基底クラス
+class Node(bpy_struct):
+    bl_idname = "Node"
+    # (ソケットクラス, 名前, 識別子, デフォルト値) のリスト
+    _input_template = ()
+    _output_template = ()
+
+    def __init__(self, arg_tree, arg_name:str):
+        self.id_data = arg_tree
+        self.name = arg_name
+        self.label = ""
+        self.mute = False
+        self.inputs = NodeInputs()
+        self.outputs = NodeOutputs()
+        for socket_cls, socket_name, socket_identifier, socket_default in self._input_template:
+            self.inputs.append(_new_socket(socket_cls, self, socket_name, socket_identifier, False, socket_default))
+        for socket_cls, socket_name, socket_identifier, socket_default in self._output_template:
+            self.outputs.append(_new_socket(socket_cls, self, socket_name, socket_identifier, True, socket_default))
+
+    @property
+    def type(self) -> str:
+        return self.bl_idname
+
+    @property
+    def bl_rna(self):
+        return _NodeRNA(self)
+
+# ソケットを生成する
+def _new_socket(arg_cls, arg_node, arg_name, arg_identifier, arg_is_output, arg_default):
+    if arg_default == None:
+        return arg_cls(arg_node, arg_name, arg_identifier, arg_is_output)
+    return arg_cls(arg_node, arg_name, arg_identifier, arg_is_output, arg_default)
+
+# ノードのRNA情報(プロパティ一覧)の代替
+class _NodeRNA:
+    def __init__(self, arg_node):
+        self.properties = [_PropertyRNA(name, prop_type)
+            for name, prop_type in _node_base_properties + arg_node._rna_properties]
+
+class _PropertyRNA:
+    def __init__(self, arg_identifier, arg_type="ENUM"):
+        self.identifier = arg_identifier
+        self.type = arg_type
+
+# 全ノードに共通する RNA プロパティ(名前, 型)
+_node_base_properties = (
+    ("rna_type", "POINTER"), ("type", "ENUM"), ("location", "FLOAT"), ("width", "FLOAT"),
+    ("name", "STRING"), ("label", "STRING"), ("inputs", "COLLECTION"), ("outputs", "COLLECTION"),
+    ("parent", "POINTER"), ("select", "BOOLEAN"), ("hide", "BOOLEAN"), ("mute", "BOOLEAN"),
+    ("bl_idname", "STRING"),
+)
+
+# ノード毎の RNA プロパティ(名前, 型)
+Node._rna_properties = ()
+
+class ShaderNode(Node):
+    bl_idname = "ShaderNode"
+
+# プリンシプルBSDFノード(Blender 2.83 の入力端子構成)
+class ShaderNodeBsdfPrincipled(ShaderNode):
+    bl_idname = "ShaderNodeBsdfPrincipled"
+    _input_template = (
+        (NodeSocketColor, "Base Color", "Base Color", (0.8, 0.8, 0.8, 1.0)),
+        (NodeSocketFloatFactor, "Subsurface", "Subsurface", 0.0),
+        (NodeSocketVector, "Subsurface Radius", "Subsurface Radius", (1.0, 0.2, 0.1)),
+        (NodeSocketColor, "Subsurface Color", "Subsurface Color", (0.8, 0.8, 0.8, 1.0)),
+        (NodeSocketFloatFactor, "Metallic", "Metallic", 0.0),
+        (NodeSocketFloatFactor, "Specular", "Specular", 0.5),
+        (NodeSocketFloatFactor, "Specular Tint", "Specular Tint", 0.0),
+        (NodeSocketFloatFactor, "Roughness", "Roughness", 0.5),
+        (NodeSocketFloatFactor, "Anisotropic", "Anisotropic", 0.0),
+        (NodeSocketFloatFactor, "Anisotropic Rotation", "Anisotropic Rotation", 0.0),
+        (NodeSocketFloatFactor, "Sheen", "Sheen", 0.0),
+        (NodeSocketFloatFactor, "Sheen Tint", "Sheen Tint", 0.5),
+        (NodeSocketFloatFactor, "Clearcoat", "Clearcoat", 0.0),
+        (NodeSocketFloatFactor, "Clearcoat Roughness", "Clearcoat Roughness", 0.03),
+        (NodeSocketFloat, "IOR", "IOR", 1.45),
+        (NodeSocketFloatFactor, "Transmission", "Transmission", 0.0),
+        (NodeSocketFloatFactor, "Transmission Roughness", "Transmission Roughness", 0.0),
+        (NodeSocketColor, "Emission", "Emission", (0.0, 0.0, 0.0, 1.0)),
+        (NodeSocketFloatFactor, "Alpha", "Alpha", 1.0),
+        (NodeSocketVector, "Normal", "Normal", (0.0, 0.0, 0.0)),
+        (NodeSocketVector, "Clearcoat Normal", "Clearcoat Normal", (0.0, 0.0, 0.0)),
+        (NodeSocketVector, "Tangent", "Tangent", (0.0, 0.0, 0.0)),
+    )
+    _output_template = (
+        (NodeSocketShader, "BSDF", "BSDF", None),
+    )
+    _rna_properties = (("distribution", "ENUM"), ("subsurface_method", "ENUM"))
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.distribution = "GGX"
+        self.subsurface_method = "BURLEY"
+
+# 放射ノード
+class ShaderNodeEmission(ShaderNode):
+    bl_idname = "ShaderNodeEmission"
+    _input_template = (
+        (NodeSocketColor, "Color", "Color", (1.0, 1.0, 1.0, 1.0)),
+        (NodeSocketFloat, "Strength", "Strength", 1.0),
+    )
+    _output_template = (
+        (NodeSocketShader, "Emission", "Emission", None),
+    )
+
+# ディフューズBSDFノード
+class ShaderNodeBsdfDiffuse(ShaderNode):
+    bl_idname = "ShaderNodeBsdfDiffuse"
+    _input_template = (
+        (NodeSocketColor, "Color", "Color", (0.8, 0.8, 0.8, 1.0)),
+        (NodeSocketFloatFactor, "Roughness", "Roughness", 0.0),
+        (NodeSocketVector, "Normal", "Normal", (0.0, 0.0, 0.0)),
+    )
+    _output_template = (
+        (NodeSocketShader, "BSDF", "BSDF", None),
+    )
+
+# シェーダーミックスノード
+class ShaderNodeMixShader(ShaderNode):
+    bl_idname = "ShaderNodeMixShader"
+    _input_template = (
+        (NodeSocketFloatFactor, "Fac", "Fac", 0.5),
+        (NodeSocketShader, "Shader", "Shader", None),
+        (NodeSocketShader, "Shader", "Shader_001", None),
+    )
+    _output_template = (
+        (NodeSocketShader, "Shader", "Shader", None),
+    )
+
+# 画像テクスチャノード
+class ShaderNodeTexImage(ShaderNode):
+    bl_idname = "ShaderNodeTexImage"
+    _input_template = (
+        (NodeSocketVector, "Vector", "Vector", (0.0, 0.0, 0.0)),
+    )
+    _output_template = (
+        (NodeSocketColor, "Color", "Color", (0.0, 0.0, 0.0, 1.0)),
+        (NodeSocketFloat, "Alpha", "Alpha", 0.0),
+    )
+    _rna_properties = (("image", "POINTER"), ("interpolation", "ENUM"), ("projection", "ENUM"), ("extension", "ENUM"))
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.image = None
+        self.interpolation = "Linear"
+        self.projection = "FLAT"
+        self.extension = "REPEAT"
+
+# ノーマルマップノード
+class ShaderNodeNormalMap(ShaderNode):
+    bl_idname = "ShaderNodeNormalMap"
+    _input_template = (
+        (NodeSocketFloat, "Strength", "Strength", 1.0),
+        (NodeSocketColor, "Color", "Color", (0.5, 0.5, 1.0, 1.0)),
+    )
+    _output_template = (
+        (NodeSocketVector, "Normal", "Normal", (0.0, 0.0, 0.0)),
+    )
+    _rna_properties = (("space", "ENUM"), ("uv_map", "STRING"))
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.space = "TANGENT"
+        self.uv_map = ""
+
+# グループノード
+class ShaderNodeGroup(ShaderNode):
+    bl_idname = "ShaderNodeGroup"
+    _input_template = (
+        (NodeSocketColor, "Color", "Color", (0.0, 0.0, 0.0, 1.0)),
+    )
+    _output_template = (
+        (NodeSocketColor, "Color", "Color", (0.0, 0.0, 0.0, 1.0)),
+    )
+    _rna_properties = (("node_tree", "POINTER"),)
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.node_tree = None
+
+# グループ入力ノード(グループノードと同じ Color 端子を持つ)
+class NodeGroupInput(Node):
+    bl_idname = "NodeGroupInput"
+    _output_template = (
+        (NodeSocketColor, "Color", "Color", (0.0, 0.0, 0.0, 1.0)),
+    )
+
+# グループ出力ノード
+class NodeGroupOutput(Node):
+    bl_idname = "NodeGroupOutput"
+    _input_template = (
+        (NodeSocketColor, "Color", "Color", (0.0, 0.0, 0.0, 1.0)),
+    )
+    _rna_properties = (("is_active_output", "BOOLEAN"),)
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.is_active_output = True
+
+# マテリアル出力ノード
+class ShaderNodeOutputMaterial(ShaderNode):
+    bl_idname = "ShaderNodeOutputMaterial"
+    _input_template = (
+        (NodeSocketShader, "Surface", "Surface", None),
+        (NodeSocketShader, "Volume", "Volume", None),
+        (NodeSocketVector, "Displacement", "Displacement", (0.0, 0.0, 0.0)),
+    )
+    _rna_properties = (("is_active_output", "BOOLEAN"), ("target", "ENUM"))
+
+    def __init__(self, arg_tree, arg_name):
+        super().__init__(arg_tree, arg_name)
+        self.is_active_output = True
+        self.target = "ALL"
+
+# ノードクラスの対応表
+_node_classes = {
+    node_cls.bl_idname: node_cls for node_cls in (
+        ShaderNodeBsdfPrincipled, ShaderNodeEmission, ShaderNodeBsdfDiffuse,
+        ShaderNodeMixShader, ShaderNodeTexImage, ShaderNodeNormalMap,
+        ShaderNodeGroup, ShaderNodeOutputMaterial, NodeGroupInput, NodeGroupOutput,
+    )
+}
+
+# Blender と同じノードの既定の名前
+_node_default_names = {
+    "ShaderNodeBsdfPrincipled": "Principled BSDF",
+    "ShaderNodeEmission": "Emission",
+    "ShaderNodeBsdfDiffuse": "Diffuse BSDF",
+    "ShaderNodeMixShader": "Mix Shader",
+    "ShaderNodeTexImage": "Image Texture",
+    "ShaderNodeNormalMap": "Normal Map",
+    "ShaderNodeGroup": "Group",
+    "ShaderNodeOutputMaterial": "Material Output",
+    "NodeGroupInput": "Group Input",
+    "NodeGroupOutput": "Group Output",
+}
+
+# ノードの一覧
+class Nodes(bpy_prop_collection):
+    def __init__(self, arg_tree):
+        super().__init__()
+        self._tree = arg_tree
+
+    # ノードを追加する
+    def new(self, type:str):
+        # 存在しないノードタイプは Blender と同様に RuntimeError とする
+        if type not in _node_classes:
+            raise RuntimeError("Node type %s undefined" % type)
+        node_cls = _node_classes[type]
+        base_name = _node_default_names[node_cls.bl_idname]
+        node_name = base_name
+        num = 0
+        existing_names = set(self.keys())
+        while node_name in existing_names:
+            num += 1
+            node_name = "%s.%03d" % (base_name, num)
+        new_node = node_cls(self._tree, node_name)
+        self.append(new_node)
+        return new_node
+
+    # ノードを削除する
+    def remove(self, arg_node):
+        for link in [link for link in self._tree.links if link.from_node is arg_node or link.to_node is arg_node]:
+            self._tree.links.remove(link)
+        list.remove(self, arg_node)
+
+# リンクの一覧
+class NodeLinks(bpy_prop_collection):
+    # リンクを追加する
+    def new(self, arg_from_socket:NodeSocket, arg_to_socket:NodeSocket):
+        # 入力端子は1本のリンクのみ接続できる
+        for link in [link for link in self if link.to_socket is arg_to_socket]:
+            self.remove(link)
+        new_link = NodeLink(arg_from_socket, arg_to_socket)
+        arg_from_socket._link_count += 1
+        arg_to_socket._link_count += 1
+        self.append(new_link)
+        return new_link
+
+    # リンクを削除する
+    def remove(self, arg_link:NodeLink):
+        arg_link.from_socket._link_count -= 1
+        arg_link.to_socket._link_count -= 1
+        list.remove(self, arg_link)
+
+# ノードツリー
+class NodeTree(ID):
+    bl_idname = "NodeTree"
+
+    def __init__(self, arg_name:str):
+        super().__init__(arg_name)
+        self.id_data = self
+        self.nodes = Nodes(self)
+        self.links = NodeLinks()
+
+class ShaderNodeTree(NodeTree):
+    bl_idname = "ShaderNodeTree"
+
+
+# マテリアル
+class Material(ID):
+    def __init__(self, arg_name:str):
+        super().__init__(arg_name)
+        self.node_tree = None
+        self._use_nodes = False
+        self.diffuse_color = bpy_prop_array((0.8, 0.8, 0.8, 1.0))
+
+    # ノードの使用フラグ
+    @property
+    def use_nodes(self) -> bool:
+        return self._use_nodes
+
+    # ノードの有効化時に既定のノードツリー(プリンシプルBSDF + 出力)を作成する
+    @use_nodes.setter
+    def use_nodes(self, arg_value:bool):
+        self._use_nodes = bool(arg_value)
+        if self._use_nodes and self.node_tree == None:
+            self.node_tree = ShaderNodeTree("Shader Nodetree")
+            bsdf_node = self.node_tree.nodes.new("ShaderNodeBsdfPrincipled")
+            output_node = self.node_tree.nodes.new("ShaderNodeOutputMaterial")
+            self.node_tree.links.new(bsdf_node.outputs[0], output_node.inputs[0])
+
+
+# ライブラリ
+class Library(ID):
+    def __init__(self, arg_name:str, arg_filepath:str=""):
+        super().__init__(arg_name)
+        self.filepath = arg_filepath
+
+
+# 画像
+class Image(ID):
+    def __init__(self, arg_name:str, arg_width:int=0, arg_height:int=0):
+        super().__init__(arg_name)
+        self.filepath = ""
+        self.filepath_raw = ""
+        self.source = "GENERATED"
+        self.packed_file = None
+        self.size = bpy_prop_array((arg_width, arg_height))
+        self.channels = 4
+        self.is_float = False
+        self.has_data = True
+        self.alpha_mode = "STRAIGHT"
+        self.colorspace_settings = _ColorspaceSettings()
+        self.pixels = bpy_prop_array([0.0] * (arg_width * arg_height * 4))
+
+# 画像の色空間の設定
+class _ColorspaceSettings(bpy_struct):
+    def __init__(self):
+        self.name = "sRGB"
+
+# パックされたファイル
+class PackedFile(bpy_struct):
+    def __init__(self, arg_data:bytes):
+        self.data = arg_data
+        self.size = len(arg_data)
+
+
+# メッシュの頂点
+class MeshVertex(bpy_struct):
+    def __init__(self, arg_co):
+        self.co = tuple(float(value) for value in arg_co)
+
+# メッシュのループ
+class MeshLoop(bpy_struct):
+    def __init__(self, arg_vertex_index:int):
+        self.vertex_index = int(arg_vertex_index)
+
+# メッシュのポリゴン
+class MeshPolygon(bpy_struct):
+    def __init__(self, arg_loop_start:int=0, arg_loop_total:int=0, arg_material_index:int=0):
+        self.loop_start = int(arg_loop_start)
+        self.loop_total = int(arg_loop_total)
+        self.material_index = int(arg_material_index)
+        self.use_smooth = False
+
+# メッシュの要素の一覧(add で既定値の要素を追加する)
+class _MeshElements(bpy_prop_collection):
+    def __init__(self, arg_item_factory, arg_items=()):
+        super().__init__(arg_items)
+        self._item_factory = arg_item_factory
+
+    def add(self, count:int):
+        self.extend(self._item_factory() for _ in range(count))
+
+# UV マップのループ毎の座標
+class MeshUVLoop(bpy_struct):
+    def __init__(self):
+        self.uv = (0.0, 0.0)
+
+# UV マップ
+class MeshUVLoopLayer(bpy_struct):
+    def __init__(self, arg_name:str, arg_loop_count:int):
+        self.name = arg_name
+        self.data = bpy_prop_collection(MeshUVLoop() for _ in range(arg_loop_count))
+
+# UV マップの一覧
+class UVLoopLayers(bpy_prop_collection):
+    def __init__(self, arg_mesh):
+        super().__init__()
+        self._mesh = arg_mesh
+
+    def new(self, name:str="UVMap", do_init:bool=True):
+        uv_layer = MeshUVLoopLayer(name, len(self._mesh.loops))
+        self.append(uv_layer)
+        return uv_layer
+
+# メッシュのマテリアル一覧
+class IDMaterials(bpy_prop_collection):
+    def __init__(self):
+        super().__init__()
+        # 全削除の回数(オブジェクト側のスロットの状態を Blender と同様に初期化するため)
+        self._clear_count = 0
+
+    # マテリアルを追加する
+    def append(self, arg_material):
+        list.append(self, arg_material)
+
+    # マテリアルを取り出す
+    def pop(self, index:int=-1):
+        return list.pop(self, index)
+
+    # マテリアルを全て削除する
+    def clear(self):
+        list.clear(self)
+        self._clear_count += 1
+
+# メッシュ
+class Mesh(ID):
+    def __init__(self, arg_name:str):
+        super().__init__(arg_name)
+        self.materials = IDMaterials()
+        self.vertices = _MeshElements(lambda: MeshVertex((0.0, 0.0, 0.0)))
+        self.loops = _MeshElements(lambda: MeshLoop(0))
+        self.polygons = _MeshElements(MeshPolygon)
+        self.uv_layers = UVLoopLayers(self)
+
+    # 頂点、辺、面のリストからメッシュを構築する
+    def from_pydata(self, arg_vertices, arg_edges, arg_faces):
+        self.vertices = _MeshElements(lambda: MeshVertex((0.0, 0.0, 0.0)), (MeshVertex(co) for co in arg_vertices))
+        self.loops = _MeshElements(lambda: MeshLoop(0))
+        self.polygons = _MeshElements(MeshPolygon)
+        for face in arg_faces:
+            loop_start = len(self.loops)
+            for vertex_index in face:
+                self.loops.append(MeshLoop(vertex_index))
+            self.polygons.append(MeshPolygon(loop_start, len(face)))
+
+    # メッシュを更新する
+    def update(self, calc_edges:bool=False):
+        return
+
+    # メッシュを検証する
+    def validate(self, verbose:bool=False) -> bool:
+        return False
+
+
+# マテリアルスロット
+# (リンク先とオブジェクト側のマテリアルはオブジェクトに保持する)
+class MaterialSlot(bpy_struct):
+    def __init__(self, arg_object, arg_index:int):
+        self._object = arg_object
+        self._index = arg_index
+
+    # スロットのリンク先('DATA' または 'OBJECT')
+    @property
+    def link(self) -> str:
+        return self._object._get_slot_states()[self._index][0]
+
+    @link.setter
+    def link(self, arg_link:str):
+        self._object._get_slot_states()[self._index][0] = arg_link
+
+    # スロットのマテリアル(リンク先のマテリアルを参照する)
+    @property
+    def material(self):
+        slot_state = self._object._get_slot_states()[self._index]
+        if slot_state[0] == "OBJECT":
+            return slot_state[1]
+        return self._object.data.materials[self._index]
+
+    @material.setter
+    def material(self, arg_material):
+        slot_state = self._object._get_slot_states()[self._index]
+        if slot_state[0] == "OBJECT":
+            slot_state[1] = arg_material
+        else:
+            self._object.data.materials[self._index] = arg_material
+
+    @property
+    def name(self) -> str:
+        return self.material.name if self.material != None else ""
+
+# オブジェクトのマテリアルスロットの一覧
+# (参照毎に全スロットを作成しないよう、添字で参照された要素のみ作成する)
+class ObjectMaterialSlots(bpy_prop_collection):
+    def __init__(self, arg_object):
+        super().__init__()
+        self._object = arg_object
+
+    def __len__(self) -> int:
+        return len(self._object.data.materials)
+
+    def __getitem__(self, arg_key):
+        if isinstance(arg_key, str):
+            return bpy_prop_collection.__getitem__(self, arg_key)
+        if isinstance(arg_key, slice):
+            return [MaterialSlot(self._object, num) for num in range(len(self))[arg_key]]
+        if arg_key < 0:
+            arg_key += len(self)
+        if arg_key < 0 or arg_key >= len(self):
+            raise IndexError(arg_key)
+        return MaterialSlot(self._object, arg_key)
+
+    def __iter__(self):
+        return (MaterialSlot(self._object, num) for num in range(len(self)))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+# 4x4 行列(mathutils.Matrix の代替)
+class Matrix(list):
+    @staticmethod
+    def Identity(arg_size:int):
+        return Matrix([[1.0 if row == column else 0.0 for column in range(arg_size)] for row in range(arg_size)])
+
+    def copy(self):
+        return Matrix([list(row) for row in self])
+
+# オブジェクト
+class Object(ID):
+    def __init__(self, arg_name:str, arg_data=None):
+        super().__init__(arg_name)
+        self.data = arg_data
+        self.type = "MESH" if isinstance(arg_data, Mesh) else "EMPTY"
+        self.mode = "OBJECT"
+        self.active_material_index = 0
+        self.matrix_world = Matrix.Identity(4)
+        self._select = False
+        self.users_collection = []
+        # スロット毎の [リンク先, オブジェクト側のマテリアル] と、同期したメッシュの全削除の回数
+        self._slot_states = []
+        self._slot_clear_count = 0
+
+    # スロット毎の状態をメッシュのスロット数に合わせて取得する
+    # (Blender と同様にメッシュのマテリアルを全削除した場合はオブジェクト側の状態も初期化する)
+    def _get_slot_states(self) -> list:
+        mesh_materials = self.data.materials
+        if self._slot_clear_count != mesh_materials._clear_count:
+            self._slot_states = []
+            self._slot_clear_count = mesh_materials._clear_count
+        del self._slot_states[len(mesh_materials):]
+        while len(self._slot_states) < len(mesh_materials):
+            self._slot_states.append(["DATA", None])
+        return self._slot_states
+
+    # マテリアルスロットの一覧
+    @property
+    def material_slots(self) -> bpy_prop_collection:
+        if self.type != "MESH":
+            return bpy_prop_collection()
+        return ObjectMaterialSlots(self)
+
+    # アクティブなマテリアル
+    @property
+    def active_material(self):
+        if len(self.data.materials) == 0:
+            return None
+        return self.material_slots[self.active_material_index].material
+
+    def select_get(self) -> bool:
+        return self._select
+
+    def select_set(self, arg_state:bool):
+        self._select = bool(arg_state)
+
+
+# コレクションのオブジェクトの一覧
+class CollectionObjects(bpy_prop_collection):
+    # オブジェクトをリンクする
+    def link(self, arg_object):
+        if arg_object not in self:
+            self.append(arg_object)
+
+    # オブジェクトのリンクを解除する
+    def unlink(self, arg_object):
+        self.remove(arg_object)
+
+# コレクション
+class Collection(ID):
+    def __init__(self, arg_name:str):
+        super().__init__(arg_name)
+        self.objects = CollectionObjects()
+        self.children = CollectionObjects()
+
+    # 子コレクションを含む全オブジェクト
+    @property
+    def all_objects(self) -> bpy_prop_collection:
+        result = bpy_prop_collection(self.objects)
+        for child in self.children:
+            for child_object in child.all_objects:
+                if child_object not in result:
+                    result.append(child_object)
+        return result
+
+# シーン
+class Scene(ID):
+    def __init__(self, arg_name:str):
+        super().__init__(arg_name)
+        self.collection = Collection("Scene Collection")
+
+    # シーン内の全オブジェクト
+    @property
+    def objects(self) -> bpy_prop_collection:
+        return self.collection.all_objects
+
+
+# アドオンの登録クラス
+class Operator(bpy_struct):
+    def report(self, arg_type, arg_message):
+        self._reports = getattr(self, "_reports", [])
+        self._reports.append((set(arg_type), arg_message))
+
+class Panel(bpy_struct):
+    pass
+
+class PropertyGroup(bpy_struct):
+    pass
+
+class UIList(bpy_struct):
+    pass
+
+class AddonPreferences(bpy_struct):
+    pass
+
+# 依存グラフ
+class Depsgraph(bpy_struct):
+    def __init__(self, arg_updates=()):
+        self.updates = list(arg_updates)
+
+class DepsgraphUpdate(bpy_struct):
+    def __init__(self, arg_id, arg_is_updated_shading:bool=True):
+        self.id = arg_id
+        self.is_updated_shading = arg_is_updated_shading
+        self.is_updated_geometry = False
+        self.is_updated_transform = False
@@ -0,0 +1,10 @@
+# ベンチマーク用の bpy.utils 代替モジュール
+
+# 登録済みクラスの一覧
+registered_classes = []
+
+def register_class(arg_cls):
+    registered_classes.append(arg_cls)
+
+def unregister_class(arg_cls):
+    registered_classes.remove(arg_cls)
@@ -0,0 +1,154 @@
+# ベンチマーク用の合成シーンを作成する
+# 代替の bpy モジュール(benchmark/fake_bpy)または Blender の bpy のどちらでも実行できる
+
+# 各種ライブラリインポート
+import random
+import bpy
+
+# 合成マテリアルの名前の接頭辞
+def_generate_material_prefix = "BenchMat"
+
+# リンクを貼る入力端子の候補
+# (リンクされた入力端子を持つマテリアルはマージ対象外となる)
+def_generate_linked_inputs = ["Base Color", "Roughness", "Normal"]
+
+# 指定した条件のマテリアルを持つメッシュオブジェクトを作成する
+def generate_material_scene(arg_material_count:int, arg_duplicate_count:int, arg_linked_count:int=0,
+  arg_polygons_per_slot:int=1, arg_seed:int=0, arg_object_name:str="BenchObject",
+  arg_object_link_count:int=0) -> bpy.types.Object:
+    """指定した条件のマテリアルを持つメッシュオブジェクトを作成する
+    マテリアル毎に1つのスロットを作成し、スロットの順序は名前順と無関係に並べる
+
+    Args:
+        arg_material_count (int): マテリアル数(スロット数)
+        arg_duplicate_count (int): 他のマテリアルと入力端子の値が完全に一致するマテリアルの数
+        arg_linked_count (int, optional): 入力端子にリンクを貼るマテリアルの数
+        arg_polygons_per_slot (int, optional): スロット毎のポリゴン数
+        arg_seed (int, optional): 乱数のシード値
+        arg_object_name (str, optional): 作成するオブジェクト名
+        arg_object_link_count (int, optional): マテリアルをオブジェクトにリンクするスロットの数
+            (メッシュ側のマテリアルは空とする)
+
+    Returns:
+        bpy.types.Object: 作成したメッシュオブジェクト
+    """
+
+    # 乱数を初期化する
+    random_generator = random.Random(arg_seed)
+
+    # 重複元となる固有のマテリアル数を求める
+    unique_count = max(1, arg_material_count - arg_duplicate_count)
+
+    # 固有のマテリアル毎の入力端子の値を作成する
+    unique_values = [create_random_values(arg_random=random_generator) for _ in range(unique_count)]
+
+    # スロット毎に使用する値の番号を決める(先頭は固有の値を1つずつ、残りは重複)
+    value_indices = list(range(unique_count))
+    value_indices += [random_generator.randrange(unique_count) for _ in range(arg_material_count - unique_count)]
+    random_generator.shuffle(value_indices)
+
+    # リンクを貼るマテリアルを決める
+    linked_slots = set(random_generator.sample(range(arg_material_count), min(arg_linked_count, arg_material_count)))
+
+    # 名前順とスロット順が一致しないようにマテリアル名の番号を並べ替える
+    name_numbers = list(range(arg_material_count))
+    random_generator.shuffle(name_numbers)
+
+    # マテリアルを作成する
+    slot_materials = []
+    for slot_num, value_num in enumerate(value_indices):
+        target_mat = bpy.data.materials.new("%s.%05d" % (def_generate_material_prefix, name_numbers[slot_num]))
+        set_material_values(arg_material=target_mat, arg_values=unique_values[value_num])
+
+        # 指定数のマテリアルの入力端子にリンクを貼る
+        if slot_num in linked_slots:
+            link_material_input(arg_material=target_mat,
+                arg_inputname=random_generator.choice(def_generate_linked_inputs))
+
+        slot_materials.append(target_mat)
+
+    # スロット毎のポリゴンを持つメッシュを作成する
+    polygon_count = arg_material_count * arg_polygons_per_slot
+    target_mesh = bpy.data.meshes.new(arg_object_name)
+    target_mesh.from_pydata([(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)], [], [(0, 1, 2)] * polygon_count)
+
+    # スロットにマテリアルを設定する
+    for slot_mat in slot_materials:
+        target_mesh.materials.append(slot_mat)
+
+    # ポリゴンのマテリアル番号をスロット順に割り当てる
+    target_mesh.polygons.foreach_set("material_index",
+        [polygon_num % max(1, arg_material_count) for polygon_num in range(polygon_count)])
+
+    # オブジェクトを作成してシーンに追加する
+    target_object = bpy.data.objects.new(arg_object_name, target_mesh)
+    bpy.context.scene.collection.objects.link(target_object)
+
+    # 指定数のスロットのマテリアルをオブジェクトにリンクする
+    # (他の条件と同じシード値で同じシーンとなるよう、乱数は最後に使用する)
+    for slot_num in sorted(random_generator.sample(range(arg_material_count),
+      min(arg_object_link_count, arg_material_count))):
+        target_mesh.materials[slot_num] = None
+        target_object.material_slots[slot_num].link = 'OBJECT'
+        target_object.material_slots[slot_num].material = slot_materials[slot_num]
+
+    return target_object
+
+# 入力端子の値をランダムに作成する
+def create_random_values(arg_random:random.Random) -> dict:
+    """入力端子の値をランダムに作成する
+
+    Args:
+        arg_random (random.Random): 乱数
+
+    Returns:
+        dict: 入力端子名をキーとした値
+    """
+
+    return {
+        "Base Color": (arg_random.random(), arg_random.random(), arg_random.random(), 1.0),
+        "Metallic": arg_random.choice([0.0, 1.0]),
+        "Roughness": round(arg_random.random(), 3),
+        "Specular": round(arg_random.random(), 3),
+    }
+
+# マテリアルのプリンシプルBSDFに入力端子の値を設定する
+def set_material_values(arg_material:bpy.types.Material, arg_values:dict):
+    """マテリアルのプリンシプルBSDFに入力端子の値を設定する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_values (dict): 入力端子名をキーとした値
+    """
+
+    # ノードを有効化して既定のプリンシプルBSDFを作成する
+    arg_material.use_nodes = True
+    bsdf_node = arg_material.node_tree.nodes["Principled BSDF"]
+
+    # 入力端子の値を設定する
+    for input_name, input_value in arg_values.items():
+        bsdf_node.inputs[input_name].default_value = input_value
+
+    return
+
+# マテリアルのプリンシプルBSDFの入力端子にノードを接続する
+def link_material_input(arg_material:bpy.types.Material, arg_inputname:str):
+    """マテリアルのプリンシプルBSDFの入力端子にノードを接続する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_inputname (str): 入力端子名
+    """
+
+    # ノードツリーを取得する
+    mat_node_tree = arg_material.node_tree
+    bsdf_node = mat_node_tree.nodes["Principled BSDF"]
+
+    # 入力端子の種類に応じてノードを接続する
+    if arg_inputname == "Normal":
+        source_node = mat_node_tree.nodes.new("ShaderNodeNormalMap")
+    else:
+        source_node = mat_node_tree.nodes.new("ShaderNodeTexImage")
+    mat_node_tree.links.new(source_node.outputs[0], bsdf_node.inputs[arg_inputname])
+
+    return
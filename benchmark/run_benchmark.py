@@ -0,0 +1,487 @@
+# マテリアルマージの各処理の実行時間とメモリ使用量、呼び出し回数を計測する
+# Blender をインストールしていない環境で、代替の bpy モジュール(benchmark/fake_bpy)を使用して実行する
+#
+# 使用例:
+#   python benchmark/run_benchmark.py
+#   python benchmark/run_benchmark.py --slots 100 1000 10000 --duplicate-ratio 0.5 --linked-ratio 0.1 --json result.json
+#   python benchmark/run_benchmark.py --slots 1000 --object-link-ratio 0.2
+#
+# 以下の3つの処理の流れを計測する
+#   operators : check_surface_bsdf -> material_merge_object -> sort_materialslot_name -> delate_materialslot_duplicate
+#   bulk      : check_surface_bsdf -> create_merge_plan -> apply_merge_plan
+#   merge     : execute_bsdf_material_merge(マージオペレーターの実行処理全体)
+#   modal     : begin_modal_merge -> step_modal_merge(完了まで繰り返す) -> end_modal_merge(分割実行オペレーターの処理全体)
+# operators はスロット数の2乗以上で時間が増えるため、--max-operator-slots を超える規模では計測しない
+# merge と modal はオペレーターの呼び出しがないこと(取り消し履歴がマージオペレーターの1回のみとなること)も確認する
+# 計測の前に、シグネチャのキーとハッシュが get_canonical_materials の判定と一致することを確認する
+# modal はタイマーの待ち時間を含めず、分割による処理速度の低下のみを計測する
+# メモリ使用量は tracemalloc で計測した段階毎の Python のメモリ確保の最大値とする
+# (代替の bpy モジュールのデータも Python のオブジェクトのため、Blender 内部のメモリ量や取り消し履歴のメモリ量は含まない)
+
+# 各種ライブラリインポート
+import argparse
+import collections
+import gc
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# ベンチマークのディレクトリ
+def_benchmark_dirpath = os.path.dirname(os.path.abspath(__file__))
+
+# 代替の bpy モジュールを優先して読み込む
+sys.path.insert(0, os.path.join(def_benchmark_dirpath, "fake_bpy"))
+import bpy
+
+# 合成シーンの作成処理を読み込む
+sys.path.insert(0, def_benchmark_dirpath)
+import generate_material_scene
+
+# アドオンを読み込む際のモジュール名
+def_benchmark_addon_module_name = "holomon_bsdf_material_merge_benchmark"
+
+# コマンドライン引数を解析する
+def parse_arguments(arg_argv:list) -> argparse.Namespace:
+    """コマンドライン引数を解析する
+
+    Args:
+        arg_argv (list): コマンドライン引数
+
+    Returns:
+        argparse.Namespace: 解析結果
+    """
+
+    # 引数を定義する
+    parser = argparse.ArgumentParser(prog="run_benchmark.py",
+        description="Measure wall time, peak memory and call counts of each material merge stage.")
+    parser.add_argument("--slots", type=int, nargs="+", default=[100, 1000, 10000],
+        help="material slot counts to measure (default: 100 1000 10000)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.5,
+        help="ratio of materials that exactly duplicate another material (default: 0.5)")
+    parser.add_argument("--linked-ratio", type=float, default=0.1,
+        help="ratio of materials with a linked Principled BSDF input (default: 0.1)")
+    parser.add_argument("--object-link-ratio", type=float, default=0.0,
+        help="ratio of slots whose material is linked to the object instead of the mesh (default: 0.0)")
+    parser.add_argument("--polygons-per-slot", type=int, default=1,
+        help="number of polygons assigned to each slot (default: 1)")
+    parser.add_argument("--max-operator-slots", type=int, default=1000,
+        help="largest slot count measured with the operator based pipeline (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0,
+        help="random seed of the generated scenes")
+    parser.add_argument("--no-call-counts", action="store_true",
+        help="skip the profiling pass that counts addon function calls")
+    parser.add_argument("--no-memory", action="store_true",
+        help="skip the tracemalloc pass that measures peak memory of each stage")
+    parser.add_argument("--json", default=None,
+        help="path of the JSON result file")
+
+    return parser.parse_args(arg_argv[1:])
+
+# アドオンのパッケージを読み込む
+def load_addon_module():
+    """アドオンのパッケージを読み込む
+    ベンチマークの親ディレクトリをパッケージとして読み込む
+
+    Returns:
+        module: アドオンのパッケージ
+    """
+
+    # 読み込み済みの場合はそのまま返す
+    if def_benchmark_addon_module_name in sys.modules:
+        return sys.modules[def_benchmark_addon_module_name]
+
+    # パッケージのディレクトリを取得する
+    addon_dirpath = os.path.dirname(def_benchmark_dirpath)
+
+    # パッケージとして読み込む
+    addon_spec = importlib.util.spec_from_file_location(def_benchmark_addon_module_name,
+        os.path.join(addon_dirpath, "__init__.py"), submodule_search_locations=[addon_dirpath])
+    addon_module = importlib.util.module_from_spec(addon_spec)
+    sys.modules[def_benchmark_addon_module_name] = addon_module
+    addon_spec.loader.exec_module(addon_module)
+
+    return addon_module
+
+# 処理の流れ毎の段階を取得する
+def get_pipeline_stages(arg_addon, arg_pipeline:str) -> list:
+    """処理の流れ毎の段階を取得する
+
+    Args:
+        arg_addon (module): アドオンのパッケージ
+        arg_pipeline (str): 処理の流れ('operators', 'bulk', 'merge', 'modal')
+
+    Returns:
+        list: (段階名, 対象オブジェクトと状態の辞書を受け取る関数) の組のリスト
+    """
+
+    # 分割実行オペレーターの処理全体を1つの段階とする
+    modal_material_merge = arg_addon.UI_operations.modal_material_merge
+    def stage_modal_merge(arg_object, arg_state):
+        modal_material_merge.begin_modal_merge(arg_target_objects=[arg_object])
+        while modal_material_merge.step_modal_merge() == False:
+            pass
+        arg_state["modal_result"] = modal_material_merge.end_modal_merge()
+
+    if arg_pipeline == 'modal':
+        return [
+            ("step_modal_merge", stage_modal_merge),
+        ]
+
+    # マージオペレーターの実行処理全体を1つの段階とする
+    if arg_pipeline == 'merge':
+        return [
+            ("execute_bsdf_material_merge", lambda arg_object, arg_state:
+                arg_addon.UI_operations.execute_bsdf_material_merge(arg_target_objects=[arg_object])),
+        ]
+
+    # 各モジュールを取得する
+    check_surface_bsdf = arg_addon.UI_operations.check_surface_bsdf
+    comp_material_bsdf = arg_addon.UI_operations.comp_material_bsdf
+    control_materialslot_utilities = arg_addon.UI_operations.control_materialslot_utilities
+    plan_material_merge = arg_addon.UI_operations.plan_material_merge
+
+    # 全スロットのマテリアルがプリンシプルBSDFを使用したノードかチェックする
+    def stage_check_surface(arg_object, arg_state):
+        for check_material_slot in arg_object.material_slots:
+            check_surface_bsdf.check_surface_bsdf(arg_material=check_material_slot.material)
+
+    if arg_pipeline == 'operators':
+        return [
+            ("check_surface_bsdf", stage_check_surface),
+            ("material_merge_object", lambda arg_object, arg_state:
+                comp_material_bsdf.material_merge_object(arg_object=arg_object)),
+            ("sort_materialslot_name", lambda arg_object, arg_state:
+                control_materialslot_utilities.sort_materialslot_name(arg_object=arg_object)),
+            ("delate_materialslot_duplicate", lambda arg_object, arg_state:
+                control_materialslot_utilities.delate_materialslot_duplicate(arg_object=arg_object)),
+        ]
+
+    # 計画を作成して状態に保持する
+    def stage_create_plan(arg_object, arg_state):
+        arg_state["plan"] = plan_material_merge.create_merge_plan(arg_objects=[arg_object])
+
+    return [
+        ("check_surface_bsdf", stage_check_surface),
+        ("create_merge_plan", stage_create_plan),
+        ("apply_merge_plan", lambda arg_object, arg_state:
+            plan_material_merge.apply_merge_plan(arg_plan=arg_state["plan"])),
+    ]
+
+# 関数の呼び出し回数を数えるプロファイラを作成する
+def create_call_counter(arg_addon_dirpath:str) -> tuple:
+    """関数の呼び出し回数を数えるプロファイラを作成する
+
+    Args:
+        arg_addon_dirpath (str): アドオンのディレクトリ
+
+    Returns:
+        tuple: (sys.setprofile に渡す関数, "ファイル名:関数名" をキーとした呼び出し回数) の組
+    """
+
+    # 呼び出し回数
+    call_counts = collections.Counter()
+
+    # 対象とするファイルの接頭辞(ベンチマーク自体は対象外)
+    addon_prefix = arg_addon_dirpath + os.sep
+
+    def profile_function(frame, event, arg):
+        if event != "call":
+            return
+        code_filepath = frame.f_code.co_filename
+        if code_filepath.startswith(addon_prefix) and not code_filepath.startswith(def_benchmark_dirpath):
+            call_counts[os.path.basename(code_filepath) + ":" + frame.f_code.co_name] += 1
+
+    return (profile_function, call_counts)
+
+# 合成シーンで処理の流れを1回実行する
+def run_pipeline(arg_addon, arg_pipeline:str, arg_slot_count:int, arg_arguments:argparse.Namespace,
+  arg_count_calls:bool, arg_trace_memory:bool=False) -> dict:
+    """合成シーンで処理の流れを1回実行する
+
+    Args:
+        arg_addon (module): アドオンのパッケージ
+        arg_pipeline (str): 処理の流れ('operators', 'bulk', 'merge', 'modal')
+        arg_slot_count (int): スロット数
+        arg_arguments (argparse.Namespace): コマンドライン引数
+        arg_count_calls (bool): 関数の呼び出し回数を数えるか(実行時間は参考値となる)
+        arg_trace_memory (bool, optional): 段階毎のメモリ確保の最大値を計測するか(実行時間は参考値となる)
+
+    Returns:
+        dict: 段階名をキーとした計測結果と最終的なスロット構成
+    """
+
+    # データを初期化して合成シーンを作成する
+    bpy.data.reset()
+    target_object = generate_material_scene.generate_material_scene(
+        arg_material_count=arg_slot_count,
+        arg_duplicate_count=int(arg_slot_count * arg_arguments.duplicate_ratio),
+        arg_linked_count=int(arg_slot_count * arg_arguments.linked_ratio),
+        arg_polygons_per_slot=arg_arguments.polygons_per_slot,
+        arg_seed=arg_arguments.seed,
+        arg_object_link_count=int(arg_slot_count * arg_arguments.object_link_ratio))
+    bpy.context.object = target_object
+
+    # 前回の実行で作成したデータを解放する
+    # (循環参照の回収が計測中に発生すると、処理の流れの順序で時間が変わるため)
+    gc.collect()
+
+    # 各段階の計測結果
+    stage_results = collections.OrderedDict()
+    stage_state = {}
+
+    # 操作中のノード解決キャッシュとアドオンの計測を開始する
+    check_surface_bsdf = arg_addon.UI_operations.check_surface_bsdf
+    profile_material_merge = arg_addon.UI_operations.profile_material_merge
+    check_surface_bsdf.begin_resolve_cache()
+    profile_material_merge.begin_merge_profile()
+
+    try:
+        for stage_name, stage_function in get_pipeline_stages(arg_addon=arg_addon, arg_pipeline=arg_pipeline):
+            # オペレーターの呼び出し回数を初期化する
+            bpy.ops.reset_call_counts()
+
+            # 必要に応じて関数の呼び出し回数を数える
+            call_counts = None
+            if arg_count_calls == True:
+                profile_function, call_counts = create_call_counter(
+                    arg_addon_dirpath=os.path.dirname(def_benchmark_dirpath))
+                sys.setprofile(profile_function)
+
+            # 必要に応じてメモリ確保の最大値を計測する
+            # (段階の開始時点の確保量を差し引き、段階中に増えた量とする)
+            if arg_trace_memory == True:
+                tracemalloc.start()
+                start_memory = tracemalloc.get_traced_memory()[0]
+
+            # 段階を実行して時間を計測する
+            start_time = time.perf_counter()
+            try:
+                stage_function(target_object, stage_state)
+            finally:
+                elapsed_time = time.perf_counter() - start_time
+                sys.setprofile(None)
+                if arg_trace_memory == True:
+                    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+                    tracemalloc.stop()
+
+            stage_results[stage_name] = {
+                "seconds": elapsed_time,
+                "peak_bytes": peak_memory if arg_trace_memory == True else None,
+                "operator_calls": dict(bpy.ops.call_counts),
+                "function_calls": sum(call_counts.values()) if call_counts != None else None,
+                "top_functions": call_counts.most_common(5) if call_counts != None else None,
+            }
+    finally:
+        check_surface_bsdf.end_resolve_cache()
+        addon_profile = profile_material_merge.end_merge_profile()
+
+    return {
+        "stages": stage_results,
+        "counters": addon_profile["counters"],
+        "final_slots": [check_material_slot.material.name for check_material_slot in target_object.material_slots],
+        "polygon_materials": [target_object.material_slots[polygon.material_index].material.name
+            for polygon in target_object.data.polygons],
+    }
+
+# 指定したスロット数で各処理の流れを計測する
+def measure_slot_count(arg_addon, arg_slot_count:int, arg_arguments:argparse.Namespace) -> dict:
+    """指定したスロット数で各処理の流れを計測する
+
+    Args:
+        arg_addon (module): アドオンのパッケージ
+        arg_slot_count (int): スロット数
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        dict: 処理の流れ毎の計測結果
+    """
+
+    # 計測結果
+    pipeline_results = collections.OrderedDict()
+
+    for pipeline_name in ("operators", "bulk", "merge", "modal"):
+        # オペレーターを使用する処理は規模の上限を確認する
+        if pipeline_name == "operators" and arg_slot_count > arg_arguments.max_operator_slots:
+            pipeline_results[pipeline_name] = None
+            continue
+
+        # 実行時間を計測する
+        timed_result = run_pipeline(arg_addon=arg_addon, arg_pipeline=pipeline_name,
+            arg_slot_count=arg_slot_count, arg_arguments=arg_arguments, arg_count_calls=False)
+
+        # 同じシーンで関数の呼び出し回数を数える
+        if arg_arguments.no_call_counts == False:
+            counted_result = run_pipeline(arg_addon=arg_addon, arg_pipeline=pipeline_name,
+                arg_slot_count=arg_slot_count, arg_arguments=arg_arguments, arg_count_calls=True)
+            for stage_name, stage_result in timed_result["stages"].items():
+                stage_result["function_calls"] = counted_result["stages"][stage_name]["function_calls"]
+                stage_result["top_functions"] = counted_result["stages"][stage_name]["top_functions"]
+
+        # 同じシーンでメモリ確保の最大値を計測する
+        if arg_arguments.no_memory == False:
+            traced_result = run_pipeline(arg_addon=arg_addon, arg_pipeline=pipeline_name,
+                arg_slot_count=arg_slot_count, arg_arguments=arg_arguments, arg_count_calls=False,
+                arg_trace_memory=True)
+            for stage_name, stage_result in timed_result["stages"].items():
+                stage_result["peak_bytes"] = traced_result["stages"][stage_name]["peak_bytes"]
+
+        pipeline_results[pipeline_name] = timed_result
+
+    # 各処理の結果が bulk の結果と一致するか確認する
+    # (operators を計測しない規模では merge のみを比較する)
+    bulk_result = pipeline_results["bulk"]
+    match_result = all(pipeline_result["final_slots"] == bulk_result["final_slots"]
+        and pipeline_result["polygon_materials"] == bulk_result["polygon_materials"]
+        for pipeline_result in pipeline_results.values() if pipeline_result != None)
+
+    # merge と modal でオペレーターを呼び出していないか確認する
+    # (オブジェクトモードへの移行は合成シーンでは不要なため、呼び出しがあれば一括処理に残ったオペレーターとなる)
+    operator_free = all(sum(stage_result["operator_calls"].values()) == 0
+        for pipeline_name in ("merge", "modal") for stage_result in pipeline_results[pipeline_name]["stages"].values())
+
+    return {
+        "slots": arg_slot_count,
+        "pipelines": {pipeline_name: (pipeline_result["stages"] if pipeline_result != None else None)
+            for pipeline_name, pipeline_result in pipeline_results.items()},
+        "counters": {pipeline_name: (pipeline_result["counters"] if pipeline_result != None else None)
+            for pipeline_name, pipeline_result in pipeline_results.items()},
+        "final_slot_count": len(pipeline_results["bulk"]["final_slots"]),
+        "results_match": match_result,
+        "operator_free": operator_free,
+    }
+
+# シグネチャのキーとハッシュが代表マテリアルの判定と一致するか確認する
+def check_signature_keys(arg_addon) -> bool:
+    """シグネチャのキーとハッシュが代表マテリアルの判定と一致するか確認する
+    同じ構造のノードを異なる入力端子に接続したマテリアルと、同じ入力端子に接続したマテリアルを作成し、
+    get_material_signature_key と索引のハッシュが get_canonical_materials と同じ組み合わせのみを一致とするか確認する
+
+    Args:
+        arg_addon (module): アドオンのパッケージ
+
+    Returns:
+        bool: 一致するか否か
+    """
+
+    # 同じ値を持ち、ノーマルマップを接続する入力端子のみが異なるマテリアルを作成する
+    bpy.data.reset()
+    check_materials = []
+    for input_name in ("Normal", "Clearcoat Normal", "Normal"):
+        check_mat = bpy.data.materials.new("KeyCheck")
+        generate_material_scene.set_material_values(arg_material=check_mat,
+            arg_values={"Base Color": (0.5, 0.5, 0.5, 1.0), "Roughness": 0.5})
+        normal_node = check_mat.node_tree.nodes.new("ShaderNodeNormalMap")
+        check_mat.node_tree.links.new(normal_node.outputs[0],
+            check_mat.node_tree.nodes["Principled BSDF"].inputs[input_name])
+        check_materials.append(check_mat)
+
+    # 代表マテリアル、シグネチャのキー、索引のハッシュで一致するマテリアルを求める
+    comp_material_bsdf = arg_addon.UI_operations.comp_material_bsdf
+    library_material_index = arg_addon.UI_operations.library_material_index
+    canonical_materials = comp_material_bsdf.get_canonical_materials(arg_materials=check_materials)
+    signature_keys = [comp_material_bsdf.get_material_signature_key(arg_material=check_mat)
+        for check_mat in check_materials]
+    signature_digests = library_material_index.get_material_signature_digests(arg_materials=check_materials)
+
+    # 同じ入力端子に接続したマテリアルのみが一致するか確認する
+    canonical_groups = [check_materials.index(canonical_mat) for canonical_mat in canonical_materials]
+    return canonical_groups == [0, 1, 0] \
+        and [signature_keys.index(signature_key) for signature_key in signature_keys] == canonical_groups \
+        and [signature_digests.index(signature_digest) for signature_digest in signature_digests] == canonical_groups
+
+# 計測結果を表示する
+def print_results(arg_results:list):
+    """計測結果を表示する
+
+    Args:
+        arg_results (list): スロット数毎の計測結果
+    """
+
+    for slot_result in arg_results:
+        print("== %d slots -> %d slots (results match: %s, merge/modal without operators: %s)" % (
+            slot_result["slots"], slot_result["final_slot_count"], slot_result["results_match"],
+            slot_result["operator_free"]))
+        for pipeline_name, stage_results in slot_result["pipelines"].items():
+            if stage_results == None:
+                print("  %-10s skipped (--max-operator-slots)" % pipeline_name)
+                continue
+            total_seconds = sum(stage_result["seconds"] for stage_result in stage_results.values())
+            print("  %-10s total %10.4f s  peak %s  %s" % (pipeline_name, total_seconds,
+                format_peak_memory(arg_stage_results=stage_results.values()),
+                ", ".join("%s %d" % counter_item for counter_item in slot_result["counters"][pipeline_name].items())))
+            for stage_name, stage_result in stage_results.items():
+                function_calls = stage_result["function_calls"]
+                print("    %-30s %10.4f s  peak %s  ops %8d  calls %s" % (stage_name, stage_result["seconds"],
+                    format_peak_memory(arg_stage_results=[stage_result]),
+                    sum(stage_result["operator_calls"].values()),
+                    "%10d" % function_calls if function_calls != None else "         -"))
+
+    return
+
+# 段階毎の計測結果からメモリ確保の最大値を表示用の文字列に変換する
+def format_peak_memory(arg_stage_results:list) -> str:
+    """段階毎の計測結果からメモリ確保の最大値を表示用の文字列に変換する
+
+    Args:
+        arg_stage_results (list): 段階毎の計測結果
+
+    Returns:
+        str: 最大値(KiB)の文字列(計測していない場合は "-")
+    """
+
+    peak_values = [stage_result["peak_bytes"] for stage_result in arg_stage_results
+        if stage_result["peak_bytes"] != None]
+    if len(peak_values) == 0:
+        return "%10s" % "-"
+    return "%8.1f KiB" % (max(peak_values) / 1024)
+
+# コマンドラインの処理を実行する
+def main(arg_argv:list) -> int:
+    """コマンドラインの処理を実行する
+
+    Args:
+        arg_argv (list): コマンドライン引数
+
+    Returns:
+        int: 終了コード(各処理の結果が一致しない場合、merge または modal でオペレーターを呼び出した場合、
+             シグネチャのキーが代表マテリアルの判定と一致しない場合 1)
+    """
+
+    # コマンドライン引数を解析する
+    parse_result = parse_arguments(arg_argv=arg_argv)
+
+    # アドオンを読み込む
+    addon_module = load_addon_module()
+
+    # 登録後のタイマーと同様に、雛形のノードからシグネチャのレイアウトを検出する
+    addon_module.UI_operations.comp_material_bsdf.discover_surface_shader_layouts()
+
+    # シグネチャのキーとハッシュが代表マテリアルの判定と一致するか確認する
+    keys_match = check_signature_keys(arg_addon=addon_module)
+    print("== signature keys match canonical materials: %s" % keys_match)
+
+    # スロット数毎に計測する
+    slot_results = [measure_slot_count(arg_addon=addon_module, arg_slot_count=slot_count, arg_arguments=parse_result)
+        for slot_count in parse_result.slots]
+
+    # 計測結果を表示する
+    print_results(arg_results=slot_results)
+
+    # 指定に従って結果を書き出す
+    if parse_result.json != None:
+        with open(parse_result.json, "w", encoding="utf-8") as result_file:
+            json.dump({"arguments": vars(parse_result), "results": slot_results}, result_file, indent=1)
+
+    # 結果の不一致とオペレーターの呼び出しを終了コードとして返す
+    if keys_match == False:
+        return 1
+    return 1 if any(slot_result["results_match"] == False or slot_result["operator_free"] == False
+        for slot_result in slot_results) else 0
+
+
+# 実行時の処理
+if __name__ == "__main__":
+    sys.exit(main(arg_argv=sys.argv))
@@ -0,0 +1,373 @@
+# 各種ライブラリインポート
+import bpy
+import json
+import os
+
+# 永続キャッシュを保存するマテリアルのカスタムプロパティ名
+def_cache_property_name = "holomon_bsdf_merge_cache"
+
+# 永続キャッシュの形式のバージョン
+# (形式を変更した場合は値を更新し、古いキャッシュを無効にする)
+def_cache_version = 3
+
+# サイドカーファイルの拡張子
+def_cache_sidecar_extension = ".bsdfmerge.json"
+
+# 永続キャッシュの設定
+# 実行範囲外では None として永続キャッシュを使用しない
+# 有効時は {"sidecar_filepath": サイドカーファイルのパス(カスタムプロパティに保存する場合 None),
+#          "sidecar_entries": サイドカーファイルのライブラリ名を含むマテリアル名をキーとしたエントリ,
+#          "hit_count": キャッシュを利用した回数, "miss_count": ノードを走査した回数}
+persistent_cache_state = None
+
+# 永続キャッシュを開始する
+def begin_persistent_cache(arg_use_sidecar:bool=False):
+    """永続キャッシュを開始する
+    既定ではマテリアルのカスタムプロパティにキャッシュを保存し、.blend ファイルと共に保存する
+    サイドカーファイルを指定した場合は .blend ファイルと同じ場所の JSON ファイルに保存する
+
+    Args:
+        arg_use_sidecar (bool, optional): サイドカーファイルに保存するか
+    """
+
+    # グローバル変数の設定を参照する
+    global persistent_cache_state
+
+    # サイドカーファイルのパスを取得する
+    sidecar_filepath = None
+    if arg_use_sidecar == True:
+        sidecar_filepath = get_sidecar_filepath()
+
+    # 永続キャッシュの設定を作成する
+    persistent_cache_state = {
+        "sidecar_filepath": sidecar_filepath,
+        "sidecar_entries": load_sidecar_entries(arg_filepath=sidecar_filepath),
+        "hit_count": 0,
+        "miss_count": 0,
+    }
+
+    return
+
+# 永続キャッシュを終了する
+def end_persistent_cache() -> dict:
+    """永続キャッシュを終了する
+    サイドカーファイルを使用している場合はエントリをファイルに書き出す
+
+    Returns:
+        dict: キャッシュの利用回数({"hit_count": int, "miss_count": int}、未開始の場合 None)
+    """
+
+    # グローバル変数の設定を参照する
+    global persistent_cache_state
+
+    # 永続キャッシュが開始されているか確認する
+    if persistent_cache_state == None:
+        return None
+
+    # サイドカーファイルを使用している場合はエントリを書き出す
+    if persistent_cache_state["sidecar_filepath"] != None:
+        save_sidecar_entries(arg_filepath=persistent_cache_state["sidecar_filepath"],
+            arg_entries=persistent_cache_state["sidecar_entries"])
+
+    # キャッシュの利用回数を取得する
+    cache_counts = {
+        "hit_count": persistent_cache_state["hit_count"],
+        "miss_count": persistent_cache_state["miss_count"],
+    }
+
+    # 永続キャッシュを無効にする
+    persistent_cache_state = None
+
+    return cache_counts
+
+# 開いている .blend ファイルのサイドカーファイルのパスを取得する
+def get_sidecar_filepath() -> str:
+    """開いている .blend ファイルのサイドカーファイルのパスを取得する
+
+    Returns:
+        str: サイドカーファイルのパス(未保存のファイルの場合 None)
+    """
+
+    # 開いている .blend ファイルのパスを取得する
+    blend_filepath = bpy.data.filepath
+
+    # 未保存のファイルか確認する
+    if blend_filepath == "":
+        # 保存先が決まらないためサイドカーファイルは使用しない
+        return None
+
+    return blend_filepath + def_cache_sidecar_extension
+
+# サイドカーファイルからエントリを読み込む
+def load_sidecar_entries(arg_filepath:str) -> dict:
+    """サイドカーファイルからエントリを読み込む
+
+    Args:
+        arg_filepath (str): サイドカーファイルのパス
+
+    Returns:
+        dict: マテリアル名をキーとしたエントリ(読み込めない場合は空の辞書)
+    """
+
+    # ファイルが存在するか確認する
+    if arg_filepath == None or os.path.isfile(arg_filepath) == False:
+        return {}
+
+    # JSON ファイルを読み込む
+    try:
+        with open(arg_filepath, "r", encoding="utf-8") as sidecar_file:
+            sidecar_data = json.load(sidecar_file)
+    except (OSError, ValueError):
+        # 読み込めない場合はキャッシュなしとして扱う
+        return {}
+
+    # 形式のバージョンが一致するか確認する
+    if sidecar_data.get("version") != def_cache_version:
+        return {}
+
+    return sidecar_data.get("materials", {})
+
+# サイドカーファイルにエントリを書き出す
+def save_sidecar_entries(arg_filepath:str, arg_entries:dict) -> bool:
+    """サイドカーファイルにエントリを書き出す
+
+    Args:
+        arg_filepath (str): サイドカーファイルのパス
+        arg_entries (dict): マテリアル名をキーとしたエントリ
+
+    Returns:
+        bool: 実行正否
+    """
+
+    # JSON ファイルに書き出す
+    try:
+        with open(arg_filepath, "w", encoding="utf-8") as sidecar_file:
+            json.dump({"version": def_cache_version, "materials": arg_entries}, sidecar_file, indent=1, sort_keys=True)
+    except OSError:
+        return False
+
+    return True
+
+# 指定マテリアルのキャッシュのエントリを取得する
+def get_cache_entry(arg_material:bpy.types.Material) -> dict:
+    """指定マテリアルのキャッシュのエントリを取得する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        dict: エントリ(存在しない場合 None)
+    """
+
+    # サイドカーファイルを使用しているか確認する
+    if persistent_cache_state["sidecar_filepath"] != None:
+        return persistent_cache_state["sidecar_entries"].get(get_sidecar_entry_key(arg_material=arg_material))
+
+    # カスタムプロパティからエントリを取得する
+    return arg_material.get(def_cache_property_name)
+
+# 指定マテリアルのキャッシュのエントリを設定する
+def set_cache_entry(arg_material:bpy.types.Material, arg_entry:dict):
+    """指定マテリアルのキャッシュのエントリを設定する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_entry (dict): エントリ
+    """
+
+    # サイドカーファイルを使用しているか確認する
+    if persistent_cache_state["sidecar_filepath"] != None:
+        persistent_cache_state["sidecar_entries"][get_sidecar_entry_key(arg_material=arg_material)] = arg_entry
+        return
+
+    # カスタムプロパティにエントリを保存する
+    arg_material[def_cache_property_name] = arg_entry
+
+    return
+
+# 指定マテリアルのサイドカーファイルのエントリのキーを取得する
+def get_sidecar_entry_key(arg_material:bpy.types.Material) -> str:
+    """指定マテリアルのサイドカーファイルのエントリのキーを取得する
+    リンクしたライブラリのマテリアルと同名のローカルのマテリアルでエントリを共有しないよう、ライブラリ名を含む名前とする
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        str: ライブラリ名を含むマテリアル名
+    """
+
+    return arg_material.name_full
+
+# 永続キャッシュから出力ノードに接続されたノードを取得する
+def load_cached_node_linkoutput(arg_material:bpy.types.Material) -> tuple:
+    """永続キャッシュから出力ノードに接続されたノードを取得する
+    ノード数、リンク数、出力ノードのサーフェス入力の接続元で保存時から変更がないことを確認し、ノードとリンクの走査を省く
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        tuple: (キャッシュを利用できたか, 出力ノードに接続されたノード) の組
+    """
+
+    # 永続キャッシュが開始されているか確認する
+    if persistent_cache_state == None:
+        return (False, None)
+
+    # エントリを取得する
+    cache_entry = get_cache_entry(arg_material=arg_material)
+
+    # エントリが有効か確認する
+    if check_cache_entry(arg_material=arg_material, arg_entry=cache_entry) == False:
+        # 有効でない場合はノードの走査が必要
+        persistent_cache_state["miss_count"] += 1
+        return (False, None)
+
+    # キャッシュを利用する
+    persistent_cache_state["hit_count"] += 1
+
+    # 接続されたノード名を取得する
+    surface_name = cache_entry.get("surface", "")
+
+    # 接続されたノードが存在しない結果か確認する
+    if surface_name == "":
+        return (True, None)
+
+    return (True, arg_material.node_tree.nodes.get(surface_name))
+
+# 永続キャッシュのエントリが有効か確認する
+def check_cache_entry(arg_material:bpy.types.Material, arg_entry) -> bool:
+    """永続キャッシュのエントリが有効か確認する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_entry (dict): エントリ
+
+    Returns:
+        bool: 有効か否か
+    """
+
+    # エントリが存在し、形式のバージョンが一致するか確認する
+    if arg_entry == None or arg_entry.get("version") != def_cache_version:
+        return False
+
+    # ノードツリーを取得する
+    mat_node_tree = arg_material.node_tree
+
+    # ノード数とリンク数が一致するか確認する
+    if list(arg_entry.get("token", ())) != [len(mat_node_tree.nodes), len(mat_node_tree.links)]:
+        return False
+
+    # 出力ノード名を取得する
+    output_name = arg_entry.get("output", "")
+
+    # 出力ノードが存在しない結果の場合はノード数とリンク数の一致のみで判断する
+    if output_name == "":
+        return True
+
+    # 出力ノードがアクティブなままか確認する
+    output_node = mat_node_tree.nodes.get(output_name)
+    if output_node == None or output_node.bl_idname != 'ShaderNodeOutputMaterial' or output_node.is_active_output == False:
+        return False
+
+    # 接続されたノード名を取得する
+    surface_name = arg_entry.get("surface", "")
+
+    # 出力ノードのサーフェス入力の接続状態が保存時と一致するか確認する
+    surface_input = output_node.inputs[0]
+    if surface_input.is_linked != (surface_name != ""):
+        return False
+
+    # 接続されたノードが存在しない結果の場合は有効とする
+    if surface_name == "":
+        return True
+
+    # サーフェス入力のリンクの接続元のノードと出力端子が保存時と一致するか確認する
+    # (同じノードから複数の出力ノードに接続されている場合もあるため、ノードの出力の接続状態では判断しない)
+    surface_link = get_surface_input_link(arg_surface_input=surface_input)
+    if surface_link == None:
+        return False
+    if [surface_link.from_node.name, surface_link.from_socket.identifier] \
+      != [surface_name, arg_entry.get("surface_socket", "")]:
+        return False
+
+    # 接続されたノードの種類が一致するか確認する
+    if surface_link.from_node.bl_idname != arg_entry.get("surface_type", ""):
+        return False
+
+    return True
+
+# 出力ノードのサーフェス入力に接続されたリンクを取得する
+def get_surface_input_link(arg_surface_input:bpy.types.NodeSocket) -> bpy.types.NodeLink:
+    """出力ノードのサーフェス入力に接続されたリンクを取得する
+
+    Args:
+        arg_surface_input (bpy.types.NodeSocket): 出力ノードのサーフェス入力
+
+    Returns:
+        bpy.types.NodeLink: 接続されたリンク(存在しない場合 None)
+    """
+
+    # 入力端子に接続できるリンクは1本のみ
+    input_links = arg_surface_input.links
+    if len(input_links) == 0:
+        return None
+
+    return input_links[0]
+
+# 出力ノードに接続されたノードを永続キャッシュに保存する
+def store_cached_node_linkoutput(arg_material:bpy.types.Material, arg_node:bpy.types.Node):
+    """出力ノードに接続されたノードを永続キャッシュに保存する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_node (bpy.types.Node): 出力ノードに接続されたノード(存在しない場合 None)
+    """
+
+    # 永続キャッシュが開始されているか確認する
+    if persistent_cache_state == None:
+        return
+
+    # ノードツリーを取得する
+    mat_node_tree = arg_material.node_tree
+
+    # アクティブな出力ノードを取得する
+    output_node = None
+    for check_node in mat_node_tree.nodes:
+        if check_node.bl_idname == 'ShaderNodeOutputMaterial' and check_node.is_active_output == True:
+            output_node = check_node
+
+    # サーフェス入力のリンクの接続元の出力端子を取得する
+    surface_socket = ""
+    if output_node != None and arg_node != None:
+        surface_link = get_surface_input_link(arg_surface_input=output_node.inputs[0])
+        if surface_link != None and surface_link.from_node == arg_node:
+            surface_socket = surface_link.from_socket.identifier
+
+    # エントリを作成して保存する
+    set_cache_entry(arg_material=arg_material, arg_entry={
+        "version": def_cache_version,
+        "token": [len(mat_node_tree.nodes), len(mat_node_tree.links)],
+        "output": output_node.name if output_node != None else "",
+        "surface": arg_node.name if arg_node != None else "",
+        "surface_socket": surface_socket,
+        "surface_type": arg_node.bl_idname if arg_node != None else "",
+    })
+
+    return
+
+# 指定マテリアルの永続キャッシュを削除する
+def clear_cached_entries(arg_materials:list):
+    """指定マテリアルの永続キャッシュを削除する
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+    """
+
+    # マテリアルのカスタムプロパティを削除する
+    for target_mat in arg_materials:
+        if def_cache_property_name in target_mat:
+            del target_mat[def_cache_property_name]
+
+    return
@@ -1,22 +1,111 @@
-# bpyインポート
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "cache_material_signature" in locals():
+        importlib.reload(cache_material_signature)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+    if "registry_surface_shader" in locals():
+        importlib.reload(registry_surface_shader)
 import bpy
+from . import cache_material_signature
+from . import profile_material_merge
+from . import registry_surface_shader
+
+# 実行中に解決したノードのキャッシュ
+# キーはマテリアルのポインタ値、値は(ノードツリーの変更検知用トークン, 接続されたノード)
+# 実行範囲外では None としてキャッシュを使用しない
+resolve_node_cache = None
+
+# ノード解決キャッシュを開始する
+def begin_resolve_cache():
+    """ノード解決キャッシュを開始する
+    開始から終了までの間、各マテリアルのノード走査は1回のみ実行される
+    キャッシュは1回の実行の範囲でのみ有効とする
+    (変更検知用トークンはノード数とリンク数が変わらないリンクの付け替えを検知しないため、
+     実行中にノードツリーを変更する段階は invalidate_resolve_cache を呼び出す)
+    """
+
+    # グローバル変数のキャッシュを参照する
+    global resolve_node_cache
+
+    # 空のキャッシュを作成する
+    resolve_node_cache = {}
+
+    return
+
+# ノード解決キャッシュを終了する
+def end_resolve_cache():
+    """ノード解決キャッシュを終了する
+    保持しているノードの参照は実行後に無効となる可能性があるため破棄する
+    """
+
+    # グローバル変数のキャッシュを参照する
+    global resolve_node_cache
+
+    # キャッシュを破棄する
+    resolve_node_cache = None
+
+    return
+
+# 指定マテリアルのノード解決キャッシュを無効化する
+def invalidate_resolve_cache(arg_material:bpy.types.Material):
+    """指定マテリアルのノード解決キャッシュを無効化する
+    実行中にノードツリーを編集した場合に呼び出す
+    (ノードの有効化、画像の参照の差し替えで呼び出される)
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+    """
+
+    # キャッシュが開始されているか確認する
+    if resolve_node_cache == None:
+        # キャッシュが無効な場合は処理しない
+        return
+
+    # 指定マテリアルのキャッシュを削除する
+    resolve_node_cache.pop(arg_material.as_pointer(), None)
+
+    return
+
+# ノードツリーの変更検知用トークンを取得する
+def get_node_tree_token(arg_material:bpy.types.Material) -> tuple:
+    """ノードツリーの変更検知用トークンを取得する
+    ノードツリーの差し替え、ノードやリンクの追加と削除を検知する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        tuple: 変更検知用トークン
+    """
+
+    # マテリアルのノードツリーを取得する
+    mat_node_tree = arg_material.node_tree
+
+    # ノードツリーが存在するか確認する
+    if mat_node_tree == None:
+        # ノードツリーが存在しない場合は空のトークンを返す
+        return (0, 0, 0)
+
+    # ノードツリーのポインタ値、ノード数、リンク数をトークンとする
+    return (mat_node_tree.as_pointer(), len(mat_node_tree.nodes), len(mat_node_tree.links))
 
 # 指定マテリアルのアクティブな出力ノードに接続されたノードがプリンシプルBSDFかチェックする
-def check_surface_bsdf(arg_material:bpy.types.Material) -> bool:
+def check_surface_bsdf(arg_material:bpy.types.Material, arg_use_node:bool=True) -> bool:
     """指定マテリアルのアクティブな出力ノードに接続されたノードがプリンシプルBSDFかチェックする
 
     Args:
         arg_material (bpy.types.Material): 指定マテリアル
+        arg_use_node (bool, optional): ノードが無効な場合に有効化するか
+            (False の場合はマテリアルを変更せず、ノードツリーが存在しなければ False を返す)
 
     Returns:
         bool: プリンシプルBSDFが接続されているか
     """
 
-    # マテリアルのノードを有効化する
-    use_material_node(arg_material=arg_material)
-
     # アクティブな出力ノードに接続されたノードを取得する
-    get_node = get_node_linkoutput(arg_material=arg_material)
+    get_node = get_surface_node(arg_material=arg_material, arg_use_node=arg_use_node)
 
     # ノードが取得できたか確認する
     if get_node == None:
@@ -29,9 +118,118 @@ def check_surface_bsdf(arg_material:bpy.types.Material) -> bool:
     return isBSDF
 
 
+# 指定マテリアルのアクティブな出力ノードに接続された比較可能なシェーダーのノードタイプを取得する
+def check_surface_shader(arg_material:bpy.types.Material, arg_use_node:bool=True) -> str:
+    """指定マテリアルのアクティブな出力ノードに接続された比較可能なシェーダーのノードタイプを取得する
+    比較方法が登録されていないシェーダーのマテリアルはエラーとせず、マージの対象外とする
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_use_node (bool, optional): ノードが無効な場合に有効化するか
+            (False の場合はマテリアルを変更せず、ノードツリーが存在しなければ None を返す)
+
+    Returns:
+        str: シェーダーノードのノードタイプ(比較方法が登録されていない場合 None)
+    """
+
+    # アクティブな出力ノードに接続されたノードを取得する
+    get_node = get_surface_node(arg_material=arg_material, arg_use_node=arg_use_node)
+
+    # ノードが取得できたか確認する
+    if get_node == None:
+        # サーフェスノードが存在しない場合は None を返す
+        return None
+
+    # 比較方法が登録されたシェーダーか確認する
+    if registry_surface_shader.check_isnode_registered(arg_node=get_node) == False:
+        # 未登録のシェーダーの場合は None を返す
+        return None
+
+    return get_node.bl_idname
+
+
+# 指定マテリアルのアクティブな出力ノードに接続されたノードを取得する
+def get_surface_node(arg_material:bpy.types.Material, arg_use_node:bool=True) -> bpy.types.Node:
+    """指定マテリアルのアクティブな出力ノードに接続されたノードを取得する
+    取得時にチェックしたマテリアル数を記録する
+    (同じマテリアルを複数回取得しても、計測中に1回のみ数える)
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_use_node (bool, optional): ノードが無効な場合に有効化するか
+            (False の場合はマテリアルを変更せず、ノードツリーが存在しなければ None を返す)
+
+    Returns:
+        bpy.types.Node: アクティブな出力ノードに接続されたノード(存在しない場合 None)
+    """
+
+    # チェックしたマテリアル数を記録する
+    profile_material_merge.add_profile_counter_once("materials_checked", arg_material.as_pointer())
+
+    # ノードの有効化が指定されているか確認する
+    if arg_use_node == True:
+        # マテリアルのノードを有効化する
+        use_material_node(arg_material=arg_material)
+    elif arg_material.node_tree == None:
+        # ノードツリーが存在しない場合はチェックできないため None を返す
+        return None
+
+    # アクティブな出力ノードに接続されたノードを取得する
+    return get_node_linkoutput(arg_material=arg_material)
+
+
 # アクティブな出力ノードに接続されたノードを取得する
 def get_node_linkoutput(arg_material:bpy.types.Material) -> bpy.types.Node:
     """アクティブな出力ノードに接続されたノードを取得する
+    ノード解決キャッシュが開始されている場合、走査結果をマテリアル毎に再利用する
+    永続キャッシュが開始されている場合、過去の実行で保存した走査結果を再利用する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        bpy.types.Node: アクティブな出力ノードに接続されたノード
+    """
+
+    # キャッシュが開始されているか確認する
+    if resolve_node_cache == None:
+        # キャッシュが無効な場合は毎回ノードを走査する
+        return search_node_linkoutput(arg_material=arg_material)
+
+    # キャッシュのキーとしてマテリアルのポインタ値を取得する
+    cache_key = arg_material.as_pointer()
+
+    # ノードツリーの変更検知用トークンを取得する
+    cache_token = get_node_tree_token(arg_material=arg_material)
+
+    # キャッシュ済みの解決結果を取得する
+    cache_value = resolve_node_cache.get(cache_key)
+
+    # キャッシュ済み、かつ、ノードツリーが変更されていないか確認する
+    if cache_value != None and cache_value[0] == cache_token:
+        # キャッシュ済みのノードを返す
+        return cache_value[1]
+
+    # 永続キャッシュから接続されたノードを取得する
+    cache_hit, return_node = cache_material_signature.load_cached_node_linkoutput(arg_material=arg_material)
+
+    # 永続キャッシュを利用できなかった場合
+    if cache_hit == False:
+        # ノードを走査して接続されたノードを取得する
+        return_node = search_node_linkoutput(arg_material=arg_material)
+
+        # 解決結果を永続キャッシュに保存する
+        cache_material_signature.store_cached_node_linkoutput(arg_material=arg_material, arg_node=return_node)
+
+    # 解決結果をキャッシュに保存する
+    resolve_node_cache[cache_key] = (cache_token, return_node)
+
+    return return_node
+
+
+# アクティブな出力ノードに接続されたノードをノードの走査で取得する
+def search_node_linkoutput(arg_material:bpy.types.Material) -> bpy.types.Node:
+    """アクティブな出力ノードに接続されたノードをノードの走査で取得する
 
     Args:
         arg_material (bpy.types.Material): 指定マテリアル
@@ -132,6 +330,9 @@ def use_material_node(arg_material:bpy.types.Material):
     if arg_material.use_nodes == False:
         arg_material.use_nodes = True
 
+        # ノードツリーが変更されたためキャッシュを無効化する
+        invalidate_resolve_cache(arg_material=arg_material)
+
     return
 
 
@@ -0,0 +1,178 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+import bpy
+from . import profile_material_merge
+
+# 削除結果に含める集計項目の名前
+def_cleanup_report_names = [
+    "materials",
+    "node_groups",
+    "images",
+    "nodes",
+    "image_bytes",
+]
+
+# 指定マテリアルのうち利用者がいなくなったマテリアルと、その参照先のデータを一括で削除する
+def cleanup_orphan_materials(arg_materials:list) -> dict:
+    """指定マテリアルのうち利用者がいなくなったマテリアルと、その参照先のデータを一括で削除する
+    マテリアルのノードツリーが参照するノードグループと画像も、利用者がいなくなった場合は削除する
+    (マテリアルの削除で利用者がいなくなるノードグループ、ノードグループの削除で利用者がいなくなる画像の順に削除する)
+    フェイクユーザーが設定されたデータとライブラリのデータは削除しない
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト(マージ前のスロットのマテリアル)
+
+    Returns:
+        dict: 削除結果(def_cleanup_report_names の項目名をキーとした削除数、画像の推定メモリ量(バイト))
+    """
+
+    # 削除結果を初期化する
+    cleanup_report = {report_name: 0 for report_name in def_cleanup_report_names}
+
+    # 利用者がいなくなったマテリアルを重複なく取得する
+    orphan_materials = []
+    found_pointers = set()
+    for check_mat in arg_materials:
+        if check_mat == None or check_mat.as_pointer() in found_pointers:
+            continue
+        found_pointers.add(check_mat.as_pointer())
+        if check_isdata_orphan(arg_id=check_mat) == True:
+            orphan_materials.append(check_mat)
+
+    # 削除するマテリアルがない場合は処理しない
+    if len(orphan_materials) == 0:
+        return cleanup_report
+
+    # マテリアルのノードツリーが参照するノードグループと画像を取得する
+    # (削除後は参照できなくなるため、削除前に取得する)
+    candidate_groups, candidate_images = get_material_tree_datablocks(arg_materials=orphan_materials)
+    cleanup_report["nodes"] += sum(len(orphan_mat.node_tree.nodes)
+        for orphan_mat in orphan_materials if orphan_mat.node_tree != None)
+
+    # マテリアルを一括で削除する
+    cleanup_report["materials"] = len(orphan_materials)
+    bpy.data.batch_remove(ids=orphan_materials)
+
+    # 利用者がいなくなったノードグループを一括で削除する
+    # (入れ子のノードグループは親の削除で利用者がいなくなるため、削除するノードグループがなくなるまで繰り返す)
+    while True:
+        orphan_groups = [candidate_group for candidate_group in candidate_groups
+            if check_isdata_orphan(arg_id=candidate_group) == True]
+        if len(orphan_groups) == 0:
+            break
+        orphan_pointers = {orphan_group.as_pointer() for orphan_group in orphan_groups}
+        candidate_groups = [candidate_group for candidate_group in candidate_groups
+            if candidate_group.as_pointer() not in orphan_pointers]
+        cleanup_report["node_groups"] += len(orphan_groups)
+        cleanup_report["nodes"] += sum(len(orphan_group.nodes) for orphan_group in orphan_groups)
+        bpy.data.batch_remove(ids=orphan_groups)
+
+    # 利用者がいなくなった画像を一括で削除する
+    orphan_images = [candidate_image for candidate_image in candidate_images
+        if check_isdata_orphan(arg_id=candidate_image) == True]
+    if len(orphan_images) > 0:
+        cleanup_report["images"] = len(orphan_images)
+        cleanup_report["image_bytes"] = sum(get_image_memory_size(arg_image=orphan_image)
+            for orphan_image in orphan_images)
+        bpy.data.batch_remove(ids=orphan_images)
+
+    # 削除したデータブロック数を記録する
+    profile_material_merge.add_profile_counter("datablocks_removed",
+        cleanup_report["materials"] + cleanup_report["node_groups"] + cleanup_report["images"])
+
+    return cleanup_report
+
+# 指定データブロックが削除できる未使用のデータかチェックする
+def check_isdata_orphan(arg_id:bpy.types.ID) -> bool:
+    """指定データブロックが削除できる未使用のデータかチェックする
+
+    Args:
+        arg_id (bpy.types.ID): 指定データブロック
+
+    Returns:
+        bool: 未使用のデータか否か(フェイクユーザーが設定されたデータとライブラリのデータは False)
+    """
+
+    return arg_id.users == 0 and arg_id.use_fake_user == False and arg_id.library == None
+
+# 指定マテリアルのノードツリーが参照するノードグループと画像を取得する
+def get_material_tree_datablocks(arg_materials:list) -> tuple:
+    """指定マテリアルのノードツリーが参照するノードグループと画像を取得する
+    ノードグループ内で参照されるノードグループと画像も含める(ノードグループは1回のみ走査する)
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        tuple: (ノードグループのリスト, 画像のリスト)
+    """
+
+    # 参照されているノードグループと画像のリスト
+    node_groups = []
+    images = []
+    found_pointers = set()
+
+    # 走査するノードツリーのリスト
+    search_trees = [check_mat.node_tree for check_mat in arg_materials if check_mat.node_tree != None]
+
+    # ノードツリーを順に走査する
+    while len(search_trees) > 0:
+        search_tree = search_trees.pop()
+        for check_node in search_tree.nodes:
+            # 画像テクスチャノードの画像を追加する
+            if check_node.bl_idname == 'ShaderNodeTexImage' and check_node.image != None:
+                if check_node.image.as_pointer() not in found_pointers:
+                    found_pointers.add(check_node.image.as_pointer())
+                    images.append(check_node.image)
+            # ノードグループを追加し、内部のノードを走査する
+            elif check_node.bl_idname == 'ShaderNodeGroup' and check_node.node_tree != None:
+                if check_node.node_tree.as_pointer() not in found_pointers:
+                    found_pointers.add(check_node.node_tree.as_pointer())
+                    node_groups.append(check_node.node_tree)
+                    search_trees.append(check_node.node_tree)
+
+    return node_groups, images
+
+# 画像が使用しているメモリ量を推定する
+def get_image_memory_size(arg_image:bpy.types.Image) -> int:
+    """画像が使用しているメモリ量を推定する
+    読み込み済みのピクセルとパックされたファイルのサイズを合計する
+
+    Args:
+        arg_image (bpy.types.Image): 指定画像
+
+    Returns:
+        int: 推定メモリ量(バイト)
+    """
+
+    memory_size = 0
+
+    # 読み込み済みのピクセルのサイズを加算する
+    # (has_data は画像を読み込まずに確認できる)
+    if arg_image.has_data == True:
+        memory_size += arg_image.size[0] * arg_image.size[1] * arg_image.channels * \
+            (4 if arg_image.is_float == True else 1)
+
+    # パックされたファイルのサイズを加算する
+    if arg_image.packed_file != None:
+        memory_size += arg_image.packed_file.size
+
+    return memory_size
+
+# 削除結果をレポート用の文字列に変換する
+def format_cleanup_report(arg_cleanup_report:dict) -> str:
+    """削除結果をレポート用の文字列に変換する
+
+    Args:
+        arg_cleanup_report (dict): 削除結果
+
+    Returns:
+        str: レポート用の文字列
+    """
+
+    return "Cleanup : {} materials, {} node groups, {} images ({} nodes, {:.1f} MB) removed.".format(
+        arg_cleanup_report["materials"], arg_cleanup_report["node_groups"], arg_cleanup_report["images"],
+        arg_cleanup_report["nodes"], arg_cleanup_report["image_bytes"] / (1024 * 1024))
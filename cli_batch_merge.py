@@ -0,0 +1,618 @@
+# 複数の .blend ファイルのマテリアルマージをコマンドラインから実行する
+#
+# 使用例(Blender のバックグラウンド実行):
+#   blender --background --python cli_batch_merge.py -- "assets/*.blend" --objects "SM_*" --json result.json --save
+#
+# 使用例(複数のバックグラウンド Blender で並列実行):
+#   blender --background --python cli_batch_merge.py -- "assets/*.blend" --jobs 8 --json result.json --save
+#   python cli_batch_merge.py --blender /path/to/blender "assets/*.blend" --jobs 8 --json result.json --save
+#
+# 使用例(共有のマテリアルライブラリと一致するマテリアルをライブラリのマテリアルに差し替える):
+#   blender --background --python cli_batch_merge.py -- "assets/*.blend" --library lib/materials.blend --save
+#
+# 使用例(ファイルを変更せずに全ファイルで一致するマテリアルの索引を作成する):
+#   python cli_batch_merge.py --blender /path/to/blender "library/**/*.blend" --scan --index equivalence.json --jobs 8
+#   (索引のパスの拡張子が .bsdfidx の場合は numpy.memmap で開く固定長レコードの索引として書き出す)
+#
+# 並列実行時は本スクリプト自身をワーカープロセスとして起動し、結果の JSON を統合する
+# (--files-per-worker でワーカー1つが担当するファイル数を指定し、Blender の起動時間を分散する)
+
+# 各種ライブラリインポート
+import argparse
+import concurrent.futures
+import csv
+import fnmatch
+import glob
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# 統計の CSV に書き出す列名
+# (スロット毎のポリゴン数は ";" 区切りで1列にまとめる)
+def_stats_csv_columns = ["filepath", "name", "polygons", "slots_before", "slots_after",
+    "draw_calls_before", "draw_calls_after", "draw_calls_saved", "slot_polygons"]
+
+# 一致するマテリアルの索引の形式のバージョン
+def_scan_index_version = 2
+
+# 固定長レコードの索引として書き出す索引ファイルの拡張子
+# (packed_material_index.def_packed_index_suffix と同じ値。JSON の索引のみの場合に numpy を読み込まないよう定義する)
+def_packed_index_suffix = ".bsdfidx"
+
+# アドオンを読み込む際のモジュール名
+def_cli_addon_module_name = "holomon_bsdf_material_merge_cli"
+
+# コマンドライン引数を解析する
+def parse_arguments(arg_argv:list) -> argparse.Namespace:
+    """コマンドライン引数を解析する
+    Blender から実行された場合は "--" 以降の引数のみを解析する
+
+    Args:
+        arg_argv (list): コマンドライン引数
+
+    Returns:
+        argparse.Namespace: 解析結果
+    """
+
+    # Blender に渡された引数とスクリプトの引数を分離する
+    script_argv = arg_argv[1:]
+    if "--" in arg_argv:
+        script_argv = arg_argv[arg_argv.index("--")+1:]
+
+    # 引数を定義する
+    parser = argparse.ArgumentParser(prog="cli_batch_merge.py",
+        description="Merge similar Principled BSDF materials across .blend files.")
+    parser.add_argument("files", nargs="+",
+        help=".blend file paths or glob patterns")
+    parser.add_argument("--objects", default="*",
+        help="fnmatch pattern of mesh object names to process (default: all meshes)")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+        help="maximum difference of each socket value to merge (default: exact match)")
+    parser.add_argument("--cache", choices=["NONE", "PROPERTY", "SIDECAR"], default="NONE",
+        help="persistent signature cache location")
+    parser.add_argument("--dedup-images", action="store_true",
+        help="remap image textures with identical content to one image before merging")
+    parser.add_argument("--cleanup-orphans", action="store_true",
+        help="remove the materials, node groups and images left without users by the merge")
+    parser.add_argument("--batch", choices=["NONE", "OBJECT", "MATERIAL"], default="NONE",
+        help="create meshes split by merged material, per object or joined across objects")
+    parser.add_argument("--library", default=None,
+        help="material library .blend file; matching materials are replaced with the library materials")
+    parser.add_argument("--library-append", action="store_true",
+        help="append the matching library materials instead of linking them")
+    parser.add_argument("--json", default=None,
+        help="path of the JSON result file")
+    parser.add_argument("--stats", default=None,
+        help="path of the per-object slot and draw call statistics (.csv or .json)")
+    parser.add_argument("--save", action="store_true",
+        help="save each file in place after a successful merge")
+    parser.add_argument("--scan", action="store_true",
+        help="record the signature of every local material without merging or saving")
+    parser.add_argument("--index", default=None,
+        help="path of the cross-file equivalence index of the scanned signatures (implies --scan); "
+            "a .bsdfidx path writes the fixed-width binary record index")
+    parser.add_argument("--jobs", type=int, default=1,
+        help="number of background Blender worker processes")
+    parser.add_argument("--files-per-worker", type=int, default=1,
+        help="number of files opened by each worker process")
+    parser.add_argument("--blender", default=None,
+        help="Blender executable for worker processes (default: the running Blender)")
+
+    parse_result = parser.parse_args(script_argv)
+
+    # 索引の作成はシグネチャの記録のみを行う
+    if parse_result.index != None:
+        parse_result.scan = True
+
+    return parse_result
+
+# ファイルパスのパターンを展開する
+def expand_filepaths(arg_patterns:list) -> list:
+    """ファイルパスのパターンを展開する
+
+    Args:
+        arg_patterns (list): ファイルパスまたは glob パターンのリスト
+
+    Returns:
+        list: 重複のない .blend ファイルの絶対パスのリスト(指定順)
+    """
+
+    # 展開したファイルパスのリスト
+    expand_paths = []
+
+    # パターンを順に展開する
+    for file_pattern in arg_patterns:
+        # glob パターンを展開する(一致しない場合はパターンをそのまま使う)
+        match_paths = sorted(glob.glob(file_pattern, recursive=True)) or [file_pattern]
+
+        # 重複を除いて追加する
+        for match_path in match_paths:
+            abs_path = os.path.abspath(match_path)
+            if abs_path not in expand_paths:
+                expand_paths.append(abs_path)
+
+    return expand_paths
+
+# アドオンのパッケージを読み込む
+def load_addon_module():
+    """アドオンのパッケージを読み込む
+    スクリプトとして直接実行されるため、本ファイルのディレクトリをパッケージとして読み込む
+
+    Returns:
+        module: アドオンのパッケージ
+    """
+
+    # 読み込み済みか確認する
+    if def_cli_addon_module_name in sys.modules:
+        return sys.modules[def_cli_addon_module_name]
+
+    # 本ファイルのディレクトリをパッケージとして読み込む
+    addon_dirpath = os.path.dirname(os.path.abspath(__file__))
+    addon_spec = importlib.util.spec_from_file_location(def_cli_addon_module_name,
+        os.path.join(addon_dirpath, "__init__.py"), submodule_search_locations=[addon_dirpath])
+    addon_module = importlib.util.module_from_spec(addon_spec)
+    sys.modules[def_cli_addon_module_name] = addon_module
+    addon_spec.loader.exec_module(addon_module)
+
+    return addon_module
+
+# 固定長レコードの索引のモジュールを読み込む
+def load_packed_index_module():
+    """固定長レコードの索引のモジュールを読み込む
+    Blender 外で実行される場合もあるため、アドオンのパッケージを経由せずに単独で読み込む
+
+    Returns:
+        module: packed_material_index モジュール
+    """
+
+    # 読み込み済みか確認する
+    module_name = def_cli_addon_module_name + "_packed_material_index"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    # 本ファイルのディレクトリのモジュールを読み込む
+    module_spec = importlib.util.spec_from_file_location(module_name,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "packed_material_index.py"))
+    packed_module = importlib.util.module_from_spec(module_spec)
+    sys.modules[module_name] = packed_module
+    module_spec.loader.exec_module(packed_module)
+
+    return packed_module
+
+# 開いているファイルのマテリアルマージを実行する
+def merge_open_file(arg_filepath:str, arg_arguments:argparse.Namespace) -> dict:
+    """開いているファイルのマテリアルマージを実行する
+
+    Args:
+        arg_filepath (str): 開いているファイルのパス
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        dict: ファイル毎の実行結果
+    """
+
+    # bpyインポート(Blender 内でのみ利用可能)
+    import bpy
+
+    # アドオンのパッケージを読み込む
+    addon_module = load_addon_module()
+
+    # 名前のパターンに一致するメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in bpy.data.objects
+        if check_object.type == 'MESH' and fnmatch.fnmatchcase(check_object.name, arg_arguments.objects)]
+
+    # マテリアルマージを実行する
+    error_message = None
+    cleanup_result = {} if arg_arguments.cleanup_orphans == True else None
+    stats_result = []
+    batch_result = []
+    if len(target_objects) > 0:
+        error_message = addon_module.UI_operations.UI_bsdf_material_merge_objects(
+            arg_target_objects=target_objects,
+            arg_tolerance=arg_arguments.tolerance,
+            arg_signature_cache=arg_arguments.cache,
+            arg_dedup_images=arg_arguments.dedup_images,
+            arg_cleanup_result=cleanup_result,
+            arg_stats_result=stats_result,
+            arg_batch_mode=arg_arguments.batch,
+            arg_batch_result=batch_result)
+
+    # ライブラリが指定されている場合はライブラリのマテリアルに差し替える
+    library_remap = {}
+    if error_message == None and arg_arguments.library != None and len(target_objects) > 0:
+        error_message = addon_module.UI_operations.UI_bsdf_material_merge_library(
+            arg_target_objects=target_objects,
+            arg_library_path=arg_arguments.library,
+            arg_link=(arg_arguments.library_append == False),
+            arg_remap_result=library_remap)
+
+    # 正常終了時は指定に従ってファイルを上書き保存する
+    saved_flg = False
+    if error_message == None and arg_arguments.save == True and len(target_objects) > 0:
+        bpy.ops.wm.save_mainfile(filepath=arg_filepath)
+        saved_flg = True
+
+    # ファイル毎の実行結果を作成する
+    return {
+        "filepath": arg_filepath,
+        "error": error_message,
+        "saved": saved_flg,
+        "library_remap": library_remap,
+        "cleanup": cleanup_result,
+        "batch_objects": batch_result,
+        "objects": stats_result,
+    }
+
+# 開いているファイルのマテリアルのシグネチャを記録する
+def scan_open_file(arg_filepath:str) -> dict:
+    """開いているファイルのマテリアルのシグネチャを記録する
+    ファイル内で定義されたマテリアルを対象とし、データの変更と保存は行わない
+
+    Args:
+        arg_filepath (str): 開いているファイルのパス
+
+    Returns:
+        dict: ファイル毎の実行結果
+    """
+
+    # bpyインポート(Blender 内でのみ利用可能)
+    import bpy
+
+    # アドオンのパッケージを読み込む
+    addon_module = load_addon_module()
+
+    # 雛形のノードからシグネチャのレイアウトを検出する
+    # (アドオンとして登録されないため、登録後のタイマーの代わりに実行する。ファイルは保存しない)
+    addon_module.UI_operations.comp_material_bsdf.discover_surface_shader_layouts()
+
+    # ファイル内で定義されたマテリアルを取得する(リンクしたマテリアルはリンク元で記録する)
+    local_materials = [check_mat for check_mat in bpy.data.materials if check_mat.library == None]
+
+    # ファイル毎の実行結果を作成する
+    return {
+        "filepath": arg_filepath,
+        "error": None,
+        "saved": False,
+        "objects": [],
+        "signatures": addon_module.UI_operations.UI_bsdf_material_signature_records(arg_materials=local_materials),
+    }
+
+# 指定ファイルを順に開いてマテリアルマージを実行する
+def run_worker(arg_filepaths:list, arg_arguments:argparse.Namespace) -> list:
+    """指定ファイルを順に開いてマテリアルマージを実行する
+
+    Args:
+        arg_filepaths (list): .blend ファイルのパスのリスト
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        list: ファイル毎の実行結果のリスト
+    """
+
+    # bpyインポート(Blender 内でのみ利用可能)
+    import bpy
+
+    # ファイル毎の実行結果のリスト
+    file_results = []
+
+    # ファイルを順に処理する
+    for target_filepath in arg_filepaths:
+        try:
+            # ファイルを開く
+            bpy.ops.wm.open_mainfile(filepath=target_filepath)
+
+            if arg_arguments.scan == True:
+                # シグネチャを記録する
+                file_results.append(scan_open_file(arg_filepath=target_filepath))
+            else:
+                # マテリアルマージを実行する
+                file_results.append(merge_open_file(arg_filepath=target_filepath, arg_arguments=arg_arguments))
+        except Exception as merge_exception:
+            # 例外は結果に記録して次のファイルの処理を続ける
+            file_results.append({"filepath": target_filepath, "error": repr(merge_exception), "saved": False, "objects": []})
+
+    return file_results
+
+# ワーカープロセスの起動引数を作成する
+def get_worker_command(arg_blender_path:str, arg_filepaths:list, arg_result_path:str,
+  arg_arguments:argparse.Namespace) -> list:
+    """ワーカープロセスの起動引数を作成する
+
+    Args:
+        arg_blender_path (str): Blender の実行ファイルのパス
+        arg_filepaths (list): 担当する .blend ファイルのパスのリスト
+        arg_result_path (str): 結果の JSON ファイルのパス
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        list: 起動引数のリスト
+    """
+
+    # 本スクリプトを担当ファイル、単一ジョブで実行する
+    worker_command = [arg_blender_path, "--background", "--factory-startup",
+        "--python", os.path.abspath(__file__), "--"]
+    worker_command.extend(arg_filepaths)
+    worker_command.extend([
+        "--objects", arg_arguments.objects,
+        "--tolerance", repr(arg_arguments.tolerance),
+        "--cache", arg_arguments.cache,
+        "--batch", arg_arguments.batch,
+        "--json", arg_result_path,
+        "--jobs", "1"])
+
+    # シグネチャの記録の指定を引き継ぐ
+    # (索引はワーカーの結果を統合して作成するため、ワーカーには渡さない)
+    if arg_arguments.scan == True:
+        worker_command.append("--scan")
+
+    # 上書き保存の指定を引き継ぐ
+    if arg_arguments.save == True:
+        worker_command.append("--save")
+
+    # 画像の重複統合の指定を引き継ぐ
+    if arg_arguments.dedup_images == True:
+        worker_command.append("--dedup-images")
+
+    # 未使用データの削除の指定を引き継ぐ
+    if arg_arguments.cleanup_orphans == True:
+        worker_command.append("--cleanup-orphans")
+
+    # ライブラリの指定を引き継ぐ
+    # (ライブラリの索引ファイルが作成済みの場合は各ワーカーで再利用する)
+    if arg_arguments.library != None:
+        worker_command.extend(["--library", os.path.abspath(arg_arguments.library)])
+        if arg_arguments.library_append == True:
+            worker_command.append("--library-append")
+
+    return worker_command
+
+# ワーカープロセスを起動して担当ファイルを処理する
+def run_worker_process(arg_blender_path:str, arg_filepaths:list, arg_arguments:argparse.Namespace) -> list:
+    """ワーカープロセスを起動して担当ファイルを処理する
+
+    Args:
+        arg_blender_path (str): Blender の実行ファイルのパス
+        arg_filepaths (list): 担当する .blend ファイルのパスのリスト
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        list: ファイル毎の実行結果のリスト
+    """
+
+    # 結果を受け取る一時ファイルを作成する
+    result_fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(result_fd)
+
+    try:
+        # ワーカープロセスを実行する
+        worker_process = subprocess.run(
+            get_worker_command(arg_blender_path, arg_filepaths, result_path, arg_arguments),
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+
+        # 結果の JSON を読み込む
+        try:
+            with open(result_path, "r", encoding="utf-8") as result_file:
+                file_results = json.load(result_file)["files"]
+            if len(file_results) == len(arg_filepaths):
+                return file_results
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        # 結果が書き出されなかった場合はプロセスの出力を担当ファイル毎のエラーとして記録する
+        return [{"filepath": target_filepath, "saved": False, "objects": [],
+            "error": "Worker failed (exit code %d) : %s" % (worker_process.returncode, worker_process.stdout[-2000:])}
+            for target_filepath in arg_filepaths]
+    finally:
+        # 一時ファイルを削除する
+        os.remove(result_path)
+
+# 複数のワーカープロセスでファイルを並列に処理する
+def run_parallel(arg_filepaths:list, arg_arguments:argparse.Namespace) -> list:
+    """複数のワーカープロセスでファイルを並列に処理する
+
+    Args:
+        arg_filepaths (list): .blend ファイルのパスのリスト
+        arg_arguments (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        list: ファイル毎の実行結果のリスト(指定順)
+    """
+
+    # ワーカーとして起動する Blender の実行ファイルを決定する
+    blender_path = arg_arguments.blender
+    if blender_path == None:
+        # 実行中の Blender を使用する
+        import bpy
+        blender_path = bpy.app.binary_path
+
+    # ワーカー毎の担当ファイルに分割する
+    files_per_worker = max(arg_arguments.files_per_worker, 1)
+    worker_filepaths = [arg_filepaths[file_index:file_index+files_per_worker]
+        for file_index in range(0, len(arg_filepaths), files_per_worker)]
+
+    # 指定数のワーカープロセスを同時に実行する
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(arg_arguments.jobs, 1)) as worker_pool:
+        worker_results = list(worker_pool.map(
+            lambda target_filepaths: run_worker_process(blender_path, target_filepaths, arg_arguments),
+            worker_filepaths))
+
+    return [file_result for file_results in worker_results for file_result in file_results]
+
+# 実行結果を JSON ファイルに書き出す
+def write_results(arg_result_path:str, arg_file_results:list):
+    """実行結果を JSON ファイルに書き出す
+
+    Args:
+        arg_result_path (str): 結果の JSON ファイルのパス
+        arg_file_results (list): ファイル毎の実行結果のリスト
+    """
+
+    # 結果を書き出す
+    with open(arg_result_path, "w", encoding="utf-8") as result_file:
+        json.dump({"files": arg_file_results}, result_file, indent=1)
+
+    return
+
+# 全ファイルのシグネチャの記録から一致するマテリアルの索引を作成する
+def build_scan_index(arg_file_results:list) -> dict:
+    """全ファイルのシグネチャの記録から一致するマテリアルの索引を作成する
+    シグネチャのハッシュ毎にマテリアルをまとめ、2つ以上のマテリアルが一致するもののみを索引とする
+
+    Args:
+        arg_file_results (list): ファイル毎の実行結果のリスト
+
+    Returns:
+        dict: 一致するマテリアルの索引
+    """
+
+    # シグネチャのハッシュ毎にファイル番号とマテリアル名をまとめる
+    scan_filepaths = []
+    signature_groups = {}
+    material_count = 0
+    unmergeable_count = 0
+    for file_result in arg_file_results:
+        if file_result.get("signatures") == None:
+            continue
+        file_number = len(scan_filepaths)
+        scan_filepaths.append(file_result["filepath"])
+        for material_name, signature_digest, *_ in file_result["signatures"]:
+            material_count += 1
+            if signature_digest == None:
+                unmergeable_count += 1
+                continue
+            signature_groups.setdefault(signature_digest, []).append([file_number, material_name])
+
+    # 2つ以上のマテリアルが一致するシグネチャを索引とする
+    equivalence_classes = {signature_digest: group_materials
+        for signature_digest, group_materials in signature_groups.items() if len(group_materials) > 1}
+
+    return {
+        "version": def_scan_index_version,
+        "files": scan_filepaths,
+        "materials": material_count,
+        "unmergeable": unmergeable_count,
+        "signatures": len(signature_groups),
+        "redundant": sum(len(group_materials) - 1 for group_materials in equivalence_classes.values()),
+        "classes": equivalence_classes,
+    }
+
+# 一致するマテリアルの索引を書き出す
+def write_scan_index(arg_index_path:str, arg_scan_index:dict, arg_file_results:list):
+    """一致するマテリアルの索引を書き出す
+    拡張子が .bsdfidx の場合は全マテリアルのシグネチャを固定長レコードの索引に、それ以外の場合は一致するマテリアルを JSON に書き出す
+
+    Args:
+        arg_index_path (str): 索引ファイルのパス
+        arg_scan_index (dict): 一致するマテリアルの索引
+        arg_file_results (list): ファイル毎の実行結果のリスト
+    """
+
+    # 拡張子が .bsdfidx 以外の場合は JSON の索引を書き出す
+    if os.path.splitext(arg_index_path)[1].lower() != def_packed_index_suffix:
+        with open(arg_index_path, "w", encoding="utf-8") as index_file:
+            json.dump(arg_scan_index, index_file, indent=1, sort_keys=True)
+        return
+
+    # 索引と同じファイル番号でマージ可能なマテリアルのシグネチャを集める
+    # (索引のファイルはシグネチャを記録したファイルの実行順)
+    scan_results = [file_result for file_result in arg_file_results if file_result.get("signatures") != None]
+    signature_records = [[file_number] + signature_record
+        for file_number, file_result in enumerate(scan_results)
+        for signature_record in file_result["signatures"] if signature_record[1] != None]
+
+    # 固定長レコードの索引を書き出す
+    load_packed_index_module().write_packed_index(arg_index_path=arg_index_path,
+        arg_filepaths=arg_scan_index["files"], arg_signature_records=signature_records)
+
+    return
+
+# オブジェクト毎のスロット数と描画コール数の削減結果を書き出す
+def write_stats(arg_stats_path:str, arg_file_results:list):
+    """オブジェクト毎のスロット数と描画コール数の削減結果を書き出す
+    拡張子が .csv の場合は全ファイルのオブジェクトを1行ずつ CSV に、それ以外の場合は JSON に書き出す
+
+    Args:
+        arg_stats_path (str): 書き出し先のパス
+        arg_file_results (list): ファイル毎の実行結果のリスト
+    """
+
+    # 全ファイルのオブジェクト毎の削減結果を取得する
+    stats_rows = [dict(object_stats, filepath=file_result["filepath"])
+        for file_result in arg_file_results for object_stats in file_result["objects"]]
+
+    if os.path.splitext(arg_stats_path)[1].lower() == ".csv":
+        # CSV として書き出す
+        with open(arg_stats_path, "w", encoding="utf-8", newline="") as stats_file:
+            csv_writer = csv.DictWriter(stats_file, fieldnames=def_stats_csv_columns, extrasaction="ignore")
+            csv_writer.writeheader()
+            for stats_row in stats_rows:
+                stats_row["slot_polygons"] = ";".join(str(polygon_count) for polygon_count in stats_row["slot_polygons"])
+                csv_writer.writerow(stats_row)
+    else:
+        # JSON として書き出す(合計を含める)
+        stats_summary = {"objects": len(stats_rows)}
+        for summary_name in def_stats_csv_columns[2:-1]:
+            stats_summary[summary_name] = sum(stats_row[summary_name] for stats_row in stats_rows)
+        with open(arg_stats_path, "w", encoding="utf-8") as stats_file:
+            json.dump({"summary": stats_summary, "objects": stats_rows}, stats_file, indent=1)
+
+    return
+
+# コマンドラインの処理を実行する
+def main(arg_argv:list) -> int:
+    """コマンドラインの処理を実行する
+
+    Args:
+        arg_argv (list): コマンドライン引数
+
+    Returns:
+        int: 終了コード(いずれかのファイルでエラーが発生した場合 1)
+    """
+
+    # コマンドライン引数を解析する
+    parse_result = parse_arguments(arg_argv=arg_argv)
+
+    # 対象ファイルを展開する
+    target_filepaths = expand_filepaths(arg_patterns=parse_result.files)
+
+    # Blender 外で実行された場合はワーカーの Blender の指定が必要
+    bpy_available = importlib.util.find_spec("bpy") != None
+    if bpy_available == False and parse_result.blender == None:
+        print("Error : --blender is required when running outside Blender.")
+        return 1
+
+    # 並列実行の指定を確認する
+    # (Blender 外で実行された場合、または、ワーカーの Blender が指定された場合はファイル数に依らずワーカープロセスで処理する)
+    if parse_result.blender != None or bpy_available == False \
+      or (parse_result.jobs > 1 and len(target_filepaths) > 1):
+        # ワーカープロセスで並列に処理する
+        file_results = run_parallel(arg_filepaths=target_filepaths, arg_arguments=parse_result)
+    else:
+        # 実行中の Blender で順に処理する
+        file_results = run_worker(arg_filepaths=target_filepaths, arg_arguments=parse_result)
+
+    # 指定に従って結果を書き出す
+    if parse_result.json != None:
+        write_results(arg_result_path=parse_result.json, arg_file_results=file_results)
+    if parse_result.stats != None:
+        write_stats(arg_stats_path=parse_result.stats, arg_file_results=file_results)
+    if parse_result.index != None:
+        scan_index = build_scan_index(arg_file_results=file_results)
+        write_scan_index(arg_index_path=parse_result.index, arg_scan_index=scan_index, arg_file_results=file_results)
+        print("Index : %d materials, %d redundant in %d classes" % (
+            scan_index["materials"], scan_index["redundant"], len(scan_index["classes"])))
+
+    # ファイル毎の結果を表示する
+    for file_result in file_results:
+        print("%s : %s" % (file_result["filepath"], file_result["error"] or "OK"))
+
+    # エラーの有無を終了コードとして返す
+    return 1 if any(file_result["error"] != None for file_result in file_results) else 0
+
+
+# 実行時の処理
+if __name__ == "__main__":
+    sys.exit(main(arg_argv=sys.argv))
@@ -1,43 +1,108 @@
 # 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "check_surface_bsdf" in locals():
+        importlib.reload(check_surface_bsdf)
+    if "extract_material_signature" in locals():
+        importlib.reload(extract_material_signature)
+    if "hash_node_subgraph" in locals():
+        importlib.reload(hash_node_subgraph)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+    if "registry_surface_shader" in locals():
+        importlib.reload(registry_surface_shader)
 import bpy
-
-# プリンシプルBSDFノードで比較対象とする入力端子の名前をリストで定義する
-def_comp_bsdfnode_input_list = [
-    "Base Color",
-    "Subsurface",
-    "Subsurface Radius",
-    "Subsurface Color",
-    "Metallic",
-    "Specular",
-    "Specular Tint",
-    "Roughness",
-    "Anisotropic",
-    "Anisotropic Rotation",
-    "Sheen",
-    "Sheen Tint",
-    "Clearcoat",
-    "Clearcoat Roughness",
-    "IOR",
-    "Transmission",
-    "Transmission Roughness",
-    "Emission",
-    "Alpha",
-    "Normal",
-    "Clearcoat Normal",
-    "Tangent",
+import numpy as np
+from . import check_surface_bsdf
+from . import extract_material_signature
+from . import hash_node_subgraph
+from . import profile_material_merge
+from . import registry_surface_shader
+
+# 標準で比較方法を登録するシェーダーノードのノードタイプ
+# (比較対象の入力端子は実行中の Blender の雛形のノードから検出する)
+def_comp_shader_idname_list = [
+    'ShaderNodeBsdfPrincipled',
+    'ShaderNodeEmission',
+    'ShaderNodeBsdfDiffuse',
+    'ShaderNodeMixShader',
 ]
 
+# 許容誤差を指定したマージで、近傍のバケットを探索する次元数の上限
+# (境界付近の次元が上限を超えた場合、超過分の近傍は探索しないため、マージされない組が残ることがある)
+def_comp_tolerance_neighbor_limit = 8
+
+# 標準のシェーダーノードの比較方法を登録する
+def register_default_surface_shaders():
+    """標準のシェーダーノードの比較方法を登録する
+    全てのシェーダーノードで入力端子の値を行列に一括で読み込む抽出関数を使用し、
+    比較できる全ての入力端子を比較対象とする
+    """
+
+    for shader_idname in def_comp_shader_idname_list:
+        registry_surface_shader.register_surface_shader(arg_shader_idname=shader_idname,
+            arg_inputname_list=None, arg_extractor=extract_material_signature.extract_signature_matrix)
+
+    return
+
+# モジュールの読み込み時に標準のシェーダーノードを登録する
+register_default_surface_shaders()
+
+# 登録済みのシェーダーノードのシグネチャのレイアウトを検出する
+def discover_surface_shader_layouts():
+    """登録済みのシェーダーノードのシグネチャのレイアウトを検出する
+    アドオンの登録中はデータを変更できないため、登録後のタイマーから呼び出す
+    登録後に追加されたシェーダーノードを検出するため、データを変更する実行の開始時にも呼び出す
+    (データを変更しない処理では検出せず、未検出のシェーダーノードのマテリアルはマージの対象外とする)
+
+    Returns:
+        None: タイマーを繰り返さないため常に None
+    """
+
+    # 雛形のノードからレイアウトを一括で検出する
+    extract_material_signature.build_shader_layout_cache(arg_shader_keys=[
+        (shader_idname, shader_entry["inputs"])
+        for shader_idname, shader_entry in registry_surface_shader.surface_shader_registry.items()])
+
+    return None
+
+# シェーダーノードの比較対象の入力端子の識別子を取得する
+def get_shader_inputname_list(arg_shader_idname:str) -> list:
+    """シェーダーノードの比較対象の入力端子の識別子を取得する
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ
+
+    Returns:
+        list: 入力端子の識別子のリスト(未登録、または、レイアウトを検出できない場合 None)
+    """
+
+    # 比較方法を取得する
+    shader_entry = registry_surface_shader.get_surface_shader(arg_shader_idname=arg_shader_idname)
+    if shader_entry == None:
+        return None
+
+    # 検出したレイアウトを取得する
+    signature_layout = extract_material_signature.get_shader_signature_layout(arg_shader_idname=arg_shader_idname,
+        arg_inputname_list=shader_entry["inputs"])
+    if signature_layout == None:
+        return None
+
+    return [socket_identifier for socket_identifier, _, _, _ in signature_layout]
+
 # 指定したオブジェクトのマテリアルを類似マテリアルにマージする
-def material_merge_object(arg_object:bpy.types.Object) -> bool:
+def material_merge_object(arg_object:bpy.types.Object, arg_shader_tolerance_dict:dict=None) -> bool:
     """指定したオブジェクトのマテリアルを類似マテリアルにマージする
     以下の条件で類似マテリアルを判断する
     1.指定マテリアルのアクティブな出力ノードにノードが接続されているか
-    2.アクティブな出力ノードに接続されたノードはプリンシプルBSDFか
-    3.プリンシプルBSDFの比較対象の入力端子にリンクが貼られておらず、デフォルト値が有効か
-    4.デフォルト値が有効な場合、その入力端子が全て一致すれば類似と判断する
+    2.アクティブな出力ノードに接続されたノードは比較方法が登録されたシェーダーか(未登録の場合はマージしない)
+    3.シェーダーの比較対象の入力端子のデフォルト値、または、リンク先のノード構成の構造ハッシュを取得する
+    4.シェーダーの種類が同じ、かつ、比較対象の入力端子が全て一致すれば類似と判断する
+    類似マテリアルのスロットは、スロット上部で最初に出現した一致マテリアルに差し替える
 
     Args:
         arg_object (bpy.types.Object): 指定オブジェクト
+        arg_shader_tolerance_dict (dict, optional): シェーダーのノードタイプ毎の許容誤差(None の場合は完全一致)
 
     Returns:
         bool: 実行正否
@@ -48,298 +113,567 @@ def material_merge_object(arg_object:bpy.types.Object) -> bool:
         # 指定オブジェクトがメッシュでない場合は処理しない
         return None
 
-    # オブジェクトのマテリアルスロットを走査する
-    for check_material_slot in arg_object.material_slots:
-        # スロットのマテリアルを取得
-        check_mat = check_material_slot.material
-        # 全マテリアルデータを走査する
-        for comp_material_slot in arg_object.material_slots:
+    # 単一オブジェクトを対象として複数オブジェクトのマージ処理を実行する
+    return material_merge_objects(arg_objects=[arg_object], arg_shader_tolerance_dict=arg_shader_tolerance_dict)
+
+# 指定した複数オブジェクトのマテリアルを共通の索引で類似マテリアルにマージする
+def material_merge_objects(arg_objects:list, arg_shader_tolerance_dict:dict=None) -> bool:
+    """指定した複数オブジェクトのマテリアルを共通の索引で類似マテリアルにマージする
+    オブジェクトを跨いで一致するマテリアルも、最初に出現したマテリアルに差し替える
+    全マテリアルのシグネチャを1つの行列に一括で取得し、行列演算で一致するマテリアルをまとめる
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_shader_tolerance_dict (dict, optional): シェーダーのノードタイプ毎の許容誤差(None の場合は完全一致)
+
+    Returns:
+        bool: 実行正否
+    """
+
+    # 対象のメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in arg_objects if check_object.type == 'MESH']
+
+    # 全スロットのマテリアルを出現順に重複なく収集する
+    unique_materials = get_slot_materials_unique(arg_objects=target_objects)
+
+    # マテリアル毎の代表マテリアルを取得する
+    canonical_materials = get_canonical_materials(arg_materials=unique_materials,
+        arg_shader_tolerance_dict=arg_shader_tolerance_dict)
+
+    # マテリアルのポインタ値をキーとして代表マテリアルを保持する
+    canonical_dict = {check_mat.as_pointer(): canonical_mat
+        for check_mat, canonical_mat in zip(unique_materials, canonical_materials)}
+
+    # 全スロットのマテリアルを代表マテリアルに差し替える
+    for target_object in target_objects:
+        for check_material_slot in target_object.material_slots:
             # スロットのマテリアルを取得
-            comp_mat = comp_material_slot.material
-            # 一致マテリアルを検出する前に自身がリストに出た場合
-            # マージ処理を行わない
-            if check_mat.name == comp_mat.name:
-                break
+            check_mat = check_material_slot.material
+
+            # 空のスロットは処理しない
+            if check_mat == None:
+                continue
 
-            # マテリアルの比較処理
-            comp_result = comp_material_bsdf(check_mat, comp_mat)
+            # 代表マテリアルを取得する
+            canonical_mat = canonical_dict[check_mat.as_pointer()]
 
-            # 比較結果をチェックする
-            if comp_result:
+            # 代表マテリアルが自身と異なる場合
+            if canonical_mat != check_mat:
                 # マテリアルを一致したものに差し替え
-                check_material_slot.material = comp_mat
-                # マージ処理を終了する
-                break
+                check_material_slot.material = canonical_mat
 
     return True
 
-# 指定マテリアルのBSDFノードを比較する
-def comp_material_bsdf(arg_material_one:bpy.types.Material,
-  arg_material_two:bpy.types.Material) -> bool:
-    """指定マテリアルのBSDFノードを比較する
-    受け渡したマテリアルの出力ノードに接続されたプリシプルBSDFノードを比較する
-    比較対象の入力端子のデフォルト値が有効、かつ、全て同一の場合、Trueを返す
+# 指定マテリアルのリストから各マテリアルの代表マテリアルを取得する
+def get_canonical_materials(arg_materials:list, arg_shader_tolerance_dict:dict=None, arg_use_node:bool=True) -> list:
+    """指定マテリアルのリストから各マテリアルの代表マテリアルを取得する
+    代表マテリアルは一致するマテリアルのうちリストで最初に出現したマテリアルとなる
+    シェーダーのノードタイプ毎に登録された抽出関数でシグネチャの行列を取得し、種類の異なるシェーダーはマージしない
+    (比較方法が登録されていないシェーダーのマテリアルはマージの対象外とする)
 
     Args:
-        arg_material_one (bpy.types.Material): 比較マテリアル１
-        arg_material_two (bpy.types.Material): 比較マテリアル２
+        arg_materials (list): 重複のないマテリアルのリスト
+        arg_shader_tolerance_dict (dict, optional): シェーダーのノードタイプ毎の許容誤差(None の場合は完全一致)
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
 
     Returns:
-        bool: 比較結果(一致：True)
+        list: マテリアル毎の代表マテリアルのリスト(マージしないマテリアルは自身)
     """
 
-    # マテリアルの出力ノードにプリンシプルBSDFノードが接続されているかチェックする
-    if check_surface_bsdf(arg_material_one) == False:
-        # プリシプルBSDF出なかった場合は処理を終了して False を返す
-        return False
-    
-    # マテリアルの出力ノードにプリンシプルBSDFノードが接続されているかチェックする
-    if check_surface_bsdf(arg_material_two) == False:
-        # プリシプルBSDF出なかった場合、処理を終了して False を返す
-        return False
+    # 代表行の番号を自身で初期化する
+    canonical_rows = np.arange(len(arg_materials))
 
-    # プリンシプルBSDFノードを取得する
-    get_node_one = get_node_linkoutput(arg_material_one)
+    # シェーダーのノードタイプ毎にマテリアルの番号を分類する
+    shader_rows_dict = get_shader_rows_dict(arg_materials=arg_materials, arg_use_node=arg_use_node)
 
-    # プリンシプルBSDFノードを取得する
-    get_node_two = get_node_linkoutput(arg_material_two)
+    # 比較方法が登録されていないマテリアル数を記録する
+    profile_material_merge.add_profile_counter("materials_skipped", len(shader_rows_dict.pop(None, [])))
 
-    # 比較結果フラグ(デフォルトで一致判定)
-    comp_result = True
+    # シェーダーのノードタイプ毎に一致する行をまとめる
+    for shader_idname, shader_rows in shader_rows_dict.items():
+        # 分類したマテリアルのシグネチャの行列を一括で取得する
+        shader_rows = np.array(shader_rows)
+        shader_signature = extract_shader_signature(
+            arg_materials=[arg_materials[row_num] for row_num in shader_rows],
+            arg_shader_idname=shader_idname, arg_use_node=arg_use_node)
 
-    # 比較対象とする入力端子を全てチェックする
-    for bsdfnode_inputname in def_comp_bsdfnode_input_list:
+        # 一致する行をまとめ、分類内の代表行の番号を全体の番号に変換する
+        canonical_rows[shader_rows] = shader_rows[group_shader_signature(arg_signature=shader_signature,
+            arg_shader_idname=shader_idname, arg_shader_tolerance_dict=arg_shader_tolerance_dict)]
 
-        # デフォルト値が有効なソケットの情報を取得する
-        nodesocket_one = get_nodesocket_enabledefault(arg_node=get_node_one, arg_inputname=bsdfnode_inputname)
-        nodesocket_two = get_nodesocket_enabledefault(arg_node=get_node_two, arg_inputname=bsdfnode_inputname)
-
-        # デフォルト値が有効なソケット情報を取得できたか確認する
-        if ((nodesocket_one == None) or (nodesocket_two == None)):
-            # ソケット情報を取得できなかった場合は不一致としてチェックを終了する
-            comp_result = False
-            break
-
-        # ソケットのタイプが同一か確認する
-        if (type(nodesocket_one) != type(nodesocket_two)):
-            # 同一でない場合は不一致としてチェックを終了する
-            comp_result = False
-            break
-
-        # タイプ毎の値比較の実施済みフラグ
-        checked_flg = False
-
-        # NodeSocketFloatのソケットの比較
-        if isinstance(nodesocket_one, bpy.types.NodeSocketFloat):
-            # 値が一致するか比較する
-            if (nodesocket_one.default_value != nodesocket_two.default_value):
-                # 値が一致しない場合は不一致としてチェックを終了する
-                comp_result = False
-                break
-            else:
-                # タイプ毎の値比較の実施済みフラグを設定する
-                checked_flg = True
-
-        # NodeSocketFloatFactorのソケットの比較
-        if isinstance(nodesocket_one, bpy.types.NodeSocketFloatFactor):
-            # 値が一致するか比較する
-            if (nodesocket_one.default_value != nodesocket_two.default_value):
-                # 値が一致しない場合は不一致としてチェックを終了する
-                comp_result = False
-                break
-            else:
-                # タイプ毎の値比較の実施済みフラグを設定する
-                checked_flg = True
-
-        # NodeSocketVectorのソケットの比較
-        if isinstance(nodesocket_one, bpy.types.NodeSocketVector):
-            # 値が一致するか比較する
-            if ((nodesocket_one.default_value[0] != nodesocket_two.default_value[0]) or
-                (nodesocket_one.default_value[1] != nodesocket_two.default_value[1]) or
-                (nodesocket_one.default_value[2] != nodesocket_two.default_value[2])):
-                # 値が一致しない場合は不一致としてチェックを終了する
-                comp_result = False
-                break
-            else:
-                # タイプ毎の値比較の実施済みフラグを設定する
-                checked_flg = True
-
-        # NodeSocketColorのソケットの比較
-        if isinstance(nodesocket_one, bpy.types.NodeSocketColor):
-            # 値が一致するか比較する
-            if ((nodesocket_one.default_value[0] != nodesocket_two.default_value[0]) or
-                (nodesocket_one.default_value[1] != nodesocket_two.default_value[1]) or
-                (nodesocket_one.default_value[2] != nodesocket_two.default_value[2]) or
-                (nodesocket_one.default_value[3] != nodesocket_two.default_value[3])):
-                # 値が一致しない場合は不一致としてチェックを終了する
-                comp_result = False
-                break
-            else:
-                # タイプ毎の値比較の実施済みフラグを設定する
-                checked_flg = True
-        
-        # 値比較を実施済みか確認する
-        if checked_flg == False:
-            # 合致するタイプがない場合はBSDFでないと判断して不一致としてチェックを終了する
-            comp_result = False
-            break
+    # 代表行の番号をマテリアルに変換する
+    return [arg_materials[canonical_num] for canonical_num in canonical_rows]
 
-    return comp_result
+# 指定マテリアルのリストをシェーダーのノードタイプ毎に分類する
+def get_shader_rows_dict(arg_materials:list, arg_use_node:bool=True) -> dict:
+    """指定マテリアルのリストをシェーダーのノードタイプ毎に分類する
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
+
+    Returns:
+        dict: シェーダーのノードタイプをキーとしたマテリアルの番号のリスト
+            (比較方法が登録されていないマテリアルはキーを None とする)
+    """
+
+    shader_rows_dict = {}
+    for row_num, check_mat in enumerate(arg_materials):
+        shader_idname = None
+        if check_mat != None:
+            shader_idname = check_surface_bsdf.check_surface_shader(arg_material=check_mat, arg_use_node=arg_use_node)
+        shader_rows_dict.setdefault(shader_idname, []).append(row_num)
+
+    return shader_rows_dict
+
+# 同じシェーダーのノードタイプのマテリアルのシグネチャの行列を取得する
+def extract_shader_signature(arg_materials:list, arg_shader_idname:str, arg_use_node:bool=True) -> tuple:
+    """同じシェーダーのノードタイプのマテリアルのシグネチャの行列を取得する
+    ノードタイプに登録された抽出関数を呼び出す
+
+    Args:
+        arg_materials (list): 指定ノードタイプのシェーダーを使用するマテリアルのリスト
+        arg_shader_idname (str): シェーダーのノードタイプ
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
 
-# 指定マテリアルのアクティブな出力ノードに接続されたノードがプリンシプルBSDFかチェックする
-def check_surface_bsdf(arg_material:bpy.types.Material) -> bool:
-    """指定マテリアルのアクティブな出力ノードに接続されたノードがプリンシプルBSDFかチェックする
+    Returns:
+        tuple: (値の行列, リンク接続の行列, マージ可能な行, シグネチャのレイアウト, リンク構成の番号) の組
+    """
+
+    # 比較方法を取得する
+    shader_entry = registry_surface_shader.get_surface_shader(arg_shader_idname=arg_shader_idname)
+
+    return shader_entry["extractor"](arg_materials=arg_materials, arg_inputname_list=shader_entry["inputs"],
+        arg_shader_idname=arg_shader_idname, arg_use_node=arg_use_node)
+
+# 分割して取得したシグネチャの行列を1つの行列に連結する
+def concat_shader_signatures(arg_materials:list, arg_signature_chunks:list) -> tuple:
+    """分割して取得したシグネチャの行列を1つの行列に連結する
+    リンク構成の番号は分割毎に採番されるため、代表行の構造ハッシュから全体で共通の番号に振り直す
+
+    Args:
+        arg_materials (list): 連結後の行順のマテリアルのリスト
+        arg_signature_chunks (list): extract_shader_signature の戻り値を行順に並べたリスト
+
+    Returns:
+        tuple: extract_shader_signature と同じ形式の組
+            (分割毎のシグネチャのレイアウトが一致しない場合 None)
+    """
+
+    # 分割されていない場合はそのまま返す
+    if len(arg_signature_chunks) == 1:
+        return arg_signature_chunks[0]
+
+    # シグネチャのレイアウトが一致するか確認する
+    signature_layout = arg_signature_chunks[0][3]
+    if any(signature_chunk[3] != signature_layout for signature_chunk in arg_signature_chunks):
+        return None
+
+    # 値の行列、リンク接続の行列、マージ可能な行を連結する
+    value_matrix = np.concatenate([signature_chunk[0] for signature_chunk in arg_signature_chunks])
+    linked_matrix = np.concatenate([signature_chunk[1] for signature_chunk in arg_signature_chunks])
+    mergeable_rows = np.concatenate([signature_chunk[2] for signature_chunk in arg_signature_chunks])
+
+    # リンク構成の番号を構造ハッシュの組み合わせ毎に振り直す
+    link_group_rows = np.zeros(len(value_matrix), dtype=np.int64)
+    link_group_dict = {}
+    node_memo = {}
+    group_memo = {}
+    row_offset = 0
+    for signature_chunk in arg_signature_chunks:
+        chunk_group_rows = signature_chunk[4]
+        # 分割内の番号毎に最初の行の構造ハッシュを求める
+        chunk_group_numbers, first_rows = np.unique(chunk_group_rows, return_index=True)
+        for group_number, first_row in zip(chunk_group_numbers, first_rows):
+            if group_number == 0:
+                continue
+            # リンクが接続された入力端子の位置と構造ハッシュの組をキーとする
+            linked_row = linked_matrix[row_offset + first_row]
+            link_key = (tuple(np.flatnonzero(linked_row).tolist()), get_material_link_hashes(
+                arg_material=arg_materials[row_offset + first_row], arg_signature_layout=signature_layout,
+                arg_linked_row=linked_row, arg_node_memo=node_memo, arg_group_memo=group_memo))
+            link_group_rows[row_offset:row_offset + len(chunk_group_rows)][chunk_group_rows == group_number] = \
+                link_group_dict.setdefault(link_key, len(link_group_dict) + 1)
+        row_offset += len(chunk_group_rows)
+
+    return (value_matrix, linked_matrix, mergeable_rows, signature_layout, link_group_rows)
+
+# シグネチャの行列から一致する行をまとめる
+def group_shader_signature(arg_signature:tuple, arg_shader_idname:str, arg_shader_tolerance_dict:dict=None) -> np.ndarray:
+    """シグネチャの行列から一致する行をまとめる
+
+    Args:
+        arg_signature (tuple): extract_shader_signature の戻り値
+        arg_shader_idname (str): シェーダーのノードタイプ
+        arg_shader_tolerance_dict (dict, optional): シェーダーのノードタイプ毎の許容誤差(None の場合は完全一致)
+
+    Returns:
+        np.ndarray: 行毎の代表行の番号の配列
+    """
+
+    value_matrix, _, mergeable_rows, signature_layout, link_group_rows = arg_signature
+
+    # ノードタイプの許容誤差を取得する
+    tolerance_list = None
+    if arg_shader_tolerance_dict != None:
+        tolerance_list = arg_shader_tolerance_dict.get(arg_shader_idname)
+
+    # 許容誤差が指定され、かつ、レイアウトの入力端子数と一致するか確認する
+    if tolerance_list == None or len(tolerance_list) != len(signature_layout):
+        # 完全一致する行をまとめる
+        return extract_material_signature.group_signature_matrix(
+            arg_value_matrix=value_matrix, arg_mergeable_rows=mergeable_rows,
+            arg_link_group_rows=link_group_rows)
+
+    # 許容誤差の範囲内で一致する行をまとめる
+    return extract_material_signature.group_signature_matrix_tolerance(
+        arg_value_matrix=value_matrix, arg_mergeable_rows=mergeable_rows,
+        arg_tolerance_columns=extract_material_signature.get_tolerance_columns(
+            arg_signature_layout=signature_layout, arg_tolerance_list=tolerance_list),
+        arg_neighbor_limit=def_comp_tolerance_neighbor_limit,
+        arg_link_group_rows=link_group_rows)
+
+# 指定マテリアルの完全一致で比較するシグネチャのキーを取得する
+def get_material_signature_key(arg_material:bpy.types.Material, arg_use_node:bool=False) -> tuple:
+    """指定マテリアルの完全一致で比較するシグネチャのキーを取得する
+    シェーダーのノードタイプ、値の行、リンクが接続された列番号、リンク接続の構造ハッシュを組にする
+    (get_canonical_materials で許容誤差を指定しない場合に一致するマテリアルは同じキーとなる)
 
     Args:
         arg_material (bpy.types.Material): 指定マテリアル
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
 
     Returns:
-        bool: プリンシプルBSDFが接続されているか
+        tuple: シグネチャのキー(マージしない場合 None)
     """
 
-    # マテリアルのノードを有効化する
-    use_material_node(arg_material=arg_material)
+    # シグネチャの行を取得する
+    signature_row = get_material_signature_row(arg_material=arg_material, arg_use_node=arg_use_node)
+    if signature_row == None:
+        return None
 
-    # アクティブな出力ノードに接続されたノードを取得する
-    get_node = get_node_linkoutput(arg_material=arg_material)
+    return get_signature_row_key(arg_signature_row=signature_row)
 
-    # ノードが取得できたか確認する
-    if get_node == None:
-        # サーフェスノードが存在しない場合はFalseを返す
-        return False
+# シグネチャの行から完全一致で比較するシグネチャのキーを作成する
+def get_signature_row_key(arg_signature_row:tuple) -> tuple:
+    """シグネチャの行から完全一致で比較するシグネチャのキーを作成する
+    同じ構造のノードが異なる入力端子に接続されたマテリアルを区別するため、リンクが接続された列番号をキーに含める
 
-    # ノードの種類がプリンシプルBSDFかチェックして結果を返す
-    isBSDF = check_isnode_bsdf(get_node)
+    Args:
+        arg_signature_row (tuple): get_material_signature_row の戻り値
+
+    Returns:
+        tuple: (シェーダーのノードタイプ, 値の行のバイト列, リンクが接続された列番号の組, リンク接続の構造ハッシュ) の組
+    """
+
+    # 値の行はバイト列としてキーに含める
+    shader_idname, value_row, linked_row, link_hashes = arg_signature_row
+    return (shader_idname, value_row.tobytes(), tuple(np.flatnonzero(linked_row).tolist()), link_hashes)
+
+# 指定マテリアルのシグネチャの行を取得する
+def get_material_signature_row(arg_material:bpy.types.Material, arg_use_node:bool=False) -> tuple:
+    """指定マテリアルのシグネチャの行を取得する
+    登録された抽出関数で1行の行列を取得し、シェーダーのノードタイプ、値の行、リンク接続の行、リンク接続の構造ハッシュを組にする
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
+
+    Returns:
+        tuple: (シェーダーのノードタイプ, 値の行, リンク接続の行, リンク接続の構造ハッシュ) の組(マージしない場合 None)
+    """
+
+    # 比較方法が登録されたシェーダーか確認する
+    shader_idname = check_surface_bsdf.check_surface_shader(arg_material=arg_material, arg_use_node=arg_use_node)
+    if shader_idname == None:
+        profile_material_merge.add_profile_counter("materials_skipped")
+        return None
+
+    # シグネチャの行列を取得する
+    value_matrix, linked_matrix, mergeable_rows, signature_layout, _ = extract_shader_signature(
+        arg_materials=[arg_material], arg_shader_idname=shader_idname, arg_use_node=arg_use_node)
+
+    # マージできない場合はキーを作成しない
+    if mergeable_rows[0] == False:
+        return None
 
-    return isBSDF
+    # リンクが接続された入力端子の構造ハッシュを取得する
+    link_hashes = get_material_link_hashes(arg_material=arg_material,
+        arg_signature_layout=signature_layout, arg_linked_row=linked_matrix[0])
 
-# アクティブな出力ノードに接続されたノードを取得する
-def get_node_linkoutput(arg_material:bpy.types.Material) -> bpy.types.Node:
-    """アクティブな出力ノードに接続されたノードを取得する
+    # 値の行は符号付きゼロを統一する
+    return (shader_idname, value_matrix[0] + value_matrix.dtype.type(0.0), linked_matrix[0], link_hashes)
+
+# 指定マテリアルのリンクが接続された入力端子の構造ハッシュを取得する
+def get_material_link_hashes(arg_material:bpy.types.Material, arg_signature_layout:list, arg_linked_row:np.ndarray,
+  arg_node_memo:dict=None, arg_group_memo:dict=None) -> tuple:
+    """指定マテリアルのリンクが接続された入力端子の構造ハッシュを取得する
 
     Args:
         arg_material (bpy.types.Material): 指定マテリアル
+        arg_signature_layout (list): シグネチャのレイアウト
+        arg_linked_row (np.ndarray): 指定マテリアルのリンク接続の行
+        arg_node_memo (dict, optional): ノードの構造ハッシュの記録(複数マテリアルで共有する場合に指定する)
+        arg_group_memo (dict, optional): ノードグループの構造ハッシュの記録(複数マテリアルで共有する場合に指定する)
+
+    Returns:
+        tuple: レイアウト順の構造ハッシュの組
+    """
+
+    # 記録が指定されていない場合は作成する
+    node_memo = arg_node_memo if arg_node_memo != None else {}
+    group_memo = arg_group_memo if arg_group_memo != None else {}
+
+    # 接続先のシェーダーノードを取得する
+    shader_node = check_surface_bsdf.get_node_linkoutput(arg_material=arg_material)
+
+    return tuple(hash_node_subgraph.get_input_subgraph_hash(arg_nodesocket=shader_node.inputs[socket_num],
+        arg_node_memo=node_memo, arg_group_memo=group_memo)
+        for (_, socket_num, _, _), is_linked in zip(arg_signature_layout, arg_linked_row) if is_linked == True)
+
+# 指定オブジェクトのスロットのマテリアルを出現順に重複なく取得する
+def get_slot_materials_unique(arg_objects:list) -> list:
+    """指定オブジェクトのスロットのマテリアルを出現順に重複なく取得する
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
 
     Returns:
-        bpy.types.Node: アクティブな出力ノードに接続されたノード
+        list: マテリアルのリスト(空のスロットは含まない)
     """
 
-    # 参照の保存用変数
-    name_mapping = {}
+    # 取得済みのマテリアルのポインタ値
+    found_pointers = set()
 
-    # ノード操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.Node.html)
-    # ノードリスト操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.Nodes.html)
-    # ノードツリー操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.NodeTree.html)
+    # マテリアルのリスト
+    unique_materials = []
 
-    # ターゲットマテリアルのノード参照を取得する
-    mat_nodes = arg_material.node_tree.nodes
+    # 全オブジェクトのスロットを順に走査する
+    for target_object in arg_objects:
+        for check_material_slot in target_object.material_slots:
+            # スロットのマテリアルを取得
+            check_mat = check_material_slot.material
 
-    # 出力ノードを取得する変数
-    output_node = None
+            # 空のスロット、または、取得済みのマテリアルは追加しない
+            if check_mat == None or check_mat.as_pointer() in found_pointers:
+                continue
 
-    # 出力ノードの操作マニュアル
-    # (https://docs.blender.org/api/current/bpy.types.ShaderNodeOutputMaterial.html)
+            # マテリアルを追加する
+            found_pointers.add(check_mat.as_pointer())
+            unique_materials.append(check_mat)
 
-    # 全ノードを走査する
-    for check_node in mat_nodes:
-        # ノードタイプを取得する
-        node_idname = check_node.bl_idname
+    return unique_materials
 
-        # ノードタイプが出力ノードか確認する
-        if node_idname == 'ShaderNodeOutputMaterial':
-            # アクティブな出力ノードのフラグを取得する
-            is_activeoutput = check_node.is_active_output
+# シェーダーのノードタイプ毎の許容誤差を作成する
+def get_shader_tolerance_dict(arg_tolerance:float, arg_tolerance_dict:dict=None) -> dict:
+    """シェーダーのノードタイプ毎の許容誤差を作成する
+    比較方法が登録された全てのシェーダーについて、入力端子毎の許容誤差のリストを作成する
 
-            # アクティブな出力ノードかチェックする
-            if is_activeoutput == True:
-                # アクティブな出力ノードなら保持する
-                output_node = check_node
+    Args:
+        arg_tolerance (float): 全入力端子に共通する許容誤差
+        arg_tolerance_dict (dict, optional): 入力端子名をキーとした個別の許容誤差
 
-    # 出力ノードが取得できたか確認する
-    if output_node == None:
-        # 出力ノードが存在しない場合は処理しない
+    Returns:
+        dict: ノードタイプをキーとしたシグネチャの要素毎の許容誤差(全て 0 の場合は完全一致として None)
+    """
+
+    # 登録済みのシェーダー毎に許容誤差のリストを作成する
+    # (レイアウトを検出できないシェーダーは完全一致で比較する)
+    shader_tolerance_dict = {}
+    for shader_idname in registry_surface_shader.surface_shader_registry.keys():
+        inputname_list = get_shader_inputname_list(arg_shader_idname=shader_idname)
+        if inputname_list != None:
+            shader_tolerance_dict[shader_idname] = get_signature_tolerance_list(arg_tolerance=arg_tolerance,
+                arg_tolerance_dict=arg_tolerance_dict, arg_inputname_list=inputname_list)
+
+    # 許容誤差が全て 0 か確認する
+    if all(tolerance_list == None for tolerance_list in shader_tolerance_dict.values()):
+        # 完全一致で比較するため許容誤差は返さない
         return None
-    
-    # ノードソケット操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.NodeSocket.html)
 
-    # 出力ノードのサーフェス入力(1番目の入力)のリンクを確認する
-    surface_input = output_node.inputs[0]
+    return shader_tolerance_dict
 
-    # リンクが接続されているか確認する
-    if surface_input.is_linked == False:
-        # 出力ノードにサーフェスノードが接続されていない場合は処理しない
+# シグネチャの要素毎の許容誤差のリストを作成する
+def get_signature_tolerance_list(arg_tolerance:float, arg_tolerance_dict:dict=None,
+  arg_inputname_list:list=None) -> list:
+    """シグネチャの要素毎の許容誤差のリストを作成する
+
+    Args:
+        arg_tolerance (float): 全入力端子に共通する許容誤差
+        arg_tolerance_dict (dict, optional): 入力端子名をキーとした個別の許容誤差
+        arg_inputname_list (list, optional): 比較対象とする入力端子のリスト(None の場合はプリンシプルBSDFの入力端子)
+
+    Returns:
+        list: シグネチャの要素毎の許容誤差(全て 0 の場合は完全一致として None)
+    """
+
+    # 個別の許容誤差が指定されていない場合は空の辞書とする
+    tolerance_dict = arg_tolerance_dict if arg_tolerance_dict != None else {}
+
+    # 入力端子のリストが指定されていない場合はプリンシプルBSDFの入力端子とする
+    inputname_list = arg_inputname_list
+    if inputname_list == None:
+        inputname_list = get_shader_inputname_list(arg_shader_idname='ShaderNodeBsdfPrincipled')
+
+    # 入力端子が存在しない場合は完全一致とする
+    if inputname_list == None or len(inputname_list) == 0:
         return None
 
-    # リンク操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.NodeLink.html#bpy.types.NodeLink)
+    # 比較対象の入力端子毎に許容誤差を決定する
+    tolerance_list = [max(0.0, float(tolerance_dict.get(bsdfnode_inputname, arg_tolerance)))
+        for bsdfnode_inputname in inputname_list]
 
-    # リンクの一覧を取得する
-    mat_links = arg_material.node_tree.links
+    # 許容誤差が全て 0 か確認する
+    if max(tolerance_list) == 0.0:
+        # 完全一致で比較するため許容誤差のリストは返さない
+        return None
 
-    # 接続元ノードを取得する変数
-    surface_node = None
+    return tolerance_list
 
-    # リンクを走査する
-    for check_link in mat_links:
-        # 接続先が出力ノードのサーフェス入力か確認する
-        if check_link.to_socket == surface_input:
-            # リンクの接続元ノードを取得する
-            surface_node = check_link.from_node
-    
-    # 接続元ノードが取得できたか確認する
-    if surface_node == None:
-        # 接続元ノードが存在しない場合は処理しない
+# 指定マテリアルのBSDFノードを比較する
+def comp_material_bsdf(arg_material_one:bpy.types.Material,
+  arg_material_two:bpy.types.Material) -> bool:
+    """指定マテリアルのBSDFノードを比較する
+    受け渡したマテリアルの出力ノードに接続されたプリシプルBSDFノードを比較する
+    比較対象の入力端子のデフォルト値が有効、かつ、全て同一の場合、Trueを返す
+
+    Args:
+        arg_material_one (bpy.types.Material): 比較マテリアル１
+        arg_material_two (bpy.types.Material): 比較マテリアル２
+
+    Returns:
+        bool: 比較結果(一致：True)
+    """
+
+    # 各マテリアルのシグネチャを取得する
+    signature_one = get_material_signature(arg_material=arg_material_one)
+    signature_two = get_material_signature(arg_material=arg_material_two)
+
+    # シグネチャがマージ可能か確認する
+    if check_signature_mergeable(arg_signature=signature_one) == False:
+        # マージできない場合は不一致として False を返す
+        return False
+
+    # シグネチャが一致するか比較して結果を返す
+    profile_material_merge.add_profile_counter("comparisons")
+    comp_result = (signature_one == signature_two)
+
+    return comp_result
+
+# 指定マテリアルの比較用シグネチャを取得する
+def get_material_signature(arg_material:bpy.types.Material) -> tuple:
+    """指定マテリアルの比較用シグネチャを取得する
+    比較対象の入力端子のデフォルト値を並べたハッシュ可能なタプルを返す
+    リンクが接続された入力端子の要素は上流のノード構成の構造ハッシュ(文字列)となる
+    (比較できない入力端子、または、構造ハッシュを作成できない入力端子の要素は None となる)
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        tuple: シグネチャ(プリンシプルBSDFでない場合 None)
+    """
+
+    # マテリアルが設定されているか確認する
+    if arg_material == None:
+        # 空のスロットの場合はシグネチャを返さない
         return None
-    
-    # 接続元となっているサーフェスノードを返却する
-    return_node = surface_node
 
-    return return_node
+    # マテリアルの出力ノードにプリンシプルBSDFノードが接続されているかチェックする
+    if check_surface_bsdf.check_surface_bsdf(arg_material=arg_material) == False:
+        # プリシプルBSDFでなかった場合はシグネチャを返さない
+        return None
+
+    # プリンシプルBSDFノードを取得する
+    # (チェック時に解決したノードがキャッシュから返る)
+    get_node = check_surface_bsdf.get_node_linkoutput(arg_material=arg_material)
+
+    # シグネチャの要素リスト
+    signature_list = []
+
+    # ノードとノードグループの構造ハッシュの記録
+    node_memo = {}
+    group_memo = {}
+
+    # 比較対象とする入力端子の識別子を取得する
+    # (レイアウトを検出できない場合は取得したノードの入力端子から決定する)
+    inputname_list = get_shader_inputname_list(arg_shader_idname='ShaderNodeBsdfPrincipled')
+    if inputname_list == None:
+        inputname_list = [socket_identifier for socket_identifier, _, _, _
+            in extract_material_signature.get_signature_layout(arg_node=get_node)]
+
+    # 比較対象とする入力端子を全て取得する
+    for bsdfnode_inputname in inputname_list:
+        # リンクが接続された入力端子は上流のノード構成の構造ハッシュを追加する
+        link_nodesocket = extract_material_signature.get_nodesocket_input(arg_node_inputs=get_node.inputs,
+            arg_inputname=bsdfnode_inputname)
+        if link_nodesocket != None and link_nodesocket.is_linked == True:
+            signature_list.append(hash_node_subgraph.get_input_subgraph_hash(arg_nodesocket=link_nodesocket,
+                arg_node_memo=node_memo, arg_group_memo=group_memo))
+            continue
+
+        # デフォルト値が有効なソケットの情報を取得する
+        nodesocket = get_nodesocket_enabledefault(arg_node=get_node, arg_inputname=bsdfnode_inputname)
+
+        # ソケットの値を比較用の値に変換して追加する
+        signature_list.append(get_nodesocket_value(arg_nodesocket=nodesocket))
+
+    return tuple(signature_list)
 
-# 対象マテリアルのノードを有効化する
-def use_material_node(arg_material:bpy.types.Material):
-    """対象マテリアルのノードを有効化する
+# シグネチャがマージ可能か確認する
+def check_signature_mergeable(arg_signature:tuple) -> bool:
+    """シグネチャがマージ可能か確認する
+    全ての要素でデフォルト値または構造ハッシュが有効な場合のみマージ可能と判断する
 
     Args:
-        arg_material (bpy.types.Material): 対象マテリアル
+        arg_signature (tuple): シグネチャ
+
+    Returns:
+        bool: マージ可能か否か
     """
 
-    # マテリアル操作のマニュアル
-    # (https://docs.blender.org/api/current/bpy.types.Material.html)
+    # シグネチャが取得できているか確認する
+    if arg_signature == None:
+        # シグネチャが存在しない場合はマージしない
+        return False
 
-    # ノードが無効な場合、有効化する
-    if arg_material.use_nodes == False:
-        arg_material.use_nodes = True
+    # デフォルト値が無効な要素が含まれているか確認する
+    if None in arg_signature:
+        # 比較できない入力端子が含まれる場合はマージしない
+        return False
 
-    return
+    return True
 
-# 指定ノードがプリンシプルBSDFかチェックする
-def check_isnode_bsdf(arg_node:bpy.types.Node) -> bool:
-    """指定ノードがプリンシプルBSDFかチェックする
+# ソケットのデフォルト値を比較用の値に変換する
+def get_nodesocket_value(arg_nodesocket:bpy.types.NodeSocketStandard):
+    """ソケットのデフォルト値を比較用の値に変換する
 
     Args:
-        arg_node (bpy.types.Node): 指定ノード
+        arg_nodesocket (bpy.types.NodeSocketStandard): ノードソケット
 
     Returns:
-        bool: プリンシプルBSDFか否か
+        float or tuple: 比較用の値(比較できないソケットの場合 None)
     """
 
-    # チェック結果
-    isBSDF = False
+    # ソケットが取得できているか確認する
+    if arg_nodesocket == None:
+        # ソケットが存在しない場合は値を返さない
+        return None
+
+    # NodeSocketFloat、NodeSocketFloatFactorのソケットの値
+    if isinstance(arg_nodesocket, (bpy.types.NodeSocketFloat, bpy.types.NodeSocketFloatFactor)):
+        return arg_nodesocket.default_value
 
-    # ノードタイプを取得する
-    node_idname = arg_node.bl_idname
+    # NodeSocketVectorのソケットの値
+    if isinstance(arg_nodesocket, bpy.types.NodeSocketVector):
+        return tuple(arg_nodesocket.default_value[0:3])
 
-    # ノードタイプがプリンシプルBSDFノードか確認する
-    if node_idname == 'ShaderNodeBsdfPrincipled':
-        # プリンシプルBSDFならTrueを返す
-        isBSDF = True
+    # NodeSocketColorのソケットの値
+    if isinstance(arg_nodesocket, bpy.types.NodeSocketColor):
+        return tuple(arg_nodesocket.default_value[0:4])
 
-    return isBSDF
+    # 合致するタイプがない場合はBSDFでないと判断して値を返さない
+    return None
 
 # 指定ノードの指定入力端子名のソケットをデフォルト値が有効な場合に取得する
 def get_nodesocket_enabledefault(arg_node:bpy.types.Node, arg_inputname:str) -> bpy.types.NodeSocketStandard:
@@ -353,9 +687,10 @@ def get_nodesocket_enabledefault(arg_node:bpy.types.Node, arg_inputname:str) ->
         bpy.types.NodeSocketStandard: ノードソケット(取得失敗時 None)
     """
 
-    # 指定名の入力端子のソケットを取得する
-    # (get関数は対象が存在しない場合 None が返る)
-    get_NodeSocketStandard = arg_node.inputs.get(arg_inputname)
+    # 指定した識別子、または、名前の入力端子のソケットを取得する
+    # (対象が存在しない場合 None が返る)
+    get_NodeSocketStandard = extract_material_signature.get_nodesocket_input(arg_node_inputs=arg_node.inputs,
+        arg_inputname=arg_inputname)
 
     # 指定名の入力端子が存在するか確認する
     if get_NodeSocketStandard == None:
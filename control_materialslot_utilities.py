@@ -1,5 +1,11 @@
 # bpyインポート
+if "bpy" in locals():
+    import importlib
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
 import bpy
+import numpy as np
+from . import profile_material_merge
 
 # オブジェクトモードへの移行
 # モード切替のマニュアル
@@ -28,7 +34,18 @@ def set_mode_object() -> bool:
     #   PAINT_GPENCIL：グリースペンシルペイントモード
     #   WEIGHT_GPENCIL：グリースペンシルウェイトモード
     # toggle:Trueの場合、既に編集モードの時、オブジェクトモードに戻る
+
+    # アクティブオブジェクトを取得する
+    active_object = bpy.context.object
+
+    # アクティブオブジェクトが存在しない、または、既にオブジェクトモードの場合
+    # (バックグラウンド実行でファイルを開いた直後など)
+    if active_object == None or active_object.mode == 'OBJECT':
+        # モード切替は不要のため処理しない
+        return True
+
     bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
+    profile_material_merge.add_profile_counter("operator_calls")
 
     return True
 
@@ -62,11 +79,12 @@ def sort_materialslot_name(arg_object:bpy.types.Object) -> bool:
             check_mat = arg_object.material_slots[num].material
             comp_mat = arg_object.material_slots[num+1].material
 
-            # マテリアル名を比較する
-            if check_mat.name > comp_mat.name:
+            # マテリアル名を比較する(空のスロットは末尾に並べる)
+            if get_slot_sort_key(arg_material=check_mat) > get_slot_sort_key(arg_material=comp_mat):
                 # 位置を入れ替える
                 arg_object.active_material_index = num
                 bpy.ops.object.material_slot_move(direction='DOWN')
+                profile_material_merge.add_profile_counter("operator_calls")
 
                 # 比較を継続する
                 change_flg = True
@@ -96,10 +114,354 @@ def delate_materialslot_duplicate(arg_object:bpy.types.Object) -> bool:
         check_mat = arg_object.material_slots[num].material
         comp_mat = arg_object.material_slots[num+1].material
 
-        # マテリアル名を比較する
-        if check_mat.name == comp_mat.name:
+        # マテリアル名を比較する(空のスロット同士も重複として扱う)
+        if get_slot_sort_key(arg_material=check_mat) == get_slot_sort_key(arg_material=comp_mat):
             # マテリアル名が同じならば削除する
             arg_object.active_material_index = num + 1
             bpy.ops.object.material_slot_remove()
+            profile_material_merge.add_profile_counter("operator_calls")
+            profile_material_merge.add_profile_counter("slots_removed")
+
+    return True
+
+# マテリアルスロットのソートと重複削除をデータの一括操作で実行する
+def compact_materialslot_bulk(arg_object:bpy.types.Object) -> bool:
+    """マテリアルスロットのソートと重複削除をデータの一括操作で実行する
+    sort_materialslot_name と delate_materialslot_duplicate の実行結果と同じ並びのスロット構成を
+    オペレーターを使わずに作成する
+    最終的なスロット順を1回で求め、ポリゴンのマテリアル番号を対応表で一括して書き換える
+    ポリゴンが割り当てられていないスロットと空のスロットも同じ対応表で削除する
+    オブジェクトにリンクされたスロットもオペレーターを使わずに処理する
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+
+    Returns:
+        bool: 実行正否
+    """
+
+    # オブジェクトがメッシュであるか確認する
+    if arg_object.type != 'MESH':
+        # 指定オブジェクトがメッシュでない場合は処理しない
+        return None
+
+    # 現在のスロットのマテリアルを取得する
+    # (オブジェクトにリンクされたスロットはオブジェクト側のマテリアルで判定し、リンク先は適用時に引き継ぐ)
+    slot_materials = [check_material_slot.material for check_material_slot in arg_object.material_slots]
+
+    # スロットが存在するか確認する
+    if len(slot_materials) == 0:
+        # スロットが存在しない場合は処理しない
+        return True
+
+    # マテリアル名から最終的なスロット構成を求める
+    # (リンクしたマテリアルはローカルのマテリアルと同名になり得るため、ライブラリ名を含む名前で区別する)
+    slot_names = [slot_mat.name_full if slot_mat != None else None for slot_mat in slot_materials]
+    final_names, remap_list = get_compact_slot_layout(arg_slot_names=slot_names,
+        arg_slot_polygons=get_slot_polygon_counts(arg_mesh=arg_object.data, arg_slot_count=len(slot_materials)).tolist())
+
+    # マテリアル名からマテリアルを求める辞書を作成する
+    material_dict = dict(zip(slot_names, slot_materials))
+
+    # スロット構成を一括で適用する
+    return apply_materialslot_layout(arg_object=arg_object,
+        arg_final_materials=[material_dict[final_name] for final_name in final_names],
+        arg_remap_list=remap_list)
+
+# スロットのマテリアル名のリストからソートと重複削除後のスロット構成を求める
+def get_compact_slot_layout(arg_slot_names:list, arg_slot_polygons:list=None) -> tuple:
+    """スロットのマテリアル名のリストからソートと重複削除後のスロット構成を求める
+    bpy のデータを参照しないため、実行前の計画の作成にも利用する
+    スロット毎のポリゴン数を指定した場合、ポリゴンが割り当てられていないスロットも削除する
+    (メッシュにポリゴンがない場合は空のスロットのみ削除する)
+    ポリゴンが割り当てられた空のスロットは1つにまとめて末尾に置く
+
+    Args:
+        arg_slot_names (list): 現在のスロット順のマテリアル名のリスト(空のスロットは None)
+        arg_slot_polygons (list, optional): 現在のスロット順のポリゴン数のリスト
+            (None の場合はポリゴン数による削除を行わず、空のスロットも残す)
+
+    Returns:
+        tuple: (最終的なスロット順のマテリアル名のリスト, 旧スロット番号毎の新しいスロット番号のリスト) の組
+            (削除したスロットは参照するポリゴンがないため、新しいスロット番号を 0 とする)
+    """
+
+    # 残すスロットのマテリアル名を取得する
+    if arg_slot_polygons == None:
+        used_names = list(arg_slot_names)
+    elif sum(arg_slot_polygons) == 0:
+        used_names = [slot_name for slot_name in arg_slot_names if slot_name != None]
+    else:
+        used_names = [slot_name for slot_name, polygon_count in zip(arg_slot_names, arg_slot_polygons)
+            if polygon_count > 0]
+
+    # マテリアル名で重複を除いて名前順に並べ、空のスロットは末尾に置く
+    final_names = sorted(set(used_names) - {None})
+    if None in used_names:
+        final_names.append(None)
+
+    # マテリアル名から新しいスロット番号を求める対応表を作成する
+    new_index_dict = {final_name: num for num, final_name in enumerate(final_names)}
+
+    # 旧スロット番号から新しいスロット番号への対応を作成する
+    remap_list = [new_index_dict.get(slot_name, 0) for slot_name in arg_slot_names]
+
+    return (final_names, remap_list)
+
+# 指定オブジェクトにスロット構成を一括で適用する
+def apply_materialslot_layout(arg_object:bpy.types.Object, arg_final_materials:list, arg_remap_list:list) -> bool:
+    """指定オブジェクトにスロット構成を一括で適用する
+    ポリゴンのマテリアル番号を変換テーブルで一括して書き換え、メッシュのマテリアル一覧を再構築する
+    オブジェクトにリンクされたスロットは、メッシュを使用する全オブジェクトでリンク先とマテリアルを引き継ぐ
+    (オペレーターを使用せず、データの書き換えのみで実行する)
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+        arg_final_materials (list): 最終的なスロット順のマテリアルのリスト(指定オブジェクトから見たマテリアル)
+        arg_remap_list (list): 旧スロット番号毎の新しいスロット番号のリスト
+
+    Returns:
+        bool: 実行正否
+    """
+
+    # メッシュデータを取得する
+    target_mesh = arg_object.data
+
+    # 旧スロット番号から新しいスロット番号への変換テーブルを作成する
+    remap_table = np.array(arg_remap_list, dtype=np.int32)
+
+    # ポリゴンのマテリアル番号を一括で取得する
+    material_indices = get_polygon_material_indices(arg_mesh=target_mesh)
+
+    # スロット数を超える番号は最後のスロットとして扱う
+    np.clip(material_indices, 0, len(remap_table) - 1, out=material_indices)
+
+    # オブジェクトにリンクされたスロットの状態を取得する
+    # (メッシュのマテリアル一覧の再構築でオブジェクト側のスロットの状態も初期化されるため、再構築前に取得する)
+    object_slot_links = get_object_slot_links(arg_mesh=target_mesh, arg_object=arg_object)
+
+    # メッシュのマテリアル一覧に設定するマテリアル
+    mesh_materials = list(arg_final_materials)
+
+    # 新しいスロット毎に状態を引き継ぐ旧スロット番号を求める
+    if len(object_slot_links) > 0:
+        source_slots = get_layout_source_slots(arg_remap_list=arg_remap_list,
+            arg_slot_polygons=np.bincount(material_indices, minlength=len(remap_table)).tolist(),
+            arg_slot_count=len(arg_final_materials))
+
+        # 指定オブジェクトでオブジェクトにリンクされたスロットは、メッシュ側の元のマテリアルを残す
+        old_mesh_materials = list(target_mesh.materials)
+        for user_object, slot_links in object_slot_links:
+            if user_object != arg_object:
+                continue
+            for new_index, old_index in enumerate(source_slots):
+                if slot_links[old_index][0] == 'OBJECT':
+                    mesh_materials[new_index] = old_mesh_materials[old_index]
+
+    # 変換テーブルでマテリアル番号を一括で書き換える
+    material_indices = remap_table[material_indices]
+
+    # メッシュのマテリアル一覧を再構築する
+    # (マテリアル一覧の削除時にポリゴンのマテリアル番号が初期化されるため、番号は再構築後に設定する)
+    target_mesh.materials.clear()
+    for mesh_mat in mesh_materials:
+        target_mesh.materials.append(mesh_mat)
+
+    # ポリゴンのマテリアル番号を一括で設定する
+    target_mesh.polygons.foreach_set("material_index", material_indices)
+
+    # オブジェクトにリンクされたスロットを復元する
+    for user_object, slot_links in object_slot_links:
+        for new_index, old_index in enumerate(source_slots):
+            slot_link, slot_mat = slot_links[old_index]
+            if slot_link != 'OBJECT':
+                continue
+            restore_material_slot = user_object.material_slots[new_index]
+            restore_material_slot.link = 'OBJECT'
+            # 指定オブジェクトは最終的なマテリアル、他のオブジェクトは元のマテリアルを設定する
+            restore_material_slot.material = arg_final_materials[new_index] if user_object == arg_object else slot_mat
+
+    # 削除したスロット数を記録する
+    profile_material_merge.add_profile_counter("slots_removed", len(arg_remap_list) - len(arg_final_materials))
+
+    # メッシュの更新を通知する
+    target_mesh.update()
+
+    # アクティブなスロット番号をスロット数の範囲内に収める
+    arg_object.active_material_index = max(0, min(arg_object.active_material_index, len(arg_final_materials) - 1))
+
+    return True
+
+# メッシュを使用するオブジェクトのうち、オブジェクトにリンクされたスロットを持つもののスロットの状態を取得する
+def get_object_slot_links(arg_mesh:bpy.types.Mesh, arg_object:bpy.types.Object) -> list:
+    """メッシュを使用するオブジェクトのうち、オブジェクトにリンクされたスロットを持つもののスロットの状態を取得する
+    メッシュの利用者が1つの場合はシーンのオブジェクトを走査しない
+
+    Args:
+        arg_mesh (bpy.types.Mesh): 指定メッシュ
+        arg_object (bpy.types.Object): メッシュを使用する指定オブジェクト
+
+    Returns:
+        list: (オブジェクト, スロット毎の (リンク先, マテリアル) のリスト) のリスト
+            (オブジェクトにリンクされたスロットがないオブジェクトは含めない)
+    """
+
+    # メッシュを使用するオブジェクトを取得する
+    if arg_mesh.users > 1:
+        user_objects = [check_object for check_object in bpy.data.objects
+            if check_object.type == 'MESH' and check_object.data == arg_mesh]
+    else:
+        user_objects = [arg_object]
+
+    # オブジェクト毎のスロットの状態を取得する
+    object_slot_links = []
+    for user_object in user_objects:
+        slot_links = [(check_material_slot.link, check_material_slot.material)
+            for check_material_slot in user_object.material_slots]
+        if any(slot_link == 'OBJECT' for slot_link, slot_mat in slot_links):
+            object_slot_links.append((user_object, slot_links))
+
+    return object_slot_links
+
+# 新しいスロット毎に状態を引き継ぐ旧スロット番号を求める
+def get_layout_source_slots(arg_remap_list:list, arg_slot_polygons:list, arg_slot_count:int) -> list:
+    """新しいスロット毎に状態を引き継ぐ旧スロット番号を求める
+    ポリゴンが割り当てられた旧スロットを優先し、同じ新しいスロットに統合される旧スロットは先頭のものを使用する
+    (削除したスロットは新しいスロット番号が 0 となるため、ポリゴンの有無で区別する)
+
+    Args:
+        arg_remap_list (list): 旧スロット番号毎の新しいスロット番号のリスト
+        arg_slot_polygons (list): 旧スロット番号毎のポリゴン数のリスト
+        arg_slot_count (int): 新しいスロット数
+
+    Returns:
+        list: 新しいスロット番号毎の旧スロット番号のリスト
+    """
+
+    source_slots = [None] * arg_slot_count
+
+    # ポリゴンが割り当てられた旧スロット、割り当てられていない旧スロットの順に対応付ける
+    for use_polygons in (True, False):
+        for old_index, (new_index, polygon_count) in enumerate(zip(arg_remap_list, arg_slot_polygons)):
+            if (polygon_count > 0) == use_polygons and source_slots[new_index] == None:
+                source_slots[new_index] = old_index
+
+    return source_slots
+
+# 指定オブジェクトのスロット構成を復元用に記録する
+def get_materialslot_snapshot(arg_object:bpy.types.Object) -> dict:
+    """指定オブジェクトのスロット構成を復元用に記録する
+    メッシュのマテリアル一覧、ポリゴンのマテリアル番号、メッシュを使用するオブジェクトのオブジェクトにリンクされたスロットを記録する
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+
+    Returns:
+        dict: 記録したスロット構成(restore_materialslot_snapshot に渡す)
+    """
+
+    # メッシュデータを取得する
+    target_mesh = arg_object.data
+
+    return {
+        "object": arg_object,
+        "mesh": target_mesh,
+        "materials": list(target_mesh.materials),
+        "material_indices": get_polygon_material_indices(arg_mesh=target_mesh),
+        "object_slot_links": get_object_slot_links(arg_mesh=target_mesh, arg_object=arg_object),
+        "active_material_index": arg_object.active_material_index,
+    }
+
+# 記録したスロット構成を復元する
+def restore_materialslot_snapshot(arg_snapshot:dict):
+    """記録したスロット構成を復元する
+    apply_materialslot_layout と同じくデータの書き換えのみで復元する
+
+    Args:
+        arg_snapshot (dict): get_materialslot_snapshot の戻り値
+    """
+
+    # メッシュデータを取得する
+    target_mesh = arg_snapshot["mesh"]
+
+    # メッシュのマテリアル一覧を再構築する
+    target_mesh.materials.clear()
+    for mesh_mat in arg_snapshot["materials"]:
+        target_mesh.materials.append(mesh_mat)
+
+    # ポリゴンのマテリアル番号を一括で設定する
+    target_mesh.polygons.foreach_set("material_index", arg_snapshot["material_indices"])
+
+    # オブジェクトにリンクされたスロットを復元する
+    for user_object, slot_links in arg_snapshot["object_slot_links"]:
+        for slot_index, (slot_link, slot_mat) in enumerate(slot_links):
+            if slot_link != 'OBJECT':
+                continue
+            restore_material_slot = user_object.material_slots[slot_index]
+            restore_material_slot.link = 'OBJECT'
+            restore_material_slot.material = slot_mat
+
+    # メッシュの更新を通知する
+    target_mesh.update()
+
+    # アクティブなスロット番号を復元する
+    arg_snapshot["object"].active_material_index = arg_snapshot["active_material_index"]
+
+    return
+
+# メッシュのスロット毎のポリゴン数を一括で取得する
+def get_slot_polygon_counts(arg_mesh:bpy.types.Mesh, arg_slot_count:int) -> np.ndarray:
+    """メッシュのスロット毎のポリゴン数を一括で取得する
+    スロット数を超えるマテリアル番号は Blender の描画と同じく最後のスロットとして数える
+
+    Args:
+        arg_mesh (bpy.types.Mesh): 指定メッシュ
+        arg_slot_count (int): スロット数(1以上)
+
+    Returns:
+        np.ndarray: スロット番号毎のポリゴン数の配列(スロット数の長さ)
+    """
+
+    # ポリゴンのマテリアル番号を一括で取得する
+    material_indices = get_polygon_material_indices(arg_mesh=arg_mesh)
+
+    # スロット数を超える番号は最後のスロットとして扱う
+    np.clip(material_indices, 0, arg_slot_count - 1, out=material_indices)
+
+    # スロット番号毎に数える
+    return np.bincount(material_indices, minlength=arg_slot_count)
+
+# スロットの並び替えに使用するマテリアルの比較キーを取得する
+def get_slot_sort_key(arg_material:bpy.types.Material) -> tuple:
+    """スロットの並び替えに使用するマテリアルの比較キーを取得する
+
+    Args:
+        arg_material (bpy.types.Material): スロットのマテリアル(空のスロットは None)
+
+    Returns:
+        tuple: 比較キー(空のスロットは全てのマテリアルより後ろに並ぶ)
+    """
+
+    if arg_material == None:
+        return (1, "")
+
+    return (0, arg_material.name)
+
+# メッシュのポリゴンのマテリアル番号を一括で取得する
+def get_polygon_material_indices(arg_mesh:bpy.types.Mesh) -> np.ndarray:
+    """メッシュのポリゴンのマテリアル番号を一括で取得する
+
+    Args:
+        arg_mesh (bpy.types.Mesh): 指定メッシュ
+
+    Returns:
+        np.ndarray: ポリゴン毎のマテリアル番号の配列
+    """
+
+    # ポリゴン数分の配列を確保する
+    material_indices = np.empty(len(arg_mesh.polygons), dtype=np.int32)
+
+    # マテリアル番号を一括で取得する
+    arg_mesh.polygons.foreach_get("material_index", material_indices)
 
-    return True
\ No newline at end of file
+    return material_indices
\ No newline at end of file
@@ -0,0 +1,275 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "check_surface_bsdf" in locals():
+        importlib.reload(check_surface_bsdf)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+import bpy
+import hashlib
+import os
+import numpy as np
+from . import check_surface_bsdf
+from . import profile_material_merge
+
+# 内容のハッシュを計算する際に一度に読み込むバイト数
+def_image_hash_chunk_size = 1 << 20
+
+# 外部ファイルの内容のハッシュを保存する画像のカスタムプロパティ名
+def_image_hash_property_name = "holomon_bsdf_merge_image_hash"
+
+# 保存するハッシュの形式のバージョン
+# (形式を変更した場合は値を更新し、古いハッシュを無効にする)
+def_image_hash_version = 1
+
+# 指定マテリアルが参照する画像を内容が同じ画像にまとめる
+def deduplicate_material_images(arg_materials:list) -> dict:
+    """指定マテリアルが参照する画像を内容が同じ画像にまとめる
+    画像テクスチャノードが参照する画像の内容のハッシュを求め、内容が同じ画像の参照を代表画像に差し替える
+    代表画像はライブラリの画像以外を優先し、名前順で最初の画像とする(image.001 より image を優先する)
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        dict: 差し替えた画像名をキーとした代表画像名
+    """
+
+    # 画像テクスチャノードを取得する
+    image_nodes = get_material_image_nodes(arg_materials=arg_materials)
+
+    # 参照されている画像を重複なく取得する
+    target_images = []
+    found_pointers = set()
+    for image_node in image_nodes:
+        if image_node.image != None and image_node.image.as_pointer() not in found_pointers:
+            found_pointers.add(image_node.image.as_pointer())
+            target_images.append(image_node.image)
+
+    # 内容が同じ画像毎に分類する
+    content_dict = {}
+    for target_image in target_images:
+        # 内容の識別用の構造を取得する
+        content_key = get_image_content_key(arg_image=target_image)
+
+        # 内容を取得できない画像はまとめない
+        if content_key == None:
+            continue
+
+        content_dict.setdefault(content_key, []).append(target_image)
+
+    # 画像のポインタ値をキーとして代表画像を保持する
+    canonical_dict = {}
+    for same_images in content_dict.values():
+        # 代表画像を決定する
+        canonical_image = min(same_images, key=lambda check_image: (check_image.library != None, check_image.name))
+        for same_image in same_images:
+            if same_image != canonical_image:
+                canonical_dict[same_image.as_pointer()] = canonical_image
+
+    # 画像テクスチャノードの参照を代表画像に差し替える
+    remap_names = {}
+    for image_node in image_nodes:
+        if image_node.image == None:
+            continue
+        canonical_image = canonical_dict.get(image_node.image.as_pointer())
+        if canonical_image != None:
+            remap_names[image_node.image.name] = canonical_image.name
+            image_node.image = canonical_image
+
+    # 差し替えた画像数を記録する
+    profile_material_merge.add_profile_counter("images_remapped", len(remap_names))
+
+    # 画像を差し替えた場合はノードツリーが変更されたためキャッシュを無効化する
+    # (ノードグループは複数のマテリアルで共有されるため、指定マテリアル全てを対象とする)
+    if len(remap_names) > 0:
+        for check_mat in arg_materials:
+            if check_mat != None:
+                check_surface_bsdf.invalidate_resolve_cache(arg_material=check_mat)
+
+    return remap_names
+
+# 指定マテリアルの画像テクスチャノードを取得する
+def get_material_image_nodes(arg_materials:list) -> list:
+    """指定マテリアルの画像テクスチャノードを取得する
+    マテリアルから参照されるノードグループ内のノードも含める(ノードグループは1回のみ走査する)
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        list: 画像テクスチャノードのリスト
+    """
+
+    # 画像テクスチャノードのリスト
+    image_nodes = []
+
+    # 走査するノードツリーのリストと走査済みのノードツリーのポインタ値
+    search_trees = [check_mat.node_tree for check_mat in arg_materials
+        if check_mat != None and check_mat.node_tree != None]
+    found_pointers = set()
+
+    # ノードツリーを順に走査する
+    while len(search_trees) > 0:
+        search_tree = search_trees.pop()
+
+        # 走査済みのノードツリーは処理しない
+        if search_tree.as_pointer() in found_pointers:
+            continue
+        found_pointers.add(search_tree.as_pointer())
+
+        for check_node in search_tree.nodes:
+            # 画像テクスチャノードを追加する
+            if check_node.bl_idname == 'ShaderNodeTexImage':
+                image_nodes.append(check_node)
+            # ノードグループは内部のノードを走査する
+            elif check_node.bl_idname == 'ShaderNodeGroup' and check_node.node_tree != None:
+                search_trees.append(check_node.node_tree)
+
+    return image_nodes
+
+# 画像の内容の識別用の構造を取得する
+def get_image_content_key(arg_image:bpy.types.Image) -> tuple:
+    """画像の内容の識別用の構造を取得する
+    内容のハッシュに加えて、色空間と透過の扱いが一致する画像のみを同じ内容とする
+
+    Args:
+        arg_image (bpy.types.Image): 画像
+
+    Returns:
+        tuple: 識別用の構造(内容を取得できない場合 None)
+    """
+
+    # 内容のハッシュを取得する
+    content_digest = get_image_content_digest(arg_image=arg_image)
+    if content_digest == None:
+        return None
+
+    return (content_digest, arg_image.colorspace_settings.name, arg_image.alpha_mode)
+
+# 画像の内容のハッシュを取得する
+def get_image_content_digest(arg_image:bpy.types.Image) -> str:
+    """画像の内容のハッシュを取得する
+    パックされた画像はパックされたファイル、外部ファイルの画像はファイルの内容、
+    その他の画像は画素の値からハッシュを求める(パックされたファイルと外部ファイルは同じ内容なら一致する)
+
+    Args:
+        arg_image (bpy.types.Image): 画像
+
+    Returns:
+        str: 内容のハッシュ(内容を取得できない場合 None)
+    """
+
+    # パックされた画像か確認する
+    if arg_image.packed_file != None:
+        return "FILE:" + get_buffer_digest(arg_buffer=arg_image.packed_file.data)
+
+    # 外部ファイルの画像か確認する
+    if arg_image.source in ('FILE', 'SEQUENCE', 'MOVIE', 'TILED') and arg_image.filepath != "":
+        image_filepath = bpy.path.abspath(arg_image.filepath, library=arg_image.library)
+        file_digest = get_cached_file_digest(arg_image=arg_image, arg_filepath=image_filepath)
+        return "FILE:" + file_digest if file_digest != None else None
+
+    # 画素の値を持たない画像はまとめない
+    if arg_image.has_data == False:
+        return None
+
+    # 画素の値を一括で取得する
+    pixel_array = np.empty(len(arg_image.pixels), dtype=np.float32)
+    arg_image.pixels.foreach_get(pixel_array)
+
+    # 画像の大きさと画素の値からハッシュを求める
+    return "PIXELS:%dx%dx%d:" % (arg_image.size[0], arg_image.size[1], arg_image.channels) + \
+        get_buffer_digest(arg_buffer=pixel_array)
+
+# 外部ファイルの内容のハッシュを保存済みのハッシュを利用して取得する
+def get_cached_file_digest(arg_image:bpy.types.Image, arg_filepath:str) -> str:
+    """外部ファイルの内容のハッシュを保存済みのハッシュを利用して取得する
+    ファイルパス、更新日時、サイズが保存時と一致する場合はファイルを読み込まずに保存済みのハッシュを返す
+
+    Args:
+        arg_image (bpy.types.Image): 画像
+        arg_filepath (str): 外部ファイルの絶対パス
+
+    Returns:
+        str: 内容のハッシュ(ファイルを読み込めない場合 None)
+    """
+
+    # ファイルの更新日時とサイズを取得する
+    try:
+        file_stat = os.stat(arg_filepath)
+    except OSError:
+        return None
+
+    # 保存済みのハッシュが有効か確認する
+    cache_entry = arg_image.get(def_image_hash_property_name)
+    if cache_entry != None and cache_entry.get("version") == def_image_hash_version \
+      and cache_entry.get("filepath") == arg_filepath and cache_entry.get("mtime") == file_stat.st_mtime \
+      and cache_entry.get("size") == file_stat.st_size:
+        return cache_entry["digest"]
+
+    # ファイルの内容のハッシュを求める
+    file_digest = get_file_digest(arg_filepath=arg_filepath)
+    if file_digest == None:
+        return None
+
+    # ライブラリの画像は変更できないため、ローカルの画像のみハッシュを保存する
+    if arg_image.library == None:
+        arg_image[def_image_hash_property_name] = {
+            "version": def_image_hash_version,
+            "filepath": arg_filepath,
+            "mtime": file_stat.st_mtime,
+            "size": file_stat.st_size,
+            "digest": file_digest,
+        }
+
+    return file_digest
+
+# ファイルの内容のハッシュを求める
+def get_file_digest(arg_filepath:str) -> str:
+    """ファイルの内容のハッシュを求める
+    ファイル全体をメモリに読み込まず、一定サイズ毎に読み込んでハッシュを更新する
+
+    Args:
+        arg_filepath (str): ファイルパス
+
+    Returns:
+        str: 内容のハッシュ(ファイルを読み込めない場合 None)
+    """
+
+    # ハッシュを初期化する
+    content_hash = hashlib.blake2b(digest_size=20)
+
+    # 一定サイズ毎に読み込んでハッシュを更新する
+    try:
+        with open(arg_filepath, "rb") as image_file:
+            for file_chunk in iter(lambda: image_file.read(def_image_hash_chunk_size), b""):
+                content_hash.update(file_chunk)
+    except OSError:
+        return None
+
+    return content_hash.hexdigest()
+
+# メモリ上のデータのハッシュを求める
+def get_buffer_digest(arg_buffer) -> str:
+    """メモリ上のデータのハッシュを求める
+    データを複製せずに一定サイズ毎に区切ってハッシュを更新する
+
+    Args:
+        arg_buffer (bytes or np.ndarray): データ
+
+    Returns:
+        str: 内容のハッシュ
+    """
+
+    # データをバイト列として参照する
+    buffer_view = memoryview(arg_buffer).cast("B")
+
+    # ハッシュを初期化する
+    content_hash = hashlib.blake2b(digest_size=20)
+
+    # 一定サイズ毎に区切ってハッシュを更新する
+    for chunk_start in range(0, len(buffer_view), def_image_hash_chunk_size):
+        content_hash.update(buffer_view[chunk_start:chunk_start+def_image_hash_chunk_size])
+
+    return content_hash.hexdigest()
@@ -0,0 +1,533 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "check_surface_bsdf" in locals():
+        importlib.reload(check_surface_bsdf)
+    if "hash_node_subgraph" in locals():
+        importlib.reload(hash_node_subgraph)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+import bpy
+import numpy as np
+from . import check_surface_bsdf
+from . import hash_node_subgraph
+from . import profile_material_merge
+
+# 雛形のノードを作成する一時的なノードグループの名前
+def_shader_template_tree_name = "holomon_bsdf_merge_template"
+
+# 雛形のノードから検出したシグネチャのレイアウトのキャッシュ
+# キーは (ノードタイプ, 比較対象の入力端子のタプル(全ての入力端子の場合 None))、値はレイアウト
+# (入力端子の構成は Blender のバージョンで異なるため、実行中の Blender で1回のみ検出して再利用する)
+shader_layout_cache = {}
+
+# 指定マテリアルのリストから比較用シグネチャの行列を一括で取得する
+def extract_signature_matrix(arg_materials:list, arg_inputname_list:list,
+  arg_shader_idname:str='ShaderNodeBsdfPrincipled', arg_use_node:bool=True) -> tuple:
+    """指定マテリアルのリストから比較用シグネチャの行列を一括で取得する
+    出力ノードに指定ノードタイプのシェーダーが接続されたマテリアルのみをマージ可能とする
+    全マテリアルの比較対象の入力端子のデフォルト値を1つの連続した配列に格納する
+    ベクトルやカラーの値は foreach_get で行列の行に直接読み込む
+    リンクが接続された入力端子は上流のノード構成の構造ハッシュを求め、
+    同じ構造ハッシュの組み合わせを持つ行に同じリンク構成の番号を割り当てる
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+        arg_inputname_list (list): 比較対象とする入力端子の名前、または、識別子のリスト
+            (None の場合は比較できる全ての入力端子)
+        arg_shader_idname (str, optional): 比較するシェーダーノードのノードタイプ
+        arg_use_node (bool, optional): ノードが無効なマテリアルのノードを有効化するか
+
+    Returns:
+        tuple: (値の行列, リンク接続の行列, マージ可能な行, シグネチャのレイアウト, リンク構成の番号) の組
+            値の行列 (np.ndarray): マテリアル数 x 成分数 の float32 配列(リンクが接続された入力端子は 0)
+            リンク接続の行列 (np.ndarray): マテリアル数 x レイアウトの入力端子数 の bool 配列
+            マージ可能な行 (np.ndarray): マテリアル毎のマージ可否の bool 配列
+            シグネチャのレイアウト (list): get_signature_layout の戻り値
+            リンク構成の番号 (np.ndarray): マテリアル毎の int64 配列(リンクが接続されていない行は 0)
+    """
+
+    # マテリアル数を取得する
+    material_count = len(arg_materials)
+
+    # 各マテリアルのシェーダーノード(指定ノードタイプでない場合 None)
+    bsdf_nodes = [get_material_shadernode(arg_material=check_mat, arg_shader_idname=arg_shader_idname,
+        arg_use_node=arg_use_node) for check_mat in arg_materials]
+
+    # 雛形のノードから検出したシグネチャのレイアウトを取得する
+    signature_layout = get_shader_signature_layout(arg_shader_idname=arg_shader_idname,
+        arg_inputname_list=arg_inputname_list)
+
+    # 未検出、または、検出できない場合はシェーダーを比較せず、全てのマテリアルをマージの対象外とする
+    if signature_layout == None:
+        signature_layout = []
+        bsdf_nodes = [None] * material_count
+
+    # 行列の成分数を求める
+    column_count = sum(layout_width for _, _, _, layout_width in signature_layout)
+
+    # 値の行列とリンク接続の行列を確保する
+    value_matrix = np.zeros((material_count, column_count), dtype=np.float32)
+    linked_matrix = np.zeros((material_count, len(signature_layout)), dtype=bool)
+
+    # シェーダーノードを持つ行をマージ可能として初期化する
+    mergeable_rows = np.array([bsdf_node != None for bsdf_node in bsdf_nodes], dtype=bool)
+
+    # マテリアル毎のリンクが接続された入力端子の (入力端子の番号, 構造ハッシュ) のリスト
+    link_hash_rows = [[] for _ in range(material_count)]
+
+    # ノードとノードグループの構造ハッシュの記録(共有するノードグループは1回のみ走査する)
+    node_memo = {}
+    group_memo = {}
+
+    # マテリアル毎に値を読み込む
+    for row_num, bsdf_node in enumerate(bsdf_nodes):
+        # 指定ノードタイプでない場合は読み込まない
+        if bsdf_node == None:
+            continue
+
+        # 入力端子のリストを取得する
+        node_inputs = bsdf_node.inputs
+
+        # 比較対象の入力端子を走査する
+        for inputname_num, (socket_identifier, socket_num, layout_column, layout_width) in enumerate(signature_layout):
+            # レイアウトの位置の入力端子を取得する
+            nodesocket = node_inputs[socket_num] if socket_num < len(node_inputs) else None
+
+            # 位置が異なる場合は識別子で入力端子を取得する
+            if nodesocket == None or nodesocket.identifier != socket_identifier:
+                nodesocket = get_nodesocket_input(arg_node_inputs=node_inputs, arg_inputname=socket_identifier)
+
+            # 入力端子が存在しない、または、型が異なる場合はマージしない
+            if nodesocket == None or get_nodesocket_width(arg_nodesocket=nodesocket) != layout_width:
+                mergeable_rows[row_num] = False
+                break
+
+            # リンクが接続されているか確認する
+            if nodesocket.is_linked == True:
+                # デフォルト値は無効なためリンク接続として記録する
+                linked_matrix[row_num, inputname_num] = True
+
+                # 上流のノード構成の構造ハッシュを記録する
+                link_hash_rows[row_num].append((inputname_num, hash_node_subgraph.get_input_subgraph_hash(
+                    arg_nodesocket=nodesocket, arg_node_memo=node_memo, arg_group_memo=group_memo)))
+                continue
+
+            # デフォルト値を持たない入力端子か確認する
+            if layout_width == 0:
+                # シェーダーの入力端子はリンクが無い場合に値を持たないため比較しない
+                if isinstance(nodesocket, bpy.types.NodeSocketShader):
+                    continue
+
+                # 比較できない型の入力端子が含まれる場合はマージしない
+                mergeable_rows[row_num] = False
+                break
+
+            # デフォルト値を行列に読み込む
+            if layout_width == 1:
+                value_matrix[row_num, layout_column] = nodesocket.default_value
+            else:
+                nodesocket.default_value.foreach_get(value_matrix[row_num, layout_column:layout_column+layout_width])
+
+    # 構造ハッシュの組み合わせ毎にリンク構成の番号を割り当てる(リンクが接続されていない行は 0)
+    link_group_rows = np.zeros(material_count, dtype=np.int64)
+    link_group_dict = {}
+    for row_num, link_hashes in enumerate(link_hash_rows):
+        if len(link_hashes) == 0:
+            continue
+
+        # 構造ハッシュを作成できなかった入力端子を含む行はマージしない
+        if any(link_hash == None for _, link_hash in link_hashes):
+            mergeable_rows[row_num] = False
+            continue
+
+        link_group_rows[row_num] = link_group_dict.setdefault(tuple(link_hashes), len(link_group_dict) + 1)
+
+    return (value_matrix, linked_matrix, mergeable_rows, signature_layout, link_group_rows)
+
+# 指定マテリアルの指定ノードタイプのシェーダーノードを取得する
+def get_material_shadernode(arg_material:bpy.types.Material, arg_shader_idname:str,
+  arg_use_node:bool=True) -> bpy.types.Node:
+    """指定マテリアルの指定ノードタイプのシェーダーノードを取得する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_shader_idname (str): シェーダーノードのノードタイプ
+        arg_use_node (bool, optional): ノードが無効な場合に有効化するか
+
+    Returns:
+        bpy.types.Node: シェーダーノード(出力ノードに指定ノードタイプのノードが接続されていない場合 None)
+    """
+
+    # マテリアルが設定されているか確認する
+    if arg_material == None:
+        return None
+
+    # マテリアルの出力ノードに接続されたノードを取得する
+    get_node = check_surface_bsdf.get_surface_node(arg_material=arg_material, arg_use_node=arg_use_node)
+
+    # ノードタイプが一致するか確認する
+    if get_node == None or get_node.bl_idname != arg_shader_idname:
+        return None
+
+    return get_node
+
+# 入力端子のリストから識別子、または、名前が一致する入力端子を取得する
+def get_nodesocket_input(arg_node_inputs:bpy.types.NodeInputs, arg_inputname:str) -> bpy.types.NodeSocket:
+    """入力端子のリストから識別子、または、名前が一致する入力端子を取得する
+    同名の入力端子が複数ある場合、名前では最初の入力端子を返すため、識別子を優先する
+
+    Args:
+        arg_node_inputs (bpy.types.NodeInputs): 入力端子のリスト
+        arg_inputname (str): 入力端子の識別子、または、名前
+
+    Returns:
+        bpy.types.NodeSocket: 入力端子(存在しない場合 None)
+    """
+
+    # 識別子が一致する入力端子を取得する
+    for check_nodesocket in arg_node_inputs:
+        if check_nodesocket.identifier == arg_inputname:
+            return check_nodesocket
+
+    # 名前が一致する入力端子を取得する
+    return arg_node_inputs.get(arg_inputname)
+
+# 雛形のノードから検出したシグネチャのレイアウトを取得する
+def get_shader_signature_layout(arg_shader_idname:str, arg_inputname_list:list=None) -> list:
+    """雛形のノードから検出したシグネチャのレイアウトを取得する
+    検出済みのキャッシュのみを参照し、データを変更しない
+    (検出はアドオンの登録後、または、データを変更する実行の開始時に discover_surface_shader_layouts で行う)
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ
+        arg_inputname_list (list, optional): 比較対象とする入力端子のリスト(None の場合は比較できる全ての入力端子)
+
+    Returns:
+        list: シグネチャのレイアウト(未検出、または、検出できない場合 None)
+    """
+
+    return shader_layout_cache.get(get_shader_layout_key(arg_shader_idname=arg_shader_idname,
+        arg_inputname_list=arg_inputname_list))
+
+# シグネチャのレイアウトのキャッシュのキーを取得する
+def get_shader_layout_key(arg_shader_idname:str, arg_inputname_list:list=None) -> tuple:
+    """シグネチャのレイアウトのキャッシュのキーを取得する
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ
+        arg_inputname_list (list, optional): 比較対象とする入力端子のリスト(None の場合は比較できる全ての入力端子)
+
+    Returns:
+        tuple: キャッシュのキー
+    """
+
+    return (arg_shader_idname, tuple(arg_inputname_list) if arg_inputname_list != None else None)
+
+# 雛形のノードからシェーダーノード毎のシグネチャのレイアウトを検出してキャッシュする
+def build_shader_layout_cache(arg_shader_keys:list) -> bool:
+    """雛形のノードからシェーダーノード毎のシグネチャのレイアウトを検出してキャッシュする
+    一時的なノードグループに雛形のノードを作成し、入力端子の識別子を位置と列に変換する
+    データを変更するため、データを変更しない処理(計画の作成、プレビュー、パネルの描画)からは呼び出さない
+    (検出済みのシェーダーノードのみの場合はノードグループを作成しない)
+
+    Args:
+        arg_shader_keys (list): (ノードタイプ, 比較対象とする入力端子のリスト) のリスト
+
+    Returns:
+        bool: 検出できたか否か(データを変更できない場合 False)
+    """
+
+    # 検出済みのシェーダーノードは検出しない
+    shader_keys = [(shader_idname, inputname_list) for shader_idname, inputname_list in arg_shader_keys
+        if get_shader_layout_key(arg_shader_idname=shader_idname, arg_inputname_list=inputname_list)
+        not in shader_layout_cache]
+    if len(shader_keys) == 0:
+        return True
+
+    # 一時的なノードグループを作成する
+    try:
+        template_tree = bpy.data.node_groups.new(def_shader_template_tree_name, 'ShaderNodeTree')
+    except AttributeError:
+        # アドオンの登録中など、データを変更できない場合は検出しない
+        return False
+
+    try:
+        for shader_idname, inputname_list in shader_keys:
+            # 雛形のノードを作成する
+            try:
+                template_node = template_tree.nodes.new(shader_idname)
+            except RuntimeError:
+                template_node = None
+
+            # レイアウトを検出してキャッシュする
+            # (実行中の Blender に存在しないノードタイプは None として再検出しない)
+            shader_layout_cache[get_shader_layout_key(arg_shader_idname=shader_idname, arg_inputname_list=inputname_list)] = \
+                get_signature_layout(arg_node=template_node, arg_inputname_list=inputname_list) \
+                if template_node != None else None
+    finally:
+        # 一時的なノードグループを削除する
+        bpy.data.node_groups.remove(template_tree)
+
+    return True
+
+# 指定ノードからシグネチャのレイアウトを取得する
+def get_signature_layout(arg_node:bpy.types.Node, arg_inputname_list:list=None) -> list:
+    """指定ノードからシグネチャのレイアウトを取得する
+    入力端子名を入力端子の識別子と位置、行列の列に変換し、マテリアル毎の名前による検索を省く
+    (指定ノードに存在しない入力端子はレイアウトに含めない)
+
+    Args:
+        arg_node (bpy.types.Node): 基準とするシェーダーノード
+        arg_inputname_list (list, optional): 比較対象とする入力端子の名前、または、識別子のリスト
+            (None の場合は値を比較できる入力端子とシェーダーの入力端子の全て)
+
+    Returns:
+        list: (入力端子の識別子, 入力端子の位置, 先頭の列, 成分数) のリスト
+            (比較できない型の場合は成分数 0)
+    """
+
+    # 比較対象の入力端子が指定されていない場合は比較できる全ての入力端子とする
+    inputname_list = arg_inputname_list
+    if inputname_list == None:
+        inputname_list = [nodesocket.identifier for nodesocket in arg_node.inputs
+            if get_nodesocket_width(arg_nodesocket=nodesocket) > 0 or isinstance(nodesocket, bpy.types.NodeSocketShader)]
+
+    # 入力端子の識別子と名前から位置を求める辞書を作成する(識別子を優先する)
+    socket_num_dict = {}
+    for socket_num, nodesocket in enumerate(arg_node.inputs):
+        socket_num_dict.setdefault(nodesocket.identifier, socket_num)
+    for socket_num, nodesocket in enumerate(arg_node.inputs):
+        socket_num_dict.setdefault(nodesocket.name, socket_num)
+
+    # レイアウトのリスト
+    signature_layout = []
+
+    # 先頭の列
+    layout_column = 0
+
+    # 比較対象の入力端子を走査する
+    for bsdfnode_inputname in inputname_list:
+        # 入力端子の位置を取得する
+        socket_num = socket_num_dict.get(bsdfnode_inputname, -1)
+
+        # 存在しない入力端子はレイアウトに含めない
+        if socket_num < 0:
+            continue
+
+        # 入力端子の成分数を取得する
+        nodesocket = arg_node.inputs[socket_num]
+        layout_width = get_nodesocket_width(arg_nodesocket=nodesocket)
+
+        # レイアウトを追加する
+        signature_layout.append((nodesocket.identifier, socket_num, layout_column, layout_width))
+        layout_column += layout_width
+
+    return signature_layout
+
+# ソケットのデフォルト値の成分数を取得する
+def get_nodesocket_width(arg_nodesocket:bpy.types.NodeSocketStandard) -> int:
+    """ソケットのデフォルト値の成分数を取得する
+
+    Args:
+        arg_nodesocket (bpy.types.NodeSocketStandard): ノードソケット
+
+    Returns:
+        int: 成分数(比較できないソケットの場合 0)
+    """
+
+    # NodeSocketFloat、NodeSocketFloatFactorのソケットの成分数
+    if isinstance(arg_nodesocket, (bpy.types.NodeSocketFloat, bpy.types.NodeSocketFloatFactor)):
+        return 1
+
+    # NodeSocketVectorのソケットの成分数
+    if isinstance(arg_nodesocket, bpy.types.NodeSocketVector):
+        return 3
+
+    # NodeSocketColorのソケットの成分数
+    if isinstance(arg_nodesocket, bpy.types.NodeSocketColor):
+        return 4
+
+    return 0
+
+# シグネチャの行列から完全一致する行をまとめる
+def group_signature_matrix(arg_value_matrix:np.ndarray, arg_mergeable_rows:np.ndarray,
+  arg_link_group_rows:np.ndarray=None) -> np.ndarray:
+    """シグネチャの行列から完全一致する行をまとめる
+
+    Args:
+        arg_value_matrix (np.ndarray): 値の行列
+        arg_mergeable_rows (np.ndarray): マージ可能な行
+        arg_link_group_rows (np.ndarray, optional): 行毎のリンク構成の番号(指定した場合は番号も一致する行のみまとめる)
+
+    Returns:
+        np.ndarray: 行毎の代表行の番号(同じ値で最初に出現した行、マージしない行は自身)
+    """
+
+    # 代表行の番号を自身で初期化する
+    canonical_rows = np.arange(len(arg_value_matrix))
+
+    # マージ可能な行の番号を取得する
+    mergeable_nums = np.flatnonzero(arg_mergeable_rows)
+
+    # マージ可能な行が存在するか確認する
+    if len(mergeable_nums) == 0:
+        return canonical_rows
+
+    # 一意な行を求める際の比較回数として、マージ可能な行数を記録する
+    profile_material_merge.add_profile_counter("comparisons", len(mergeable_nums))
+
+    # 比較する行列を取得する(リンク構成の番号は列として追加する)
+    compare_matrix = get_link_group_matrix(arg_value_matrix=arg_value_matrix, arg_link_group_rows=arg_link_group_rows)
+
+    # 符号付きゼロを統一して一意な行を求める
+    # (return_index は同じ値の行のうち最初に出現した行の位置を返す)
+    _, first_nums, inverse_nums = np.unique(compare_matrix[mergeable_nums] + compare_matrix.dtype.type(0.0),
+        axis=0, return_index=True, return_inverse=True)
+
+    # 同じ値で最初に出現した行を代表行とする
+    canonical_rows[mergeable_nums] = mergeable_nums[first_nums[inverse_nums.reshape(-1)]]
+
+    return canonical_rows
+
+# 値の行列にリンク構成の番号の列を追加する
+def get_link_group_matrix(arg_value_matrix:np.ndarray, arg_link_group_rows:np.ndarray) -> np.ndarray:
+    """値の行列にリンク構成の番号の列を追加する
+    番号を正確に保持するため、列を追加する場合は float64 の行列を返す
+
+    Args:
+        arg_value_matrix (np.ndarray): 値の行列
+        arg_link_group_rows (np.ndarray): 行毎のリンク構成の番号(None の場合は追加しない)
+
+    Returns:
+        np.ndarray: 比較する行列
+    """
+
+    # リンク構成の番号が指定されていない場合はそのまま返す
+    if arg_link_group_rows is None:
+        return arg_value_matrix
+
+    return np.column_stack((arg_value_matrix.astype(np.float64), arg_link_group_rows.astype(np.float64)))
+
+# 許容誤差から量子化の単位長さあたりのセル数を求める
+def get_tolerance_cell_count(arg_tolerance):
+    """許容誤差から量子化の単位長さあたりのセル数を求める
+    セル幅を許容誤差の16倍程度とし、1.0 がセル幅の偶数倍となるように調整する
+    (0、0.5、1.0 などのきりの良い値がセルの中央になる)
+
+    Args:
+        arg_tolerance (float or np.ndarray): 許容誤差(0 より大きい値)
+
+    Returns:
+        float or np.ndarray: 単位長さあたりのセル数
+    """
+
+    # セル幅が1.0の偶数分の1となるセル数を求める
+    cell_count = 2.0 * np.floor(1.0 / (32.0 * arg_tolerance))
+
+    # 許容誤差が大きい場合はセル幅を許容誤差の16倍とする
+    return np.where(cell_count < 2.0, 1.0 / (16.0 * arg_tolerance), cell_count)
+
+# 入力端子毎の許容誤差を行列の列毎の許容誤差に展開する
+def get_tolerance_columns(arg_signature_layout:list, arg_tolerance_list:list) -> np.ndarray:
+    """入力端子毎の許容誤差を行列の列毎の許容誤差に展開する
+
+    Args:
+        arg_signature_layout (list): シグネチャのレイアウト
+        arg_tolerance_list (list): 入力端子毎の許容誤差
+
+    Returns:
+        np.ndarray: 列毎の許容誤差
+    """
+
+    # 入力端子の成分数分だけ許容誤差を繰り返す
+    return np.repeat(np.array(arg_tolerance_list, dtype=np.float64),
+        [layout_width for _, _, _, layout_width in arg_signature_layout])
+
+# シグネチャの行列から許容誤差の範囲内で一致する行をまとめる
+def group_signature_matrix_tolerance(arg_value_matrix:np.ndarray, arg_mergeable_rows:np.ndarray,
+  arg_tolerance_columns:np.ndarray, arg_neighbor_limit:int, arg_link_group_rows:np.ndarray=None) -> np.ndarray:
+    """シグネチャの行列から許容誤差の範囲内で一致する行をまとめる
+    量子化したセル番号と境界を越える列を行列演算で一括して求め、
+    各行は自身と近傍のバケットに登録された代表行とのみ比較する
+
+    Args:
+        arg_value_matrix (np.ndarray): 値の行列
+        arg_mergeable_rows (np.ndarray): マージ可能な行
+        arg_tolerance_columns (np.ndarray): 列毎の許容誤差
+        arg_neighbor_limit (int): 近傍のバケットを探索する列数の上限
+        arg_link_group_rows (np.ndarray, optional): 行毎のリンク構成の番号(指定した場合は番号も一致する行のみまとめる)
+
+    Returns:
+        np.ndarray: 行毎の代表行の番号(誤差の範囲内で最初に出現した代表行、マージしない行は自身)
+    """
+
+    # 代表行の番号を自身で初期化する
+    canonical_rows = np.arange(len(arg_value_matrix))
+
+    # 倍精度で比較する
+    value_matrix = arg_value_matrix.astype(np.float64)
+
+    # 量子化する列(許容誤差が正、かつ、値が有限)を求める
+    tolerance_columns = arg_tolerance_columns
+
+    # リンク構成の番号は許容誤差 0 の列として追加する
+    if arg_link_group_rows is not None:
+        value_matrix = get_link_group_matrix(arg_value_matrix=value_matrix, arg_link_group_rows=arg_link_group_rows)
+        tolerance_columns = np.append(tolerance_columns, 0.0)
+    quantize_matrix = (tolerance_columns > 0.0) & np.isfinite(value_matrix)
+
+    # 列毎の単位長さあたりのセル数を求める
+    cell_counts = get_tolerance_cell_count(np.where(tolerance_columns > 0.0, tolerance_columns, 1.0))
+
+    # セル中央からの位置とセル番号を一括で求める
+    with np.errstate(invalid='ignore'):
+        scaled_matrix = value_matrix * cell_counts
+        cell_matrix = np.floor(scaled_matrix + 0.5)
+        offset_matrix = scaled_matrix - cell_matrix
+
+    # バケットのキー(量子化しない列は符号付きゼロを統一した値そのもの)
+    key_matrix = np.where(quantize_matrix, cell_matrix, value_matrix + 0.0)
+
+    # 許容誤差の範囲がセルの境界を越える列と隣接するセル番号
+    boundary_matrix = quantize_matrix & (np.abs(offset_matrix) >= 0.5 - tolerance_columns * cell_counts)
+    neighbor_matrix = cell_matrix + np.where(offset_matrix > 0.0, 1.0, -1.0)
+
+    # バケットのキーをキーとして代表行の番号を保持する辞書
+    bucket_dict = {}
+
+    # マージ可能な行を出現順に処理する
+    for row_num in np.flatnonzero(arg_mergeable_rows):
+        # 自身のバケットのキーを取得する
+        own_key = key_matrix[row_num]
+
+        # 探索するキーのリスト(自身のキーから開始する)
+        search_keys = [own_key]
+
+        # 境界を越える列毎に隣接するセルのキーを追加する
+        for column_num in np.flatnonzero(boundary_matrix[row_num])[:arg_neighbor_limit]:
+            neighbor_keys = [check_key.copy() for check_key in search_keys]
+            for neighbor_key in neighbor_keys:
+                neighbor_key[column_num] = neighbor_matrix[row_num, column_num]
+            search_keys.extend(neighbor_keys)
+
+        # 自身と近傍のバケットに登録された代表行を集める
+        candidate_nums = []
+        for search_key in search_keys:
+            candidate_nums.extend(bucket_dict.get(search_key.tobytes(), ()))
+
+        # 代表行との誤差を一括で比較する
+        if len(candidate_nums) > 0:
+            profile_material_merge.add_profile_counter("comparisons", len(candidate_nums))
+            candidate_nums = np.array(candidate_nums)
+            match_rows = np.all(np.abs(value_matrix[candidate_nums] - value_matrix[row_num]) <= tolerance_columns, axis=1)
+
+            # 誤差の範囲内の代表行が存在する場合は最初に出現した代表行にまとめる
+            if match_rows.any():
+                canonical_rows[row_num] = candidate_nums[match_rows].min()
+                continue
+
+        # 一致する代表行がない場合は自身を代表行として登録する
+        bucket_dict.setdefault(own_key.tobytes(), []).append(row_num)
+
+    return canonical_rows
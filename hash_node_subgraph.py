@@ -0,0 +1,335 @@
+# 各種ライブラリインポート
+import bpy
+import hashlib
+import os
+
+# 構造ハッシュに含めないノードのプロパティ
+# (表示位置や名前など、シェーダーの結果に影響しないプロパティ)
+def_hash_ignore_property_list = [
+    "rna_type",
+    "type",
+    "location",
+    "width",
+    "width_hidden",
+    "height",
+    "dimensions",
+    "name",
+    "label",
+    "inputs",
+    "outputs",
+    "internal_links",
+    "parent",
+    "use_custom_color",
+    "color",
+    "select",
+    "show_options",
+    "show_preview",
+    "hide",
+    "show_texture",
+    "bl_idname",
+    "bl_label",
+    "bl_description",
+    "bl_icon",
+    "bl_static_type",
+    "bl_width_default",
+    "bl_width_min",
+    "bl_width_max",
+    "bl_height_default",
+    "bl_height_min",
+    "bl_height_max",
+    "is_active_output",
+    "interface",
+]
+
+# ポインタやコレクションのプロパティを展開する階層の上限
+# (カラーランプの要素やカーブの制御点などを比較対象に含める)
+def_hash_struct_depth = 3
+
+# 入力端子に接続された上流のノード構成の構造ハッシュを取得する
+def get_input_subgraph_hash(arg_nodesocket:bpy.types.NodeSocket, arg_node_memo:dict, arg_group_memo:dict) -> str:
+    """入力端子に接続された上流のノード構成の構造ハッシュを取得する
+    ノードの種類、ソケット以外のプロパティ、画像のデータブロックまたはファイルパス、
+    リンクされていない入力端子のデフォルト値から正規化した構造を作成し、ハッシュ値に変換する
+    ノード名や表示位置は含めないため、複製されたノード構成は同じハッシュ値となる
+
+    Args:
+        arg_nodesocket (bpy.types.NodeSocket): リンクが接続された入力端子
+        arg_node_memo (dict): ノードのポインタ値をキーとした構造ハッシュの記録
+        arg_group_memo (dict): ノードグループのポインタ値をキーとした構造ハッシュの記録
+            (複数のマテリアルで共有するノードグループは1回のみ走査する)
+
+    Returns:
+        str: 構造ハッシュ(循環を含むなどハッシュを作成できない場合 None)
+    """
+
+    try:
+        # 入力端子の接続元の構造を取得する
+        socket_key = get_socket_input_key(arg_nodesocket=arg_nodesocket, arg_node_memo=arg_node_memo,
+            arg_group_memo=arg_group_memo, arg_visiting=set())
+    except (RecursionError, ValueError):
+        # 循環や深すぎるノード構成の場合はハッシュを作成しない
+        return None
+
+    return get_structure_digest(arg_structure=socket_key)
+
+# 構造をハッシュ値に変換する
+def get_structure_digest(arg_structure) -> str:
+    """構造をハッシュ値に変換する
+
+    Args:
+        arg_structure (tuple): 文字列、数値、None、タプルのみで構成された構造
+
+    Returns:
+        str: ハッシュ値の16進文字列
+    """
+
+    return hashlib.blake2b(repr(arg_structure).encode("utf-8"), digest_size=16).hexdigest()
+
+# 入力端子の構造を取得する
+def get_socket_input_key(arg_nodesocket:bpy.types.NodeSocket, arg_node_memo:dict, arg_group_memo:dict,
+  arg_visiting:set) -> tuple:
+    """入力端子の構造を取得する
+    リンクが接続されている場合は接続元のノードの構造ハッシュと出力端子、
+    接続されていない場合はデフォルト値を返す
+
+    Args:
+        arg_nodesocket (bpy.types.NodeSocket): 入力端子
+        arg_node_memo (dict): ノードの構造ハッシュの記録
+        arg_group_memo (dict): ノードグループの構造ハッシュの記録
+        arg_visiting (set): 走査中のノードのポインタ値(循環の検出に利用する)
+
+    Returns:
+        tuple: 入力端子の構造
+    """
+
+    # 有効なリンクを取得する
+    socket_links = [check_link for check_link in arg_nodesocket.links
+        if check_link.is_valid == True and check_link.is_muted == False]
+
+    # リンクが接続されていない場合はデフォルト値を返す
+    if len(socket_links) == 0:
+        return ("VALUE", get_property_value_key(getattr(arg_nodesocket, "default_value", None)))
+
+    # 接続元のノードの構造ハッシュと出力端子を並べる
+    link_keys = []
+    for socket_link in socket_links:
+        node_digest = get_node_digest(arg_node=socket_link.from_node, arg_node_memo=arg_node_memo,
+            arg_group_memo=arg_group_memo, arg_visiting=arg_visiting)
+        link_keys.append((node_digest, socket_link.from_socket.identifier))
+
+    return ("LINK", tuple(link_keys))
+
+# ノードの構造ハッシュを取得する
+def get_node_digest(arg_node:bpy.types.Node, arg_node_memo:dict, arg_group_memo:dict, arg_visiting:set) -> str:
+    """ノードの構造ハッシュを取得する
+    ノードの種類、プロパティ、全入力端子の構造から作成し、ノード毎に1回のみ計算する
+
+    Args:
+        arg_node (bpy.types.Node): ノード
+        arg_node_memo (dict): ノードの構造ハッシュの記録
+        arg_group_memo (dict): ノードグループの構造ハッシュの記録
+        arg_visiting (set): 走査中のノードのポインタ値
+
+    Returns:
+        str: 構造ハッシュ
+    """
+
+    # 計算済みのノードか確認する
+    node_pointer = arg_node.as_pointer()
+    if node_pointer in arg_node_memo:
+        return arg_node_memo[node_pointer]
+
+    # 走査中のノードに戻った場合は循環しているため中断する
+    if node_pointer in arg_visiting:
+        raise ValueError("Node link cycle : " + arg_node.name)
+    arg_visiting.add(node_pointer)
+
+    # ソケット以外のプロパティの構造を取得する
+    property_keys = get_struct_property_keys(arg_struct=arg_node, arg_group_memo=arg_group_memo,
+        arg_depth=def_hash_struct_depth)
+
+    # 全入力端子の構造を取得する
+    input_keys = tuple((check_input.identifier,
+        get_socket_input_key(arg_nodesocket=check_input, arg_node_memo=arg_node_memo,
+            arg_group_memo=arg_group_memo, arg_visiting=arg_visiting))
+        for check_input in arg_node.inputs)
+
+    arg_visiting.discard(node_pointer)
+
+    # 構造ハッシュを記録する
+    node_digest = get_structure_digest(arg_structure=(arg_node.bl_idname, property_keys, input_keys))
+    arg_node_memo[node_pointer] = node_digest
+
+    return node_digest
+
+# ノードグループの構造ハッシュを取得する
+def get_group_tree_digest(arg_node_tree:bpy.types.NodeTree, arg_group_memo:dict) -> str:
+    """ノードグループの構造ハッシュを取得する
+    グループ出力ノードの入力端子から上流の構造で作成し、ノードグループ毎に1回のみ計算する
+
+    Args:
+        arg_node_tree (bpy.types.NodeTree): ノードグループ
+        arg_group_memo (dict): ノードグループの構造ハッシュの記録
+
+    Returns:
+        str: 構造ハッシュ
+    """
+
+    # 計算済みのノードグループか確認する
+    tree_pointer = arg_node_tree.as_pointer()
+    if tree_pointer in arg_group_memo:
+        return arg_group_memo[tree_pointer]
+
+    # ノードグループ内のノードの記録はグループ毎に分ける
+    group_node_memo = {}
+
+    # グループ出力ノードの入力端子の構造を取得する
+    output_keys = []
+    for check_node in arg_node_tree.nodes:
+        if check_node.bl_idname != 'NodeGroupOutput' or getattr(check_node, "is_active_output", True) == False:
+            continue
+        output_keys.append(tuple((check_input.identifier,
+            get_socket_input_key(arg_nodesocket=check_input, arg_node_memo=group_node_memo,
+                arg_group_memo=arg_group_memo, arg_visiting=set()))
+            for check_input in check_node.inputs))
+
+    # 構造ハッシュを記録する
+    tree_digest = get_structure_digest(arg_structure=("GROUP", tuple(output_keys)))
+    arg_group_memo[tree_pointer] = tree_digest
+
+    return tree_digest
+
+# 構造体のプロパティの構造を取得する
+def get_struct_property_keys(arg_struct, arg_group_memo:dict, arg_depth:int) -> tuple:
+    """構造体のプロパティの構造を取得する
+    RNA のプロパティ一覧を走査し、比較対象外のプロパティを除いて並べる
+
+    Args:
+        arg_struct (bpy.types.bpy_struct): ノードなどの構造体
+        arg_group_memo (dict): ノードグループの構造ハッシュの記録
+        arg_depth (int): ポインタやコレクションを展開する残りの階層数
+
+    Returns:
+        tuple: (プロパティ名, 値の構造) のタプル
+    """
+
+    # プロパティの構造のリスト
+    property_keys = []
+
+    for rna_property in arg_struct.bl_rna.properties:
+        # 比較対象外のプロパティは含めない
+        property_name = rna_property.identifier
+        if property_name in def_hash_ignore_property_list:
+            continue
+
+        # プロパティの値を取得する
+        property_value = getattr(arg_struct, property_name, None)
+
+        # プロパティの種類に応じて値の構造を取得する
+        if rna_property.type == 'POINTER':
+            value_key = get_pointer_value_key(arg_value=property_value, arg_group_memo=arg_group_memo,
+                arg_depth=arg_depth)
+        elif rna_property.type == 'COLLECTION':
+            # 展開する階層の上限に達した場合は含めない
+            if arg_depth <= 0:
+                continue
+            value_key = tuple(get_struct_property_keys(arg_struct=collection_item, arg_group_memo=arg_group_memo,
+                arg_depth=arg_depth-1) for collection_item in property_value)
+        else:
+            value_key = get_property_value_key(property_value)
+
+        property_keys.append((property_name, value_key))
+
+    return tuple(property_keys)
+
+# ポインタのプロパティの値の構造を取得する
+def get_pointer_value_key(arg_value, arg_group_memo:dict, arg_depth:int):
+    """ポインタのプロパティの値の構造を取得する
+
+    Args:
+        arg_value (bpy.types.bpy_struct): プロパティの値
+        arg_group_memo (dict): ノードグループの構造ハッシュの記録
+        arg_depth (int): ポインタやコレクションを展開する残りの階層数
+
+    Returns:
+        tuple: 値の構造
+    """
+
+    # 参照先が存在しない場合
+    if arg_value == None:
+        return None
+
+    # 画像はデータブロックまたはファイルパスで識別する
+    if isinstance(arg_value, bpy.types.Image):
+        return get_image_key(arg_image=arg_value)
+
+    # ノードグループは内部の構造で識別する
+    if isinstance(arg_value, bpy.types.NodeTree):
+        return ("TREE", get_group_tree_digest(arg_node_tree=arg_value, arg_group_memo=arg_group_memo))
+
+    # その他のデータブロックは種類と名前で識別する
+    if isinstance(arg_value, bpy.types.ID):
+        return ("ID", type(arg_value).__name__, arg_value.name,
+            arg_value.library.filepath if arg_value.library != None else "")
+
+    # 展開する階層の上限に達した場合は含めない
+    if arg_depth <= 0:
+        return None
+
+    # 画像ユーザーやマッピングなどの構造体はプロパティを展開する
+    return ("STRUCT", get_struct_property_keys(arg_struct=arg_value, arg_group_memo=arg_group_memo,
+        arg_depth=arg_depth-1))
+
+# 画像の識別用の構造を取得する
+def get_image_key(arg_image:bpy.types.Image) -> tuple:
+    """画像の識別用の構造を取得する
+    外部ファイルの画像は絶対パスで識別し、同じファイルを読み込んだ別のデータブロックも一致させる
+    パックされた画像や生成された画像はデータブロックで識別する
+
+    Args:
+        arg_image (bpy.types.Image): 画像
+
+    Returns:
+        tuple: 画像の識別用の構造
+    """
+
+    # 画像の色空間と透過の扱いを取得する(読み込み方が異なる画像は一致させない)
+    colorspace_settings = getattr(arg_image, "colorspace_settings", None)
+    colorspace_name = colorspace_settings.name if colorspace_settings != None else ""
+    alpha_mode = getattr(arg_image, "alpha_mode", "")
+
+    # 外部ファイルを参照しているか確認する
+    if arg_image.packed_file == None and arg_image.source in ('FILE', 'SEQUENCE', 'MOVIE', 'TILED') and arg_image.filepath != "":
+        # 絶対パスに変換して識別する
+        image_filepath = bpy.path.abspath(arg_image.filepath, library=arg_image.library)
+        return ("FILE", os.path.normcase(os.path.normpath(image_filepath)), arg_image.source, colorspace_name, alpha_mode)
+
+    # データブロックで識別する
+    return ("IMAGE", arg_image.name, arg_image.library.filepath if arg_image.library != None else "",
+        colorspace_name, alpha_mode)
+
+# プロパティの値を比較用の値に変換する
+def get_property_value_key(arg_value):
+    """プロパティの値を比較用の値に変換する
+
+    Args:
+        arg_value: プロパティの値
+
+    Returns:
+        比較用の値(配列はタプル、列挙型のフラグはソートしたタプル)
+    """
+
+    # 値が存在しない、または、単一の値の場合はそのまま返す
+    if arg_value == None or isinstance(arg_value, (bool, int, float, str)):
+        return arg_value
+
+    # 列挙型のフラグはソートしたタプルに変換する
+    if isinstance(arg_value, (set, frozenset)):
+        return tuple(sorted(arg_value))
+
+    # 配列はタプルに変換する
+    try:
+        return tuple(get_property_value_key(array_value) for array_value in arg_value)
+    except TypeError:
+        # 変換できない値は型名で扱う
+        return type(arg_value).__name__
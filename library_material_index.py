@@ -0,0 +1,385 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "comp_material_bsdf" in locals():
+        importlib.reload(comp_material_bsdf)
+    if "control_materialslot_utilities" in locals():
+        importlib.reload(control_materialslot_utilities)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+import bpy
+import hashlib
+import json
+import numpy as np
+import os
+from . import comp_material_bsdf
+from . import control_materialslot_utilities
+from . import profile_material_merge
+
+# 索引ファイルの形式のバージョン
+# (シグネチャの形式を変更した場合は値を更新し、古い索引を無効にする)
+def_library_index_version = 2
+
+# ライブラリの .blend ファイルの隣に保存する索引ファイルの拡張子
+def_library_index_suffix = ".bsdfmerge_index.json"
+
+# ライブラリから読み込んだマテリアルに記録するカスタムプロパティ名
+# (アペンドしたマテリアルを再実行時に再利用し、同じマテリアルを重ねてアペンドしない)
+def_library_source_property_name = "holomon_bsdf_merge_library_source"
+
+# 読み込み済みの索引
+# キーはライブラリの絶対パス、値は load_library_index の戻り値
+library_index_cache = {}
+
+# 指定したライブラリのマテリアルに一致するスロットをライブラリのマテリアルに差し替える
+def merge_library_materials(arg_objects:list, arg_library_path:str, arg_link:bool=True) -> dict:
+    """指定したライブラリのマテリアルに一致するスロットをライブラリのマテリアルに差し替える
+    comp_material_bsdf の完全一致の条件でライブラリのマテリアルと一致するマテリアルを求め、
+    一致したライブラリのマテリアルのみをリンク、または、アペンドして差し替える
+    (索引はシグネチャのハッシュをキーとした辞書のため、マテリアル毎の検索はライブラリの規模に依存しない)
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_library_path (str): ライブラリの .blend ファイルのパス
+        arg_link (bool, optional): ライブラリのマテリアルをリンクするか(False の場合はアペンドする)
+
+    Returns:
+        dict: 差し替えたマテリアルのライブラリ名を含む名前をキーとした、ライブラリのマテリアルのライブラリ名を含む名前
+              (索引を読み込めない場合 None)
+    """
+
+    # ライブラリの索引を読み込む
+    library_index = load_library_index(arg_library_path=arg_library_path)
+    if library_index == None:
+        return None
+    library_path = library_index["filepath"]
+
+    # 対象のメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in arg_objects if check_object.type == 'MESH']
+
+    # マテリアルのポインタ値をキーとして一致したライブラリのマテリアル名を保持する
+    match_dict = {}
+    for check_mat in comp_material_bsdf.get_slot_materials_unique(arg_objects=target_objects):
+        # ライブラリから読み込んだマテリアルは差し替えない
+        if get_library_source_name(arg_material=check_mat, arg_library_path=library_path) != None:
+            continue
+
+        # シグネチャのハッシュで索引を検索する
+        signature_key = comp_material_bsdf.get_material_signature_key(arg_material=check_mat)
+        if signature_key == None:
+            continue
+        library_name = library_index["entries"].get(get_signature_key_digest(arg_signature_key=signature_key))
+        if library_name != None:
+            match_dict[check_mat.as_pointer()] = (check_mat, library_name)
+
+    # 一致したマテリアル数を記録する
+    profile_material_merge.add_profile_counter("library_matches", len(match_dict))
+
+    # 一致するマテリアルがない場合は処理しない
+    if len(match_dict) == 0:
+        return {}
+
+    # 一致したライブラリのマテリアルを読み込む
+    library_materials = load_library_materials(arg_library_path=library_path,
+        arg_material_names=sorted(set(library_name for _, library_name in match_dict.values())), arg_link=arg_link)
+
+    # スロットのマテリアルをライブラリのマテリアルに差し替え、スロットを整理する
+    remap_names = {}
+    for target_object in target_objects:
+        for check_material_slot in target_object.material_slots:
+            check_mat = check_material_slot.material
+            if check_mat == None or check_mat.as_pointer() not in match_dict:
+                continue
+            library_mat = library_materials.get(match_dict[check_mat.as_pointer()][1])
+            if library_mat == None:
+                continue
+            # (同名のローカルのマテリアルと区別するため、ライブラリ名を含む名前で記録する)
+            remap_names[check_mat.name_full] = library_mat.name_full
+            check_material_slot.material = library_mat
+        control_materialslot_utilities.compact_materialslot_bulk(arg_object=target_object)
+
+    return remap_names
+
+# ライブラリの索引を読み込む
+def load_library_index(arg_library_path:str) -> dict:
+    """ライブラリの索引を読み込む
+    読み込み済みの索引、索引ファイルの順に再利用し、どちらも無効な場合はライブラリを読み込んで作成する
+    (ライブラリの更新日時、サイズ、Blender のバージョンが作成時と異なる場合は作成し直す)
+
+    Args:
+        arg_library_path (str): ライブラリの .blend ファイルのパス
+
+    Returns:
+        dict: 索引({"version": 形式のバージョン, "blender": Blender のバージョン, "filepath": 絶対パス,
+                    "mtime": 更新日時, "size": サイズ, "entries": シグネチャのハッシュをキーとしたマテリアル名}、
+                    ライブラリが存在しない場合 None)
+    """
+
+    # ライブラリの絶対パスを取得する
+    library_path = os.path.normpath(bpy.path.abspath(arg_library_path))
+
+    # ライブラリの更新日時とサイズを取得する
+    try:
+        library_stat = os.stat(library_path)
+    except OSError:
+        return None
+
+    # 読み込み済みの索引が有効か確認する
+    library_index = library_index_cache.get(library_path)
+    if check_library_index(arg_library_index=library_index, arg_library_stat=library_stat) == True:
+        return library_index
+
+    # 索引ファイルを読み込む
+    index_path = library_path + def_library_index_suffix
+    try:
+        with open(index_path, "r", encoding="utf-8") as index_file:
+            library_index = json.load(index_file)
+    except (OSError, ValueError):
+        library_index = None
+
+    # 索引ファイルが無効な場合はライブラリを読み込んで作成する
+    if check_library_index(arg_library_index=library_index, arg_library_stat=library_stat) == False:
+        library_index = {
+            "version": def_library_index_version,
+            "blender": list(bpy.app.version),
+            "filepath": library_path,
+            "mtime": library_stat.st_mtime,
+            "size": library_stat.st_size,
+            "entries": build_library_entries(arg_library_path=library_path),
+        }
+
+        # 索引ファイルに保存する(保存できない場合は読み込み済みの索引のみ使用する)
+        try:
+            with open(index_path, "w", encoding="utf-8") as index_file:
+                json.dump(library_index, index_file, indent=1, sort_keys=True)
+        except OSError:
+            pass
+
+    # 読み込み済みの索引として保持する
+    library_index["filepath"] = library_path
+    library_index_cache[library_path] = library_index
+
+    return library_index
+
+# 索引が現在のライブラリと Blender で有効か確認する
+def check_library_index(arg_library_index:dict, arg_library_stat:os.stat_result) -> bool:
+    """索引が現在のライブラリと Blender で有効か確認する
+
+    Args:
+        arg_library_index (dict): 索引
+        arg_library_stat (os.stat_result): ライブラリのファイル情報
+
+    Returns:
+        bool: 有効か否か
+    """
+
+    if arg_library_index == None:
+        return False
+
+    return arg_library_index.get("version") == def_library_index_version \
+        and arg_library_index.get("blender") == list(bpy.app.version) \
+        and arg_library_index.get("mtime") == arg_library_stat.st_mtime \
+        and arg_library_index.get("size") == arg_library_stat.st_size
+
+# ライブラリの全マテリアルのシグネチャのハッシュを求める
+def build_library_entries(arg_library_path:str) -> dict:
+    """ライブラリの全マテリアルのシグネチャのハッシュを求める
+    全マテリアルを一時的にリンクしてシグネチャを求め、新たにリンクしたデータは削除する
+    同じシグネチャのマテリアルが複数ある場合は名前順で最初のマテリアルを代表とする
+
+    Args:
+        arg_library_path (str): ライブラリの .blend ファイルの絶対パス
+
+    Returns:
+        dict: シグネチャのハッシュをキーとしたマテリアル名
+    """
+
+    # ライブラリが読み込み済みか確認する
+    loaded_library = get_loaded_library(arg_library_path=arg_library_path)
+    loaded_pointers = set()
+    if loaded_library != None:
+        loaded_pointers = {check_mat.as_pointer() for check_mat in bpy.data.materials
+            if check_mat.library == loaded_library}
+
+    # 全マテリアルを一時的にリンクする
+    with bpy.data.libraries.load(arg_library_path, link=True) as (data_from, data_to):
+        data_to.materials = list(data_from.materials)
+    linked_materials = sorted([check_mat for check_mat in data_to.materials if check_mat != None],
+        key=lambda check_mat: check_mat.name)
+
+    # シグネチャのハッシュを求める
+    library_entries = {}
+    for linked_mat, signature_digest in zip(linked_materials,
+      get_material_signature_digests(arg_materials=linked_materials)):
+        if signature_digest != None:
+            library_entries.setdefault(signature_digest, linked_mat.name)
+
+    # 新たにリンクしたデータを削除する
+    if loaded_library == None:
+        # 未使用のライブラリはライブラリごと削除する
+        bpy.data.libraries.remove(get_loaded_library(arg_library_path=arg_library_path))
+    else:
+        # 使用中のライブラリは新たにリンクしたマテリアルのみ削除する
+        bpy.data.batch_remove(ids=[linked_mat for linked_mat in linked_materials
+            if linked_mat.as_pointer() not in loaded_pointers])
+
+    return library_entries
+
+# ライブラリのマテリアルを読み込む
+def load_library_materials(arg_library_path:str, arg_material_names:list, arg_link:bool=True) -> dict:
+    """ライブラリのマテリアルを読み込む
+    読み込み済みのマテリアルは再利用し、未読み込みのマテリアルのみを1回でリンク、または、アペンドする
+
+    Args:
+        arg_library_path (str): ライブラリの .blend ファイルの絶対パス
+        arg_material_names (list): ライブラリのマテリアル名のリスト
+        arg_link (bool, optional): リンクするか(False の場合はアペンドする)
+
+    Returns:
+        dict: ライブラリのマテリアル名をキーとしたマテリアル
+    """
+
+    # 読み込み済みのマテリアルを取得する
+    library_materials = {}
+    for check_mat in bpy.data.materials:
+        source_name = get_library_source_name(arg_material=check_mat, arg_library_path=arg_library_path)
+        if source_name in arg_material_names and (check_mat.library != None) == arg_link:
+            library_materials.setdefault(source_name, check_mat)
+
+    # 未読み込みのマテリアルを取得する
+    load_names = [material_name for material_name in arg_material_names if material_name not in library_materials]
+    if len(load_names) == 0:
+        return library_materials
+
+    # 未読み込みのマテリアルを1回で読み込む
+    with bpy.data.libraries.load(arg_library_path, link=arg_link) as (data_from, data_to):
+        data_to.materials = load_names
+
+    # 読み込んだマテリアルを記録する
+    for material_name, loaded_mat in zip(load_names, data_to.materials):
+        if loaded_mat == None:
+            continue
+
+        # アペンドしたマテリアルには読み込み元を記録する
+        if loaded_mat.library == None:
+            loaded_mat[def_library_source_property_name] = {"filepath": arg_library_path, "name": material_name}
+        library_materials[material_name] = loaded_mat
+
+    return library_materials
+
+# 読み込み済みのライブラリを取得する
+def get_loaded_library(arg_library_path:str) -> bpy.types.Library:
+    """読み込み済みのライブラリを取得する
+
+    Args:
+        arg_library_path (str): ライブラリの .blend ファイルの絶対パス
+
+    Returns:
+        bpy.types.Library: ライブラリ(読み込まれていない場合 None)
+    """
+
+    for check_library in bpy.data.libraries:
+        if os.path.normpath(bpy.path.abspath(check_library.filepath)) == arg_library_path:
+            return check_library
+
+    return None
+
+# マテリアルの読み込み元のライブラリのマテリアル名を取得する
+def get_library_source_name(arg_material:bpy.types.Material, arg_library_path:str) -> str:
+    """マテリアルの読み込み元のライブラリのマテリアル名を取得する
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+        arg_library_path (str): ライブラリの .blend ファイルの絶対パス
+
+    Returns:
+        str: ライブラリのマテリアル名(指定ライブラリから読み込んだマテリアルでない場合 None)
+    """
+
+    # リンクしたマテリアルはライブラリのパスを確認する
+    if arg_material.library != None:
+        if os.path.normpath(bpy.path.abspath(arg_material.library.filepath)) == arg_library_path:
+            return arg_material.name
+        return None
+
+    # アペンドしたマテリアルは記録した読み込み元を確認する
+    source_entry = arg_material.get(def_library_source_property_name)
+    if source_entry != None and source_entry.get("filepath") == arg_library_path:
+        return source_entry.get("name")
+
+    return None
+
+# 指定マテリアルのシグネチャのハッシュを求める
+def get_material_signature_digests(arg_materials:list) -> list:
+    """指定マテリアルのシグネチャのハッシュを求める
+    ノードの有効化は行わないため、データを変更せずに実行できる
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        list: マテリアル毎のシグネチャのハッシュのリスト(マージしないマテリアルは None)
+    """
+
+    signature_digests = []
+    for check_mat in arg_materials:
+        signature_key = comp_material_bsdf.get_material_signature_key(arg_material=check_mat)
+        signature_digests.append(get_signature_key_digest(arg_signature_key=signature_key)
+            if signature_key != None else None)
+
+    return signature_digests
+
+# 指定マテリアルのシグネチャの記録を求める
+def get_material_signature_records(arg_materials:list) -> list:
+    """指定マテリアルのシグネチャの記録を求める
+    ファイルを跨いで索引を作成するため、ハッシュとともに値の行とリンクが接続された列を記録する
+    ノードの有効化は行わないため、データを変更せずに実行できる
+
+    Args:
+        arg_materials (list): 指定マテリアルのリスト
+
+    Returns:
+        list: マテリアル毎の [シグネチャのハッシュ, シェーダーのノードタイプ, 値のリスト, リンクが接続された列番号のリスト]
+              のリスト(マージしないマテリアルは None)
+    """
+
+    signature_records = []
+    for check_mat in arg_materials:
+        signature_row = comp_material_bsdf.get_material_signature_row(arg_material=check_mat)
+        if signature_row == None:
+            signature_records.append(None)
+            continue
+        shader_idname, value_row, linked_row, _ = signature_row
+        signature_records.append([
+            get_signature_key_digest(arg_signature_key=comp_material_bsdf.get_signature_row_key(
+                arg_signature_row=signature_row)),
+            shader_idname, value_row.tolist(), np.flatnonzero(linked_row).tolist()])
+
+    return signature_records
+
+# シグネチャのキーから索引のキーとするハッシュを求める
+def get_signature_key_digest(arg_signature_key:tuple) -> str:
+    """シグネチャのキーから索引のキーとするハッシュを求める
+    ファイルを跨いで比較するため、ポインタ値などの実行毎に変わる値を含めずにハッシュを求める
+
+    Args:
+        arg_signature_key (tuple): comp_material_bsdf.get_material_signature_key の戻り値
+
+    Returns:
+        str: ハッシュ
+    """
+
+    # シェーダーのノードタイプ、値の行、リンクが接続された列番号と構造ハッシュの組を順にハッシュに追加する
+    # (同じ構造のノードが異なる入力端子に接続された場合に異なるハッシュとなるよう、列番号を含める)
+    shader_idname, value_bytes, linked_columns, link_hashes = arg_signature_key
+    signature_hash = hashlib.blake2b(digest_size=20)
+    signature_hash.update(shader_idname.encode("utf-8"))
+    signature_hash.update(b"\0")
+    signature_hash.update(value_bytes)
+    for linked_column, link_hash in zip(linked_columns, link_hashes):
+        signature_hash.update(b"\0")
+        signature_hash.update(str(linked_column).encode("utf-8"))
+        signature_hash.update(b":")
+        signature_hash.update(link_hash.encode("utf-8"))
+
+    return signature_hash.hexdigest()
@@ -0,0 +1,560 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "batch_material_meshes" in locals():
+        importlib.reload(batch_material_meshes)
+    if "cache_material_signature" in locals():
+        importlib.reload(cache_material_signature)
+    if "check_surface_bsdf" in locals():
+        importlib.reload(check_surface_bsdf)
+    if "cleanup_orphan_data" in locals():
+        importlib.reload(cleanup_orphan_data)
+    if "comp_material_bsdf" in locals():
+        importlib.reload(comp_material_bsdf)
+    if "control_materialslot_utilities" in locals():
+        importlib.reload(control_materialslot_utilities)
+    if "dedup_image_content" in locals():
+        importlib.reload(dedup_image_content)
+    if "plan_material_merge" in locals():
+        importlib.reload(plan_material_merge)
+    if "profile_material_merge" in locals():
+        importlib.reload(profile_material_merge)
+    if "stats_material_slots" in locals():
+        importlib.reload(stats_material_slots)
+import bpy
+import time
+import numpy as np
+from . import batch_material_meshes
+from . import cache_material_signature
+from . import check_surface_bsdf
+from . import cleanup_orphan_data
+from . import comp_material_bsdf
+from . import control_materialslot_utilities
+from . import dedup_image_content
+from . import plan_material_merge
+from . import profile_material_merge
+from . import stats_material_slots
+
+# 分割実行の段階名(実行順)
+# 段階毎に処理単位を分割し、1回の呼び出しで時間の上限まで処理する
+#   check_shader      : マテリアル毎にシェーダーを判定する(ノードの有効化を含む)
+#   dedup_images      : 内容が同じ画像の参照をまとめる(指定時のみ)
+#   collect_stats     : マージ前の統計を取得する(指定時のみ)
+#   extract_signature : シェーダーのノードタイプ毎、分割したマテリアル毎にシグネチャの行列を取得する
+#   group_signature   : シェーダーのノードタイプ毎に一致する行をまとめる
+#   create_plan       : マージ計画を作成する
+#   apply_plan        : オブジェクト毎に計画を適用する(適用前のスロット構成を記録する)
+#   finish            : 統計の収集、メッシュの作成、未使用データの削除を行う(中断できない)
+def_modal_stage_list = [
+    "check_shader",
+    "dedup_images",
+    "collect_stats",
+    "extract_signature",
+    "group_signature",
+    "create_plan",
+    "apply_plan",
+    "finish",
+]
+
+# 1回の処理単位で扱うマテリアル数、オブジェクト数
+def_modal_chunk_size = 256
+
+# タイマー1回あたりの処理時間の上限(秒)
+def_modal_time_slice = 0.1
+
+# タイマーの間隔(秒)
+# (処理時間の上限に対して十分短くし、待ち時間による処理速度の低下を抑える)
+def_modal_timer_interval = 0.01
+
+# 実行中の分割実行の状態
+# 実行範囲外では None とする
+modal_merge_state = None
+
+# 分割実行を開始する
+def begin_modal_merge(arg_target_objects:list, arg_tolerance:float=0.0, arg_signature_cache:str='NONE',
+  arg_dedup_images:bool=False, arg_cleanup:bool=False, arg_stats:bool=False, arg_batch_mode:str='NONE',
+  arg_profile:bool=False) -> str:
+    """分割実行を開始する
+    execute_bsdf_material_merge と同じ処理を段階毎の処理単位に分割し、step_modal_merge で順に実行する
+
+    Args:
+        arg_target_objects (list): 対象オブジェクトのリスト
+        arg_tolerance (float, optional): 入力端子の値の許容誤差(0 の場合は完全一致)
+        arg_signature_cache (str, optional): 永続キャッシュの保存先('NONE', 'PROPERTY', 'SIDECAR')
+        arg_dedup_images (bool, optional): マージ前に内容が同じ画像の参照を1つの画像にまとめるか
+        arg_cleanup (bool, optional): マージで未使用となったデータを削除するか
+        arg_stats (bool, optional): オブジェクト毎のスロット数と描画コール数の削減結果を取得するか
+        arg_batch_mode (str, optional): マージ後にマテリアル毎のメッシュを作成する方法('NONE', 'OBJECT', 'MATERIAL')
+        arg_profile (bool, optional): 段階毎の経過時間とカウンタを計測するか
+
+    Returns:
+        str: エラーメッセージ(正常時 None)
+    """
+
+    # グローバル変数の実行状態を参照する
+    global modal_merge_state
+
+    # 実行中か確認する
+    if modal_merge_state != None:
+        return "Execute : Modal merge is already running."
+
+    # マテリアルスロットの編集を行うため、オブジェクトモードに移行する
+    if control_materialslot_utilities.set_mode_object() == False:
+        return "Execute : Mode Change failed."
+
+    # 未検出のシェーダーノードのシグネチャのレイアウトを検出する
+    comp_material_bsdf.discover_surface_shader_layouts()
+
+    # 計測が指定されている場合は計測を開始する
+    if arg_profile == True:
+        profile_material_merge.begin_merge_profile()
+
+    # 実行中のノード解決キャッシュを開始する
+    check_surface_bsdf.begin_resolve_cache()
+
+    # 永続キャッシュが指定されている場合は開始する
+    if arg_signature_cache != 'NONE':
+        cache_material_signature.begin_persistent_cache(arg_use_sidecar=(arg_signature_cache == 'SIDECAR'))
+
+    # 対象オブジェクトのマテリアルを取得する
+    target_objects = [check_object for check_object in arg_target_objects if check_object.type == 'MESH']
+    slot_materials = comp_material_bsdf.get_slot_materials_unique(arg_objects=target_objects)
+
+    modal_merge_state = {
+        "objects": target_objects,
+        "materials": slot_materials,
+        "options": {
+            "tolerance_dict": comp_material_bsdf.get_shader_tolerance_dict(arg_tolerance=arg_tolerance),
+            "dedup_images": arg_dedup_images,
+            "cleanup": arg_cleanup,
+            "stats": arg_stats,
+            "batch_mode": arg_batch_mode,
+            "profile": arg_profile,
+        },
+        # 実行中の段階の番号と段階内の処理位置
+        "stage_num": 0,
+        "cursor": 0,
+        # シェーダーのノードタイプ毎のマテリアルの番号と、分割して取得したシグネチャの行列
+        "shader_rows": {},
+        "signature_tasks": [],
+        "signature_chunks": {},
+        "canonical_rows": np.arange(len(slot_materials)),
+        "before_stats": None,
+        "plan": None,
+        "applied_meshes": set(),
+        # 中断時に元に戻すための記録
+        "rollback": {"use_nodes": [], "image_nodes": [], "snapshots": [], "snapshot_meshes": set()},
+        # 処理済みと全体の処理単位の数(進捗の表示に使用する)
+        "done_units": 0,
+        "total_units": len(slot_materials) * 2 + len(target_objects) + 5,
+        "result": {"error": None, "stats": [], "cleanup": None, "batch": [], "profile": None},
+    }
+
+    return None
+
+# 分割実行を時間の上限まで進める
+def step_modal_merge(arg_time_slice:float=def_modal_time_slice) -> bool:
+    """分割実行を時間の上限まで進める
+    処理単位毎に経過時間を確認し、上限を超えた時点で中断する(1回の呼び出しで少なくとも1単位は処理する)
+    段階の処理で例外が発生した場合はエラーで終了し、end_modal_merge で変更を元に戻せるようにする
+
+    Args:
+        arg_time_slice (float, optional): 処理時間の上限(秒)
+
+    Returns:
+        bool: 全ての段階が完了したか(エラーで終了した場合も True)
+    """
+
+    # 実行中か確認する
+    if modal_merge_state == None:
+        return True
+
+    # 段階毎の処理関数
+    stage_function_dict = {
+        "check_shader": process_check_shader,
+        "dedup_images": process_dedup_images,
+        "collect_stats": process_collect_stats,
+        "extract_signature": process_extract_signature,
+        "group_signature": process_group_signature,
+        "create_plan": process_create_plan,
+        "apply_plan": process_apply_plan,
+        "finish": process_finish,
+    }
+
+    start_time = time.perf_counter()
+    while check_modal_merge_finished() == False:
+        # 実行中の段階を1単位処理する
+        stage_name = def_modal_stage_list[modal_merge_state["stage_num"]]
+        profile_material_merge.start_profile_stage(stage_name)
+        try:
+            stage_finished = stage_function_dict[stage_name](arg_state=modal_merge_state)
+        except Exception as stage_exception:
+            # 例外をエラーメッセージとして格納し、エラーで終了する
+            # (タイマーと進捗表示の終了、変更の取り消し、実行状態の破棄は end_modal_merge で行う)
+            modal_merge_state["result"]["error"] = "Execute : Merge failed in {} ({}).".format(stage_name,
+                repr(stage_exception))
+            return True
+        finally:
+            profile_material_merge.stop_profile_stage(stage_name)
+
+        # 段階が完了した場合は次の段階に進む
+        if stage_finished == True:
+            modal_merge_state["stage_num"] += 1
+            modal_merge_state["cursor"] = 0
+
+        # 処理時間の上限を確認する
+        if time.perf_counter() - start_time >= arg_time_slice:
+            break
+
+    return check_modal_merge_finished()
+
+# 分割実行が完了したか確認する
+def check_modal_merge_finished() -> bool:
+    """分割実行が完了したか確認する
+
+    Returns:
+        bool: 全ての段階が完了した、または、エラーで終了したか(実行中でない場合 True)
+    """
+
+    if modal_merge_state == None:
+        return True
+
+    return modal_merge_state["result"]["error"] != None or modal_merge_state["stage_num"] >= len(def_modal_stage_list)
+
+# 分割実行の進捗を取得する
+def get_modal_merge_progress() -> float:
+    """分割実行の進捗を取得する
+
+    Returns:
+        float: 進捗(0.0 から 1.0、実行中でない場合 1.0)
+    """
+
+    if modal_merge_state == None:
+        return 1.0
+
+    return min(1.0, modal_merge_state["done_units"] / max(1, modal_merge_state["total_units"]))
+
+# 分割実行を終了する
+def end_modal_merge() -> dict:
+    """分割実行を終了する
+    完了前に呼び出した場合は中断し、変更したデータを開始前の状態に戻す
+
+    Returns:
+        dict: 実行結果({"error": エラーメッセージ(正常時 None), "stats": 削減結果のリスト,
+              "cleanup": 削除結果(未指定時 None), "batch": 作成したオブジェクト名のリスト,
+              "profile": 計測結果(未指定時 None), "cancelled": 中断したか}、実行中でない場合 None)
+    """
+
+    # グローバル変数の実行状態を参照する
+    global modal_merge_state
+
+    # 実行中か確認する
+    if modal_merge_state == None:
+        return None
+
+    # 完了していない場合、または、エラーで終了した場合は変更を元に戻す
+    merge_result = modal_merge_state["result"]
+    merge_result["cancelled"] = check_modal_merge_finished() == False
+    # (元に戻す処理で例外が発生した場合も、キャッシュと計測を終了して実行状態を破棄する)
+    try:
+        if merge_result["cancelled"] == True or merge_result["error"] != None:
+            rollback_modal_merge(arg_rollback=modal_merge_state["rollback"])
+    finally:
+        # ノード解決キャッシュを終了する
+        check_surface_bsdf.end_resolve_cache()
+
+        # 永続キャッシュを終了する(サイドカーファイルを使用している場合は書き出す)
+        cache_material_signature.end_persistent_cache()
+
+        # 計測を終了して結果を格納する
+        if modal_merge_state["options"]["profile"] == True:
+            merge_result["profile"] = profile_material_merge.end_merge_profile()
+
+        # 実行状態を破棄する
+        modal_merge_state = None
+
+    return merge_result
+
+# 分割実行で変更したデータを開始前の状態に戻す
+def rollback_modal_merge(arg_rollback:dict):
+    """分割実行で変更したデータを開始前の状態に戻す
+    変更と逆の順序で、スロット構成、画像の参照、ノードの有効化の順に戻す
+
+    Args:
+        arg_rollback (dict): 実行状態の "rollback" の記録
+    """
+
+    # スロット構成を元に戻す
+    for materialslot_snapshot in reversed(arg_rollback["snapshots"]):
+        control_materialslot_utilities.restore_materialslot_snapshot(arg_snapshot=materialslot_snapshot)
+
+    # 画像テクスチャノードの参照を元に戻す
+    for image_node, node_image in arg_rollback["image_nodes"]:
+        if image_node.image != node_image:
+            image_node.image = node_image
+
+    # 有効化したノードを無効に戻す
+    for check_mat in arg_rollback["use_nodes"]:
+        check_mat.use_nodes = False
+
+    return
+
+# マテリアル毎にシェーダーを判定する
+def process_check_shader(arg_state:dict) -> bool:
+    """マテリアル毎にシェーダーを判定する(1単位)
+    ノードを有効化したマテリアルは中断時に無効に戻すため記録する
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 処理するマテリアルの範囲を取得する
+    check_materials = arg_state["materials"]
+    start_num = arg_state["cursor"]
+    end_num = min(start_num + def_modal_chunk_size, len(check_materials))
+
+    for row_num in range(start_num, end_num):
+        check_mat = check_materials[row_num]
+
+        # ノードが無効なマテリアルを記録する
+        if check_mat.use_nodes == False:
+            arg_state["rollback"]["use_nodes"].append(check_mat)
+
+        # シェーダーのノードタイプ毎に分類する
+        shader_idname = check_surface_bsdf.check_surface_shader(arg_material=check_mat)
+        arg_state["shader_rows"].setdefault(shader_idname, []).append(row_num)
+
+    arg_state["cursor"] = end_num
+    arg_state["done_units"] += end_num - start_num
+
+    # 全マテリアルの判定が完了したか確認する
+    if end_num < len(check_materials):
+        return False
+
+    # 比較方法が登録されていないマテリアル数を記録する
+    # (シグネチャを取得しないため、全体の処理単位の数からも除く)
+    skipped_rows = arg_state["shader_rows"].pop(None, [])
+    profile_material_merge.add_profile_counter("materials_skipped", len(skipped_rows))
+    arg_state["total_units"] -= len(skipped_rows)
+
+    # シグネチャを取得する処理単位を作成する
+    for shader_idname, shader_rows in arg_state["shader_rows"].items():
+        for chunk_start in range(0, len(shader_rows), def_modal_chunk_size):
+            arg_state["signature_tasks"].append((shader_idname, shader_rows[chunk_start:chunk_start + def_modal_chunk_size]))
+
+    return True
+
+# 内容が同じ画像の参照をまとめる
+def process_dedup_images(arg_state:dict) -> bool:
+    """内容が同じ画像の参照をまとめる(1単位)
+    中断時に元に戻すため、変更前の画像テクスチャノードの参照を記録する
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 指定されていない場合は処理しない
+    if arg_state["options"]["dedup_images"] == True:
+        # 変更前の参照を記録する
+        arg_state["rollback"]["image_nodes"] = [(image_node, image_node.image)
+            for image_node in dedup_image_content.get_material_image_nodes(arg_materials=arg_state["materials"])]
+
+        # 内容が同じ画像の参照をまとめる
+        dedup_image_content.deduplicate_material_images(arg_materials=arg_state["materials"])
+
+    arg_state["done_units"] += 1
+
+    return True
+
+# マージ前の統計を取得する
+def process_collect_stats(arg_state:dict) -> bool:
+    """マージ前の統計を取得する(1単位)
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 指定されている場合はマージ前の統計を取得する
+    if arg_state["options"]["stats"] == True:
+        arg_state["before_stats"] = stats_material_slots.begin_merge_stats(arg_objects=arg_state["objects"])
+
+    arg_state["done_units"] += 1
+
+    return True
+
+# 分割したマテリアルのシグネチャの行列を取得する
+def process_extract_signature(arg_state:dict) -> bool:
+    """分割したマテリアルのシグネチャの行列を取得する(1単位)
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 全ての処理単位が完了したか確認する
+    if arg_state["cursor"] >= len(arg_state["signature_tasks"]):
+        return True
+
+    # 処理単位のマテリアルのシグネチャの行列を取得する
+    # (ノードは判定の段階で有効化済みのため、ここでは有効化しない)
+    shader_idname, chunk_rows = arg_state["signature_tasks"][arg_state["cursor"]]
+    arg_state["signature_chunks"].setdefault(shader_idname, []).append(comp_material_bsdf.extract_shader_signature(
+        arg_materials=[arg_state["materials"][row_num] for row_num in chunk_rows],
+        arg_shader_idname=shader_idname, arg_use_node=False))
+
+    arg_state["cursor"] += 1
+    arg_state["done_units"] += len(chunk_rows)
+
+    return arg_state["cursor"] >= len(arg_state["signature_tasks"])
+
+# シェーダーのノードタイプ毎に一致する行をまとめる
+def process_group_signature(arg_state:dict) -> bool:
+    """シェーダーのノードタイプ毎に一致する行をまとめる(1単位)
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 全てのノードタイプが完了したか確認する
+    shader_idnames = list(arg_state["shader_rows"].keys())
+    if arg_state["cursor"] >= len(shader_idnames):
+        arg_state["done_units"] += 1
+        return True
+
+    # ノードタイプのマテリアルを取得する
+    shader_idname = shader_idnames[arg_state["cursor"]]
+    shader_rows = np.array(arg_state["shader_rows"][shader_idname])
+    shader_materials = [arg_state["materials"][row_num] for row_num in shader_rows]
+
+    # 分割して取得したシグネチャの行列を連結する
+    # (分割毎のレイアウトが異なる場合は全マテリアルで取得し直す)
+    shader_signature = comp_material_bsdf.concat_shader_signatures(arg_materials=shader_materials,
+        arg_signature_chunks=arg_state["signature_chunks"].pop(shader_idname))
+    if shader_signature == None:
+        shader_signature = comp_material_bsdf.extract_shader_signature(arg_materials=shader_materials,
+            arg_shader_idname=shader_idname, arg_use_node=False)
+
+    # 一致する行をまとめ、分類内の代表行の番号を全体の番号に変換する
+    arg_state["canonical_rows"][shader_rows] = shader_rows[comp_material_bsdf.group_shader_signature(
+        arg_signature=shader_signature, arg_shader_idname=shader_idname,
+        arg_shader_tolerance_dict=arg_state["options"]["tolerance_dict"])]
+
+    arg_state["cursor"] += 1
+
+    return False
+
+# マージ計画を作成する
+def process_create_plan(arg_state:dict) -> bool:
+    """マージ計画を作成する(1単位)
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 代表マテリアルからマージ計画を作成する
+    arg_state["plan"] = plan_material_merge.create_merge_plan_canonical(arg_objects=arg_state["objects"],
+        arg_materials=arg_state["materials"],
+        arg_canonical_materials=[arg_state["materials"][canonical_num] for canonical_num in arg_state["canonical_rows"]])
+
+    arg_state["done_units"] += 1
+
+    return True
+
+# オブジェクト毎に計画を適用する
+def process_apply_plan(arg_state:dict) -> bool:
+    """オブジェクト毎に計画を適用する(1単位)
+    中断時に元に戻すため、適用前のスロット構成をメッシュ毎に1回記録する
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    # 最初の処理単位で計画が適用可能か確認する
+    merge_plan = arg_state["plan"]
+    if arg_state["cursor"] == 0 and plan_material_merge.check_merge_plan(arg_plan=merge_plan) == False:
+        arg_state["result"]["error"] = "Execute : Merge failed."
+        return True
+
+    # 処理するオブジェクトの範囲を取得する
+    object_plans = merge_plan["objects"]
+    start_num = arg_state["cursor"]
+    end_num = min(start_num + def_modal_chunk_size, len(object_plans))
+
+    rollback = arg_state["rollback"]
+    for object_plan in object_plans[start_num:end_num]:
+        # 対象オブジェクトを取得する
+        target_object = plan_material_merge.get_plan_object(arg_object_plan=object_plan)
+        if target_object == None:
+            arg_state["result"]["error"] = "Execute : Merge failed."
+            return True
+
+        # 適用前のスロット構成を記録する
+        mesh_pointer = target_object.data.as_pointer()
+        if mesh_pointer not in rollback["snapshot_meshes"]:
+            rollback["snapshot_meshes"].add(mesh_pointer)
+            rollback["snapshots"].append(control_materialslot_utilities.get_materialslot_snapshot(arg_object=target_object))
+
+        # 計画を適用する
+        if plan_material_merge.apply_object_plan(arg_plan=merge_plan, arg_object_plan=object_plan,
+          arg_applied_meshes=arg_state["applied_meshes"]) == False:
+            arg_state["result"]["error"] = "Execute : Merge failed."
+            return True
+
+    arg_state["cursor"] = end_num
+    arg_state["done_units"] += end_num - start_num
+
+    return end_num >= len(object_plans)
+
+# 統計の収集、メッシュの作成、未使用データの削除を行う
+def process_finish(arg_state:dict) -> bool:
+    """統計の収集、メッシュの作成、未使用データの削除を行う(1単位)
+    この段階の後は中断できない
+
+    Args:
+        arg_state (dict): 実行状態
+
+    Returns:
+        bool: 段階が完了したか
+    """
+
+    merge_options = arg_state["options"]
+    merge_result = arg_state["result"]
+
+    # マージ後の統計を取得し、削減結果を格納する
+    if merge_options["stats"] == True:
+        merge_result["stats"] = stats_material_slots.collect_merge_stats(arg_objects=arg_state["objects"],
+            arg_before_stats=arg_state["before_stats"])
+
+    # 指定に従ってマージ後のマテリアル毎のメッシュを作成する
+    if merge_options["batch_mode"] != 'NONE':
+        batch_objects = batch_material_meshes.batch_material_meshes(arg_objects=arg_state["objects"],
+            arg_batch_mode=merge_options["batch_mode"])
+        merge_result["batch"] = [batch_object.name for batch_object in batch_objects]
+
+    # 指定に従ってマージ前のスロットのマテリアルのうち未使用となったデータを一括で削除する
+    if merge_options["cleanup"] == True:
+        merge_result["cleanup"] = cleanup_orphan_data.cleanup_orphan_materials(arg_materials=arg_state["materials"])
+
+    arg_state["done_units"] += 1
+
+    return True
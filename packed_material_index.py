@@ -0,0 +1,260 @@
+# 各種ライブラリインポート
+# (Blender 外のコマンドラインからも読み込むため、bpy とアドオンの他のモジュールには依存しない)
+import json
+import os
+import struct
+import numpy as np
+
+# 固定長レコードの索引ファイルの識別子
+def_packed_index_magic = b"BSDFPIDX"
+
+# 索引ファイルの形式のバージョン
+# (レコードやシグネチャのハッシュの形式を変更した場合は値を更新し、古い索引を無効にする)
+def_packed_index_version = 2
+
+# 索引ファイルの拡張子
+def_packed_index_suffix = ".bsdfidx"
+
+# 識別子、バージョン、ヘッダーのバイト数を格納する先頭部分の形式
+def_packed_prefix_format = "<8sII"
+
+# ハッシュの列とレコードの配列の開始位置の境界
+# (numpy.memmap で開いた配列をページ単位で参照できるよう揃える)
+def_packed_index_alignment = 4096
+
+# シグネチャの記録を固定長レコードの索引ファイルに書き出す
+def write_packed_index(arg_index_path:str, arg_filepaths:list, arg_signature_records:list) -> int:
+    """シグネチャの記録を固定長レコードの索引ファイルに書き出す
+    先頭部分と JSON のヘッダーに続けて、昇順に並べた 64bit ハッシュの列、同じ順のレコードの配列、マテリアル名の UTF-8 文字列を連結する
+    レコードは float32 の値の行、リンクが接続された列のビットマスク、ファイル番号、シェーダー番号、マテリアル名の位置を持つ
+
+    Args:
+        arg_index_path (str): 索引ファイルのパス
+        arg_filepaths (list): 記録元の .blend ファイルのパスのリスト
+        arg_signature_records (list): [ファイル番号, マテリアル名, シグネチャのハッシュ, シェーダーのノードタイプ,
+                                      値のリスト, リンクが接続された列番号のリスト] のリスト
+
+    Returns:
+        int: 書き出したレコード数
+    """
+
+    # シェーダーのノードタイプに番号を付け、最大の列数でレコードの形式を決定する
+    record_count = len(arg_signature_records)
+    shader_idnames = sorted({signature_record[3] for signature_record in arg_signature_records})
+    shader_numbers = {shader_idname: shader_number for shader_number, shader_idname in enumerate(shader_idnames)}
+    column_count = max([len(signature_record[4]) for signature_record in arg_signature_records], default=0)
+    record_dtype = get_packed_record_dtype(arg_column_count=column_count)
+
+    # 値の行列とリンク接続の行列を作成する(列数の少ないシェーダーの残りの列は 0 とする)
+    value_matrix = np.zeros((record_count, column_count), dtype=np.float32)
+    linked_matrix = np.zeros((record_count, column_count), dtype=bool)
+    for record_num, signature_record in enumerate(arg_signature_records):
+        value_matrix[record_num, :len(signature_record[4])] = signature_record[4]
+        linked_matrix[record_num, signature_record[5]] = True
+
+    # マテリアル名を連結し、レコード毎の位置と長さを求める
+    name_bytes_list = [signature_record[1].encode("utf-8") for signature_record in arg_signature_records]
+    name_lengths = np.array([len(name_bytes) for name_bytes in name_bytes_list], dtype=np.uint64)
+    name_offsets = np.cumsum(name_lengths) - name_lengths
+
+    # レコードの配列を作成する
+    packed_records = np.zeros(record_count, dtype=record_dtype)
+    packed_records["file"] = [signature_record[0] for signature_record in arg_signature_records]
+    packed_records["shader"] = [shader_numbers[signature_record[3]] for signature_record in arg_signature_records]
+    packed_records["name_offset"] = name_offsets
+    packed_records["name_length"] = name_lengths
+    packed_records["linked"] = np.packbits(linked_matrix, axis=1, bitorder="little")
+    packed_records["values"] = value_matrix
+
+    # ハッシュの昇順にレコードを並べる(同じハッシュは記録順を保つ)
+    signature_hashes = np.array([get_signature_digest_hash(arg_signature_digest=signature_record[2])
+        for signature_record in arg_signature_records], dtype=np.uint64)
+    sort_order = np.argsort(signature_hashes, kind="stable")
+
+    # ヘッダーを作成する
+    header_bytes = json.dumps({
+        "count": record_count,
+        "columns": column_count,
+        "shaders": shader_idnames,
+        "files": list(arg_filepaths),
+        "names_size": int(name_lengths.sum()),
+    }).encode("utf-8")
+
+    # 先頭部分、ヘッダー、ハッシュの列、レコードの配列、マテリアル名の順に書き出す
+    hash_offset, record_offset, name_offset = get_packed_offsets(arg_header_size=len(header_bytes),
+        arg_record_count=record_count, arg_record_dtype=record_dtype)
+    with open(arg_index_path, "wb") as index_file:
+        index_file.write(struct.pack(def_packed_prefix_format,
+            def_packed_index_magic, def_packed_index_version, len(header_bytes)))
+        index_file.write(header_bytes)
+        index_file.write(b"\0" * (hash_offset - index_file.tell()))
+        index_file.write(signature_hashes[sort_order].astype("<u8").tobytes())
+        index_file.write(b"\0" * (record_offset - index_file.tell()))
+        index_file.write(packed_records[sort_order].tobytes())
+        index_file.write(b"".join(name_bytes_list))
+
+    return record_count
+
+# 固定長レコードの索引ファイルを開く
+def open_packed_index(arg_index_path:str) -> dict:
+    """固定長レコードの索引ファイルを開く
+    ハッシュの列、レコードの配列、マテリアル名を numpy.memmap で開くため、
+    索引の規模に依らず即座に開くことができ、参照した範囲のみが読み込まれる
+
+    Args:
+        arg_index_path (str): 索引ファイルのパス
+
+    Returns:
+        dict: 開いた索引({"filepath": 絶対パス, "files": 記録元のファイルのパスのリスト,
+                          "shaders": シェーダーのノードタイプのリスト, "columns": 値の列数,
+                          "hashes": ハッシュの列, "records": レコードの配列, "names": マテリアル名のバイト列}、
+                          索引ファイルを読み込めない場合 None)
+    """
+
+    # 先頭部分とヘッダーを読み込む
+    index_path = os.path.abspath(arg_index_path)
+    prefix_size = struct.calcsize(def_packed_prefix_format)
+    try:
+        with open(index_path, "rb") as index_file:
+            index_magic, index_version, header_size = struct.unpack(def_packed_prefix_format,
+                index_file.read(prefix_size))
+            if index_magic != def_packed_index_magic or index_version != def_packed_index_version:
+                return None
+            index_header = json.loads(index_file.read(header_size).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    # ハッシュの列、レコードの配列、マテリアル名の位置を求める
+    record_count = index_header["count"]
+    record_dtype = get_packed_record_dtype(arg_column_count=index_header["columns"])
+    hash_offset, record_offset, name_offset = get_packed_offsets(arg_header_size=header_size,
+        arg_record_count=record_count, arg_record_dtype=record_dtype)
+
+    # 各部分を開く(空の配列は numpy.memmap で開けないため作成する)
+    signature_hashes = np.zeros(0, dtype="<u8")
+    packed_records = np.zeros(0, dtype=record_dtype)
+    name_bytes = np.zeros(0, dtype=np.uint8)
+    if record_count > 0:
+        signature_hashes = np.memmap(index_path, dtype="<u8", mode="r", offset=hash_offset, shape=(record_count,))
+        packed_records = np.memmap(index_path, dtype=record_dtype, mode="r", offset=record_offset, shape=(record_count,))
+    if index_header["names_size"] > 0:
+        name_bytes = np.memmap(index_path, dtype=np.uint8, mode="r", offset=name_offset,
+            shape=(index_header["names_size"],))
+
+    return {
+        "filepath": index_path,
+        "files": index_header["files"],
+        "shaders": index_header["shaders"],
+        "columns": index_header["columns"],
+        "hashes": signature_hashes,
+        "records": packed_records,
+        "names": name_bytes,
+    }
+
+# シグネチャのハッシュに一致するレコードを検索する
+def find_packed_records(arg_packed_index:dict, arg_signature_digest:str) -> list:
+    """シグネチャのハッシュに一致するレコードを検索する
+    昇順に並べたハッシュの列を二分探索するため、参照するのは探索経路のページのみとなる
+    (64bit のハッシュが偶然一致したレコードも含まれるため、厳密な比較が必要な場合は値の行とリンク接続で確認する)
+
+    Args:
+        arg_packed_index (dict): open_packed_index の戻り値
+        arg_signature_digest (str): シグネチャのハッシュ
+
+    Returns:
+        list: 一致したレコードの番号のリスト
+    """
+
+    # ハッシュの列を二分探索する
+    signature_hash = np.uint64(get_signature_digest_hash(arg_signature_digest=arg_signature_digest))
+    first_num = int(np.searchsorted(arg_packed_index["hashes"], signature_hash, side="left"))
+    last_num = int(np.searchsorted(arg_packed_index["hashes"], signature_hash, side="right"))
+
+    return list(range(first_num, last_num))
+
+# 指定番号のレコードを取得する
+def get_packed_record(arg_packed_index:dict, arg_record_number:int) -> dict:
+    """指定番号のレコードを取得する
+
+    Args:
+        arg_packed_index (dict): open_packed_index の戻り値
+        arg_record_number (int): レコードの番号
+
+    Returns:
+        dict: レコード({"filepath": 記録元のファイルのパス, "name": マテリアル名, "shader": シェーダーのノードタイプ,
+                        "values": 値の行, "linked_columns": リンクが接続された列番号の配列})
+    """
+
+    # レコードを取得する
+    packed_record = arg_packed_index["records"][arg_record_number]
+
+    # マテリアル名を取得する
+    name_offset = int(packed_record["name_offset"])
+    material_name = arg_packed_index["names"][name_offset:name_offset + int(packed_record["name_length"])]
+
+    # リンク接続のビットマスクを列番号に戻す
+    linked_row = np.unpackbits(packed_record["linked"], bitorder="little")[:arg_packed_index["columns"]]
+
+    return {
+        "filepath": arg_packed_index["files"][int(packed_record["file"])],
+        "name": material_name.tobytes().decode("utf-8"),
+        "shader": arg_packed_index["shaders"][int(packed_record["shader"])],
+        "values": np.array(packed_record["values"]),
+        "linked_columns": np.flatnonzero(linked_row),
+    }
+
+# 指定列数のレコードの形式を取得する
+def get_packed_record_dtype(arg_column_count:int) -> np.dtype:
+    """指定列数のレコードの形式を取得する
+
+    Args:
+        arg_column_count (int): 値の列数
+
+    Returns:
+        np.dtype: レコードの形式
+    """
+
+    return np.dtype([
+        ("name_offset", "<u8"),
+        ("file", "<u4"),
+        ("name_length", "<u2"),
+        ("shader", "<u2"),
+        ("linked", "u1", ((arg_column_count + 7) // 8,)),
+        ("values", "<f4", (arg_column_count,)),
+    ])
+
+# ハッシュの列、レコードの配列、マテリアル名の開始位置を求める
+def get_packed_offsets(arg_header_size:int, arg_record_count:int, arg_record_dtype:np.dtype) -> tuple:
+    """ハッシュの列、レコードの配列、マテリアル名の開始位置を求める
+
+    Args:
+        arg_header_size (int): ヘッダーのバイト数
+        arg_record_count (int): レコード数
+        arg_record_dtype (np.dtype): レコードの形式
+
+    Returns:
+        tuple: (ハッシュの列, レコードの配列, マテリアル名) の開始位置の組
+    """
+
+    # 境界に揃えた位置を求める
+    align_offset = lambda arg_offset: -(-arg_offset // def_packed_index_alignment) * def_packed_index_alignment
+
+    hash_offset = align_offset(struct.calcsize(def_packed_prefix_format) + arg_header_size)
+    record_offset = align_offset(hash_offset + arg_record_count * 8)
+    name_offset = record_offset + arg_record_count * arg_record_dtype.itemsize
+
+    return (hash_offset, record_offset, name_offset)
+
+# シグネチャのハッシュから 64bit のハッシュを求める
+def get_signature_digest_hash(arg_signature_digest:str) -> int:
+    """シグネチャのハッシュから 64bit のハッシュを求める
+    (シグネチャのハッシュの先頭 8 バイトを使用する)
+
+    Args:
+        arg_signature_digest (str): シグネチャのハッシュ(16進数の文字列)
+
+    Returns:
+        int: 64bit のハッシュ
+    """
+
+    return int(arg_signature_digest[:16], 16)
@@ -0,0 +1,329 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "comp_material_bsdf" in locals():
+        importlib.reload(comp_material_bsdf)
+    if "control_materialslot_utilities" in locals():
+        importlib.reload(control_materialslot_utilities)
+import bpy
+from . import comp_material_bsdf
+from . import control_materialslot_utilities
+
+# マージ計画の形式のバージョン
+# (マテリアルとオブジェクトをライブラリ名を含む名前で識別する形式)
+def_merge_plan_version = 3
+
+# 指定した複数オブジェクトのマテリアルマージの計画を作成する
+def create_merge_plan(arg_objects:list, arg_shader_tolerance_dict:dict=None) -> dict:
+    """指定した複数オブジェクトのマテリアルマージの計画を作成する
+    bpy のデータを変更せずに、一致するマテリアルの分類とスロットの変換テーブル、最終的なスロット順を求める
+    計画は名前のみを保持する辞書のため、保存や比較にそのまま利用できる
+    (ノードが無効なマテリアルはノードを有効化せず、マージしないマテリアルとして扱う)
+    ライブラリのデータと同名のローカルのデータを区別するため、マテリアルとオブジェクトはライブラリ名を含む名前(name_full)で識別する
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_shader_tolerance_dict (dict, optional): シェーダーのノードタイプ毎の許容誤差(None の場合は完全一致)
+
+    Returns:
+        dict: マージ計画
+            {"version": 形式のバージョン,
+             "materials": 出現順のマテリアル名のリスト,
+             "references": マテリアル名をキーとした [名前, ライブラリのパス(ローカルの場合 None)],
+             "canonical": マテリアル名をキーとした代表マテリアル名,
+             "classes": 代表マテリアル名をキーとした一致するマテリアル名のリスト(2つ以上のもののみ),
+             "objects": [{"name": ライブラリ名を含むオブジェクト名,
+                          "reference": [オブジェクト名, ライブラリのパス(ローカルの場合 None)],
+                          "slot_materials": 現在のスロット順のマテリアル名のリスト(空のスロットは None),
+                          "slot_remap": 旧スロット番号毎の新しいスロット番号のリスト,
+                          "final_slots": 最終的なスロット順のマテリアル名のリスト}, ...]}
+    """
+
+    # 対象のメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in arg_objects if check_object.type == 'MESH']
+
+    # 全スロットのマテリアルを出現順に重複なく収集する
+    unique_materials = comp_material_bsdf.get_slot_materials_unique(arg_objects=target_objects)
+
+    # マテリアル毎の代表マテリアルを取得する(ノードの有効化は行わない)
+    canonical_materials = comp_material_bsdf.get_canonical_materials(arg_materials=unique_materials,
+        arg_shader_tolerance_dict=arg_shader_tolerance_dict, arg_use_node=False)
+
+    # 代表マテリアルからマージ計画を作成する
+    return create_merge_plan_canonical(arg_objects=target_objects, arg_materials=unique_materials,
+        arg_canonical_materials=canonical_materials)
+
+# 指定した代表マテリアルへ差し替えるマージ計画を作成する
+def create_merge_plan_canonical(arg_objects:list, arg_materials:list, arg_canonical_materials:list) -> dict:
+    """指定した代表マテリアルへ差し替えるマージ計画を作成する
+    代表マテリアルを指定していないスロットのマテリアルは差し替えない
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_materials (list): 差し替えを判定したマテリアルのリスト
+        arg_canonical_materials (list): マテリアル毎の代表マテリアルのリスト
+
+    Returns:
+        dict: マージ計画(create_merge_plan と同じ形式)
+    """
+
+    # 対象のメッシュオブジェクトを取得する
+    target_objects = [check_object for check_object in arg_objects if check_object.type == 'MESH']
+
+    # マテリアル名をキーとして代表マテリアル名を保持する
+    canonical_dict = {get_plan_material_key(arg_material=check_mat): get_plan_material_key(arg_material=canonical_mat)
+        for check_mat, canonical_mat in zip(arg_materials, arg_canonical_materials)}
+
+    # マテリアル名から参照するための名前とライブラリのパスを保持する
+    reference_dict = {}
+    for check_mat in list(arg_materials) + list(arg_canonical_materials):
+        reference_dict.setdefault(get_plan_material_key(arg_material=check_mat),
+            get_plan_reference(arg_id=check_mat))
+
+    # 代表マテリアル毎に一致するマテリアルを分類する
+    class_dict = {}
+    for material_name, canonical_name in canonical_dict.items():
+        class_dict.setdefault(canonical_name, []).append(material_name)
+
+    # オブジェクト毎のスロットの変換を求める
+    object_plans = []
+    for target_object in target_objects:
+        # 現在のスロットのマテリアル名を取得する(空のスロットは None)
+        slot_names = get_plan_slot_keys(arg_object=target_object)
+        for check_material_slot in target_object.material_slots:
+            if check_material_slot.material != None:
+                reference_dict.setdefault(get_plan_material_key(arg_material=check_material_slot.material),
+                    get_plan_reference(arg_id=check_material_slot.material))
+
+        # スロット毎のポリゴン数を取得する
+        slot_polygons = None
+        if len(slot_names) > 0:
+            slot_polygons = control_materialslot_utilities.get_slot_polygon_counts(
+                arg_mesh=target_object.data, arg_slot_count=len(slot_names)).tolist()
+
+        # 代表マテリアルに差し替えた後のスロット構成を求める
+        # (ポリゴンが割り当てられていないスロットと空のスロットは削除する)
+        final_names, remap_list = control_materialslot_utilities.get_compact_slot_layout(
+            arg_slot_names=[canonical_dict.get(slot_name, slot_name) for slot_name in slot_names],
+            arg_slot_polygons=slot_polygons)
+
+        object_plans.append({
+            "name": target_object.name_full,
+            "reference": get_plan_reference(arg_id=target_object),
+            "slot_materials": slot_names,
+            "slot_remap": remap_list,
+            "final_slots": final_names,
+        })
+
+    return {
+        "version": def_merge_plan_version,
+        "materials": [get_plan_material_key(arg_material=check_mat) for check_mat in arg_materials],
+        "references": reference_dict,
+        "canonical": canonical_dict,
+        "classes": {canonical_name: member_names
+            for canonical_name, member_names in class_dict.items() if len(member_names) > 1},
+        "objects": object_plans,
+    }
+
+# マージ計画が現在のデータに適用可能か確認する
+def check_merge_plan(arg_plan:dict) -> bool:
+    """マージ計画が現在のデータに適用可能か確認する
+    計画の作成後にオブジェクトやスロットが変更された場合は適用できない
+
+    Args:
+        arg_plan (dict): マージ計画
+
+    Returns:
+        bool: 適用可能か否か
+    """
+
+    # 形式のバージョンが一致するか確認する
+    if arg_plan.get("version") != def_merge_plan_version:
+        return False
+
+    # 代表マテリアルが全て存在するか確認する
+    for canonical_name in set(arg_plan["canonical"].values()):
+        if get_plan_material(arg_plan=arg_plan, arg_material_key=canonical_name) == None:
+            return False
+
+    # オブジェクト毎にスロットが計画作成時から変更されていないか確認する
+    for object_plan in arg_plan["objects"]:
+        target_object = get_plan_object(arg_object_plan=object_plan)
+        if target_object == None or target_object.type != 'MESH':
+            return False
+
+        # スロットのマテリアル名が一致するか確認する
+        if get_plan_slot_keys(arg_object=target_object) != object_plan["slot_materials"]:
+            return False
+
+    return True
+
+# マージ計画を適用する
+def apply_merge_plan(arg_plan:dict) -> bool:
+    """マージ計画を適用する
+    オブジェクト毎にポリゴンのマテリアル番号とスロット構成を一括で書き換える
+
+    Args:
+        arg_plan (dict): マージ計画
+
+    Returns:
+        bool: 実行正否(計画が現在のデータに適用できない場合は False)
+    """
+
+    # 計画が適用可能か確認する
+    if check_merge_plan(arg_plan=arg_plan) == False:
+        return False
+
+    # 適用済みのメッシュのポインタ値
+    # (メッシュを共有するオブジェクトに同じ変換を重ねて適用しない)
+    applied_meshes = set()
+
+    # オブジェクト毎に計画を適用する
+    for object_plan in arg_plan["objects"]:
+        if apply_object_plan(arg_plan=arg_plan, arg_object_plan=object_plan, arg_applied_meshes=applied_meshes) == False:
+            return False
+
+    return True
+
+# マージ計画のうち1つのオブジェクトの計画を適用する
+def apply_object_plan(arg_plan:dict, arg_object_plan:dict, arg_applied_meshes:set) -> bool:
+    """マージ計画のうち1つのオブジェクトの計画を適用する
+    計画が適用可能かは確認しないため、事前に check_merge_plan で確認する
+
+    Args:
+        arg_plan (dict): マージ計画
+        arg_object_plan (dict): 適用するオブジェクトの計画(arg_plan["objects"] の要素)
+        arg_applied_meshes (set): 適用済みのメッシュのポインタ値(適用したメッシュを追加する)
+
+    Returns:
+        bool: 実行正否
+    """
+
+    # 対象オブジェクトを取得する
+    target_object = get_plan_object(arg_object_plan=arg_object_plan)
+    if target_object == None:
+        return False
+
+    # オブジェクトにリンクされたスロットがあるか確認する
+    if any(check_material_slot.link != 'DATA' for check_material_slot in target_object.material_slots):
+        # スロット毎にマテリアルを差し替えてから一括の整理処理を実行する
+        # (オブジェクト側のマテリアルはオブジェクト毎に差し替えるため、メッシュを共有していても個別に処理する)
+        for check_material_slot, slot_name in zip(target_object.material_slots, arg_object_plan["slot_materials"]):
+            if slot_name == None:
+                continue
+            canonical_mat = get_plan_material(arg_plan=arg_plan,
+                arg_material_key=arg_plan["canonical"].get(slot_name, slot_name))
+            if check_material_slot.material != canonical_mat:
+                check_material_slot.material = canonical_mat
+        return control_materialslot_utilities.compact_materialslot_bulk(arg_object=target_object) != False
+
+    # 適用済みのメッシュか確認する
+    mesh_pointer = target_object.data.as_pointer()
+    if mesh_pointer in arg_applied_meshes:
+        return True
+    arg_applied_meshes.add(mesh_pointer)
+
+    # スロットが存在しない場合は処理しない
+    if len(arg_object_plan["slot_materials"]) == 0:
+        return True
+
+    # 最終的なスロット構成を一括で適用する
+    return control_materialslot_utilities.apply_materialslot_layout(arg_object=target_object,
+        arg_final_materials=[get_plan_material(arg_plan=arg_plan, arg_material_key=final_name)
+            if final_name != None else None for final_name in arg_object_plan["final_slots"]],
+        arg_remap_list=arg_object_plan["slot_remap"])
+
+# マージ計画でマテリアルを識別する名前を取得する
+def get_plan_material_key(arg_material:bpy.types.Material) -> str:
+    """マージ計画でマテリアルを識別する名前を取得する
+    リンクしたライブラリのマテリアルはローカルの同名のマテリアルと区別するため、ライブラリ名を含む名前とする
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        str: ライブラリ名を含む名前
+    """
+
+    return arg_material.name_full
+
+# 指定オブジェクトのスロット毎のマテリアルを識別する名前を取得する
+def get_plan_slot_keys(arg_object:bpy.types.Object) -> list:
+    """指定オブジェクトのスロット毎のマテリアルを識別する名前を取得する
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+
+    Returns:
+        list: スロット順のマテリアルを識別する名前のリスト(空のスロットは None)
+    """
+
+    return [get_plan_material_key(arg_material=check_material_slot.material)
+        if check_material_slot.material != None else None for check_material_slot in arg_object.material_slots]
+
+# マージ計画のマテリアルを識別する名前からマテリアルを取得する
+def get_plan_material(arg_plan:dict, arg_material_key:str) -> bpy.types.Material:
+    """マージ計画のマテリアルを識別する名前からマテリアルを取得する
+    名前とライブラリのパスの組で検索し、同名のローカルのマテリアルとライブラリのマテリアルを取り違えない
+
+    Args:
+        arg_plan (dict): マージ計画
+        arg_material_key (str): マテリアルを識別する名前
+
+    Returns:
+        bpy.types.Material: マテリアル(存在しない場合 None)
+    """
+
+    # 名前とライブラリのパスを取得する
+    material_reference = arg_plan["references"].get(arg_material_key)
+    if material_reference == None:
+        return None
+
+    return bpy.data.materials.get((material_reference[0], material_reference[1]))
+
+# マージ計画でデータブロックを参照するための名前とライブラリのパスを取得する
+def get_plan_reference(arg_id:bpy.types.ID) -> list:
+    """マージ計画でデータブロックを参照するための名前とライブラリのパスを取得する
+
+    Args:
+        arg_id (bpy.types.ID): 指定データブロック(マテリアル、オブジェクト)
+
+    Returns:
+        list: [名前, ライブラリのパス(ローカルの場合 None)]
+    """
+
+    return [arg_id.name, arg_id.library.filepath if arg_id.library != None else None]
+
+# オブジェクトの計画の対象オブジェクトを取得する
+def get_plan_object(arg_object_plan:dict) -> bpy.types.Object:
+    """オブジェクトの計画の対象オブジェクトを取得する
+    名前とライブラリのパスの組で検索し、同名のローカルのオブジェクトとライブラリのオブジェクトを取り違えない
+
+    Args:
+        arg_object_plan (dict): オブジェクトの計画(マージ計画の "objects" の要素)
+
+    Returns:
+        bpy.types.Object: オブジェクト(存在しない場合 None)
+    """
+
+    object_reference = arg_object_plan["reference"]
+    return bpy.data.objects.get((object_reference[0], object_reference[1]))
+
+# マージ計画の概要を取得する
+def get_merge_plan_summary(arg_plan:dict) -> dict:
+    """マージ計画の概要を取得する
+
+    Args:
+        arg_plan (dict): マージ計画
+
+    Returns:
+        dict: 概要({"material_count": マテリアル数, "merged_count": マージされるマテリアル数,
+                    "slots_before": 実行前のスロット数, "slots_after": 実行後のスロット数})
+    """
+
+    return {
+        "material_count": len(arg_plan["materials"]),
+        "merged_count": sum(len(member_names) - 1 for member_names in arg_plan["classes"].values()),
+        "slots_before": sum(len(object_plan["slot_materials"]) for object_plan in arg_plan["objects"]),
+        "slots_after": sum(len(object_plan["final_slots"]) for object_plan in arg_plan["objects"]),
+    }
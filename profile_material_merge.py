@@ -0,0 +1,172 @@
+# 各種ライブラリインポート
+import time
+import collections
+
+# 計測結果に含めるカウンタ名(値が 0 の場合も結果に含める)
+def_profile_counter_names = [
+    "materials_checked",
+    "materials_skipped",
+    "library_matches",
+    "datablocks_removed",
+    "batch_objects",
+    "comparisons",
+    "operator_calls",
+    "slots_removed",
+]
+
+# 実行中の計測状態
+# 実行範囲外では None として計測しない
+# 計測時は {"stages": 段階名をキーとした経過時間(秒), "counters": カウンタ名をキーとした値,
+#           "stage_starts": 計測中の段階名をキーとした開始時刻,
+#           "counted_keys": カウンタ名をキーとした加算済みの対象のキーの集合}
+merge_profile_state = None
+
+# 計測を開始する
+def begin_merge_profile():
+    """計測を開始する
+    開始から終了までの間、各段階の経過時間と各カウンタの値を記録する
+    """
+
+    # グローバル変数の計測状態を参照する
+    global merge_profile_state
+
+    # 空の計測状態を作成する
+    merge_profile_state = {
+        "stages": collections.OrderedDict(),
+        "counters": collections.Counter({counter_name: 0 for counter_name in def_profile_counter_names}),
+        "stage_starts": {},
+        "counted_keys": {},
+    }
+
+    return
+
+# 計測を終了する
+def end_merge_profile() -> dict:
+    """計測を終了する
+
+    Returns:
+        dict: 計測結果({"stages": {段階名: 秒}, "counters": {カウンタ名: 値}}、未開始の場合 None)
+    """
+
+    # グローバル変数の計測状態を参照する
+    global merge_profile_state
+
+    # 計測が開始されているか確認する
+    if merge_profile_state == None:
+        return None
+
+    # 計測結果を作成する
+    profile_result = {
+        "stages": dict(merge_profile_state["stages"]),
+        "counters": dict(merge_profile_state["counters"]),
+    }
+
+    # 計測を無効にする
+    merge_profile_state = None
+
+    return profile_result
+
+# 段階の計測を開始する
+def start_profile_stage(arg_stage_name:str):
+    """段階の計測を開始する
+
+    Args:
+        arg_stage_name (str): 段階名
+    """
+
+    # 計測が開始されているか確認する
+    if merge_profile_state == None:
+        return
+
+    # 開始時刻を記録する
+    merge_profile_state["stage_starts"][arg_stage_name] = time.perf_counter()
+
+    return
+
+# 段階の計測を終了する
+def stop_profile_stage(arg_stage_name:str):
+    """段階の計測を終了する
+    同じ段階を複数回計測した場合は経過時間を合算する
+
+    Args:
+        arg_stage_name (str): 段階名
+    """
+
+    # 計測が開始されているか確認する
+    if merge_profile_state == None:
+        return
+
+    # 開始時刻を取得する
+    start_time = merge_profile_state["stage_starts"].pop(arg_stage_name, None)
+    if start_time == None:
+        return
+
+    # 経過時間を加算する
+    stage_dict = merge_profile_state["stages"]
+    stage_dict[arg_stage_name] = stage_dict.get(arg_stage_name, 0.0) + (time.perf_counter() - start_time)
+
+    return
+
+# カウンタに値を加算する
+def add_profile_counter(arg_counter_name:str, arg_count:int=1):
+    """カウンタに値を加算する
+
+    Args:
+        arg_counter_name (str): カウンタ名
+        arg_count (int, optional): 加算する値
+    """
+
+    # 計測が開始されているか確認する
+    if merge_profile_state == None:
+        return
+
+    # カウンタに加算する
+    merge_profile_state["counters"][arg_counter_name] += int(arg_count)
+
+    return
+
+# 対象毎に1回のみカウンタに加算する
+def add_profile_counter_once(arg_counter_name:str, arg_key):
+    """対象毎に1回のみカウンタに加算する
+    同じ対象を複数回処理しても、計測の開始から終了までの間に1回のみ加算する
+
+    Args:
+        arg_counter_name (str): カウンタ名
+        arg_key (hashable): 対象のキー(マテリアルのポインタ値など)
+    """
+
+    # 計測が開始されているか確認する
+    if merge_profile_state == None:
+        return
+
+    # 加算済みの対象か確認する
+    counted_keys = merge_profile_state["counted_keys"].setdefault(arg_counter_name, set())
+    if arg_key in counted_keys:
+        return
+    counted_keys.add(arg_key)
+
+    # カウンタに加算する
+    merge_profile_state["counters"][arg_counter_name] += 1
+
+    return
+
+# 計測結果をレポート用の文字列に変換する
+def format_merge_profile(arg_profile:dict) -> str:
+    """計測結果をレポート用の文字列に変換する
+
+    Args:
+        arg_profile (dict): 計測結果
+
+    Returns:
+        str: レポート用の文字列
+    """
+
+    # 段階毎の経過時間を並べる
+    stage_texts = ["{} {:.3f}s".format(stage_name, stage_seconds)
+        for stage_name, stage_seconds in arg_profile["stages"].items()]
+
+    # カウンタの値を並べる
+    counter_texts = ["{} {}".format(counter_name, counter_value)
+        for counter_name, counter_value in arg_profile["counters"].items()]
+
+    return "Profile : " + ", ".join(stage_texts + counter_texts)
@@ -0,0 +1,69 @@
+# 各種ライブラリインポート
+import bpy
+
+# 登録済みのサーフェスシェーダーの比較方法
+# ノードタイプ(bl_idname)をキーとして
+# {"inputs": 比較対象とする入力端子のリスト, "extractor": シグネチャの行列を取得する関数} を保持する
+# 抽出関数は extractor(arg_materials, arg_inputname_list, arg_shader_idname, arg_use_node) の形式で呼び出し、
+# extract_material_signature.extract_signature_matrix と同じ形式の組を返す
+surface_shader_registry = {}
+
+# サーフェスシェーダーの比較方法を登録する
+def register_surface_shader(arg_shader_idname:str, arg_inputname_list:list, arg_extractor):
+    """サーフェスシェーダーの比較方法を登録する
+    登録済みのノードタイプを指定した場合は比較方法を置き換える
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ(bl_idname)
+        arg_inputname_list (list): 比較対象とする入力端子の名前、または、識別子のリスト
+            (同名の入力端子が複数ある場合は "Shader_001" のように識別子で指定する、
+             None の場合は雛形のノードから検出した比較できる全ての入力端子)
+        arg_extractor (function): シグネチャの行列を取得する関数
+    """
+
+    # 比較方法を登録する
+    surface_shader_registry[arg_shader_idname] = {
+        "inputs": list(arg_inputname_list) if arg_inputname_list != None else None,
+        "extractor": arg_extractor,
+    }
+
+    return
+
+# サーフェスシェーダーの比較方法の登録を解除する
+def unregister_surface_shader(arg_shader_idname:str):
+    """サーフェスシェーダーの比較方法の登録を解除する
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ(bl_idname)
+    """
+
+    # 登録を解除する(未登録の場合は何もしない)
+    surface_shader_registry.pop(arg_shader_idname, None)
+
+    return
+
+# 指定ノードタイプのサーフェスシェーダーの比較方法を取得する
+def get_surface_shader(arg_shader_idname:str) -> dict:
+    """指定ノードタイプのサーフェスシェーダーの比較方法を取得する
+
+    Args:
+        arg_shader_idname (str): シェーダーノードのノードタイプ(bl_idname)
+
+    Returns:
+        dict: 比較方法(未登録の場合 None)
+    """
+
+    return surface_shader_registry.get(arg_shader_idname)
+
+# 指定ノードが比較方法を登録済みのサーフェスシェーダーかチェックする
+def check_isnode_registered(arg_node:bpy.types.Node) -> bool:
+    """指定ノードが比較方法を登録済みのサーフェスシェーダーかチェックする
+
+    Args:
+        arg_node (bpy.types.Node): 指定ノード
+
+    Returns:
+        bool: 登録済みか否か
+    """
+
+    return arg_node.bl_idname in surface_shader_registry
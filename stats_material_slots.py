@@ -0,0 +1,181 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "control_materialslot_utilities" in locals():
+        importlib.reload(control_materialslot_utilities)
+import bpy
+import csv
+import json
+import os
+import numpy as np
+from . import control_materialslot_utilities
+
+# CSV に書き出す列名
+# (スロット毎のポリゴン数は ";" 区切りで1列にまとめる)
+def_stats_csv_columns = [
+    "name",
+    "polygons",
+    "slots_before",
+    "slots_after",
+    "draw_calls_before",
+    "draw_calls_after",
+    "draw_calls_saved",
+    "slot_polygons",
+]
+
+# パネルに表示する削減数の多いオブジェクトの数
+def_stats_panel_rows = 5
+
+# 直前に実行したマージの統計
+# 未実行の場合は None とし、実行後は collect_merge_stats の戻り値を保持する
+last_merge_stats = None
+
+# 指定オブジェクトのスロット毎のポリゴン数を取得する
+def get_slot_polygon_counts(arg_object:bpy.types.Object) -> np.ndarray:
+    """指定オブジェクトのスロット毎のポリゴン数を取得する
+    ポリゴンのマテリアル番号を一括で取得し、スロット番号毎に数える
+    (スロット範囲外のマテリアル番号は Blender の描画と同じく最後のスロットとして数える)
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+
+    Returns:
+        np.ndarray: スロット番号毎のポリゴン数の配列(スロット数の長さ)
+    """
+
+    # スロット数を取得する
+    slot_count = len(arg_object.material_slots)
+
+    # スロットがない場合は全ポリゴンを1つのサブメッシュとして数える
+    if slot_count == 0:
+        return np.array([len(arg_object.data.polygons)], dtype=np.int64)
+
+    # スロット番号毎に数える
+    return control_materialslot_utilities.get_slot_polygon_counts(arg_mesh=arg_object.data, arg_slot_count=slot_count)
+
+# 指定オブジェクトのスロット構成の統計を取得する
+def get_object_slot_stats(arg_object:bpy.types.Object) -> dict:
+    """指定オブジェクトのスロット構成の統計を取得する
+    描画コール数はポリゴンが割り当てられたスロット数とする(エクスポート時にスロット毎のサブメッシュとなるため)
+
+    Args:
+        arg_object (bpy.types.Object): 指定オブジェクト
+
+    Returns:
+        dict: 統計({"slots": スロット数, "polygons": ポリゴン数, "draw_calls": 描画コール数,
+                    "slot_polygons": スロット毎のポリゴン数のリスト})
+    """
+
+    # スロット毎のポリゴン数を取得する
+    slot_polygons = get_slot_polygon_counts(arg_object=arg_object)
+
+    return {
+        "slots": len(arg_object.material_slots),
+        "polygons": int(slot_polygons.sum()),
+        "draw_calls": int(np.count_nonzero(slot_polygons)),
+        "slot_polygons": slot_polygons.tolist(),
+    }
+
+# マージ前の統計を取得する
+def begin_merge_stats(arg_objects:list) -> dict:
+    """マージ前の統計を取得する
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+
+    Returns:
+        dict: オブジェクト名をキーとしたマージ前の統計
+    """
+
+    return {target_object.name: get_object_slot_stats(arg_object=target_object)
+        for target_object in arg_objects if target_object.type == 'MESH'}
+
+# マージ前後の統計からオブジェクト毎の削減結果を求める
+def collect_merge_stats(arg_objects:list, arg_before_stats:dict) -> list:
+    """マージ前後の統計からオブジェクト毎の削減結果を求める
+
+    Args:
+        arg_objects (list): 指定オブジェクトのリスト
+        arg_before_stats (dict): begin_merge_stats の戻り値
+
+    Returns:
+        list: オブジェクト毎の削減結果({"name": オブジェクト名, "polygons": ポリゴン数,
+              "slots_before", "slots_after": マージ前後のスロット数,
+              "draw_calls_before", "draw_calls_after", "draw_calls_saved": マージ前後と削減した描画コール数,
+              "slot_polygons": マージ後のスロット毎のポリゴン数のリスト})
+    """
+
+    # オブジェクト毎の削減結果のリスト
+    merge_stats = []
+
+    for target_object in arg_objects:
+        # マージ前の統計が存在しないオブジェクトは処理しない
+        before_stats = arg_before_stats.get(target_object.name)
+        if before_stats == None:
+            continue
+
+        # マージ後の統計を取得する
+        after_stats = get_object_slot_stats(arg_object=target_object)
+
+        merge_stats.append({
+            "name": target_object.name,
+            "polygons": after_stats["polygons"],
+            "slots_before": before_stats["slots"],
+            "slots_after": after_stats["slots"],
+            "draw_calls_before": before_stats["draw_calls"],
+            "draw_calls_after": after_stats["draw_calls"],
+            "draw_calls_saved": before_stats["draw_calls"] - after_stats["draw_calls"],
+            "slot_polygons": after_stats["slot_polygons"],
+        })
+
+    return merge_stats
+
+# オブジェクト毎の削減結果を合計する
+def get_merge_stats_summary(arg_merge_stats:list) -> dict:
+    """オブジェクト毎の削減結果を合計する
+
+    Args:
+        arg_merge_stats (list): collect_merge_stats の戻り値
+
+    Returns:
+        dict: 合計({"objects": オブジェクト数, "polygons", "slots_before", "slots_after",
+                    "draw_calls_before", "draw_calls_after", "draw_calls_saved": 各値の合計})
+    """
+
+    # 合計する項目を初期化する
+    stats_summary = {"objects": len(arg_merge_stats)}
+    for summary_name in ("polygons", "slots_before", "slots_after",
+      "draw_calls_before", "draw_calls_after", "draw_calls_saved"):
+        stats_summary[summary_name] = sum(object_stats[summary_name] for object_stats in arg_merge_stats)
+
+    return stats_summary
+
+# オブジェクト毎の削減結果をファイルに書き出す
+def export_merge_stats(arg_merge_stats:list, arg_filepath:str):
+    """オブジェクト毎の削減結果をファイルに書き出す
+    拡張子が .csv の場合は CSV、それ以外の場合は JSON として書き出す
+
+    Args:
+        arg_merge_stats (list): collect_merge_stats の戻り値
+        arg_filepath (str): 書き出し先のパス
+    """
+
+    # 書き出し先の絶対パスを取得する
+    export_path = bpy.path.abspath(arg_filepath)
+
+    if os.path.splitext(export_path)[1].lower() == ".csv":
+        # CSV として書き出す(1行1オブジェクト)
+        with open(export_path, "w", encoding="utf-8", newline="") as export_file:
+            csv_writer = csv.DictWriter(export_file, fieldnames=def_stats_csv_columns)
+            csv_writer.writeheader()
+            for object_stats in arg_merge_stats:
+                csv_row = dict(object_stats)
+                csv_row["slot_polygons"] = ";".join(str(polygon_count) for polygon_count in object_stats["slot_polygons"])
+                csv_writer.writerow(csv_row)
+    else:
+        # JSON として書き出す(合計を含める)
+        with open(export_path, "w", encoding="utf-8") as export_file:
+            json.dump({"summary": get_merge_stats_summary(arg_merge_stats=arg_merge_stats),
+                "objects": arg_merge_stats}, export_file, indent=1)
+
+    return
@@ -0,0 +1,449 @@
+# 各種ライブラリインポート
+if "bpy" in locals():
+    import importlib
+    if "comp_material_bsdf" in locals():
+        importlib.reload(comp_material_bsdf)
+    if "plan_material_merge" in locals():
+        importlib.reload(plan_material_merge)
+import bpy
+from . import comp_material_bsdf
+from . import plan_material_merge
+
+# 更新後に索引を再計算するまでの待ち時間(秒)
+# (連続した更新をまとめて1回の再計算とする)
+def_live_refresh_interval = 0.25
+
+# 更新を監視中のシグネチャの索引
+# 監視範囲外では None として更新を記録しない
+# 監視時は {"objects": 対象オブジェクト名のリスト,
+#           "materials": マテリアルのポインタ値をキーとしたマテリアル,
+#           "signatures": マテリアルのポインタ値をキーとしたシグネチャのキー(マージしない場合 None),
+#           "classes": シグネチャのキーをキーとした登録順のマテリアルのポインタ値のリスト,
+#           "trees": ノードツリーのポインタ値をキーとした参照元マテリアルのポインタ値の集合,
+#           "dirty": シグネチャの再計算が必要なマテリアルのポインタ値の集合(None の場合は全て),
+#           "affected": 前回の再マージ以降に構成が変化したシグネチャのキーの集合,
+#           "mergeable_count": 最後に再計算した時点の再マージで差し替わるスロット数}
+live_signature_index = None
+
+# シグネチャの索引の監視を開始する
+def begin_live_signature_index(arg_objects:list):
+    """シグネチャの索引の監視を開始する
+    依存グラフの更新ハンドラを登録し、変更されたマテリアルのシグネチャのみを再計算する
+    (許容誤差を指定しない完全一致のシグネチャで分類する)
+
+    Args:
+        arg_objects (list): 対象オブジェクトのリスト
+    """
+
+    # グローバル変数の索引を参照する
+    global live_signature_index
+
+    # 監視中の場合は終了してから開始する
+    end_live_signature_index()
+
+    # 空の索引を作成する(開始時点の重複も再マージの対象とするため全て再計算する)
+    live_signature_index = {
+        "objects": [target_object.name for target_object in arg_objects],
+        "materials": {},
+        "signatures": {},
+        "classes": {},
+        "trees": {},
+        "dirty": None,
+        "affected": set(),
+        "mergeable_count": 0,
+    }
+
+    # 索引を構築し、差し替わるスロット数を求める
+    update_live_mergeable_count()
+
+    # 更新ハンドラを登録する
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update_post)
+    bpy.app.handlers.undo_post.append(on_undo_redo_post)
+    bpy.app.handlers.redo_post.append(on_undo_redo_post)
+
+    return
+
+# シグネチャの索引の監視を終了する
+def end_live_signature_index():
+    """シグネチャの索引の監視を終了する
+    """
+
+    # グローバル変数の索引を参照する
+    global live_signature_index
+
+    # 登録済みの更新ハンドラを解除する
+    for handler_list, handler_function in ((bpy.app.handlers.depsgraph_update_post, on_depsgraph_update_post),
+      (bpy.app.handlers.undo_post, on_undo_redo_post), (bpy.app.handlers.redo_post, on_undo_redo_post)):
+        if handler_function in handler_list:
+            handler_list.remove(handler_function)
+
+    # 再計算の予約を解除する
+    if bpy.app.timers.is_registered(on_live_refresh_timer) == True:
+        bpy.app.timers.unregister(on_live_refresh_timer)
+
+    # 監視を無効にする
+    live_signature_index = None
+
+    return
+
+# シグネチャの索引を監視中か確認する
+def check_live_signature_index() -> bool:
+    """シグネチャの索引を監視中か確認する
+
+    Returns:
+        bool: 監視中か否か
+    """
+
+    return live_signature_index != None
+
+# 依存グラフの更新時に変更されたマテリアルを記録する
+def on_depsgraph_update_post(arg_scene:bpy.types.Scene, arg_depsgraph:bpy.types.Depsgraph=None):
+    """依存グラフの更新時に変更されたマテリアルを記録する
+    ハンドラ内ではシグネチャを再計算せず、再計算が必要なマテリアルの記録と再計算の予約のみ行う
+    (スロットのマテリアルの追加も検知するため、更新の種類に依らず予約する)
+
+    Args:
+        arg_scene (bpy.types.Scene): 更新されたシーン
+        arg_depsgraph (bpy.types.Depsgraph, optional): 依存グラフ
+    """
+
+    # 監視中か確認する
+    if live_signature_index == None or arg_depsgraph == None:
+        return
+
+    # 再計算を予約する
+    schedule_live_refresh()
+
+    # 全て再計算する予定の場合は記録しない
+    dirty_pointers = live_signature_index["dirty"]
+    if dirty_pointers == None:
+        return
+
+    # 更新されたデータブロックを走査する
+    for depsgraph_update in arg_depsgraph.updates:
+        # 評価後のデータブロックから元のデータブロックのポインタ値を取得する
+        update_pointer = depsgraph_update.id.original.as_pointer()
+
+        # マテリアルが更新された場合は再計算を記録する
+        if update_pointer in live_signature_index["materials"]:
+            dirty_pointers.add(update_pointer)
+
+        # ノードツリーが更新された場合は参照元のマテリアルの再計算を記録する
+        dirty_pointers.update(live_signature_index["trees"].get(update_pointer, ()))
+
+    return
+
+# 元に戻す、やり直しの実行時に全てのシグネチャの再計算を記録する
+def on_undo_redo_post(arg_scene:bpy.types.Scene, arg_depsgraph:bpy.types.Depsgraph=None):
+    """元に戻す、やり直しの実行時に全てのシグネチャの再計算を記録する
+    データブロックが読み直されるため、個別の変更は追跡しない
+
+    Args:
+        arg_scene (bpy.types.Scene): 対象シーン
+        arg_depsgraph (bpy.types.Depsgraph, optional): 依存グラフ
+    """
+
+    # 監視中の場合は全て再計算する
+    if live_signature_index != None:
+        live_signature_index["dirty"] = None
+        schedule_live_refresh()
+
+    return
+
+# ファイルの読み込み前に監視を終了する
+@bpy.app.handlers.persistent
+def on_load_pre(arg_filepath:str=None):
+    """ファイルの読み込み前に監視を終了する
+    更新ハンドラはファイルの読み込みで解除され、索引は読み込み前のファイルのマテリアルを参照し続けるため、
+    アドオンの登録中は読み込み後も維持するハンドラとして登録する
+
+    Args:
+        arg_filepath (str, optional): 読み込むファイルのパス
+    """
+
+    end_live_signature_index()
+
+    return
+
+# 索引の再計算を予約する
+def schedule_live_refresh():
+    """索引の再計算を予約する
+    予約済みの場合は重ねて予約しない
+    """
+
+    if bpy.app.timers.is_registered(on_live_refresh_timer) == False:
+        bpy.app.timers.register(on_live_refresh_timer, first_interval=def_live_refresh_interval)
+
+    return
+
+# 予約した索引の再計算を実行する
+def on_live_refresh_timer():
+    """予約した索引の再計算を実行する
+    パネルの描画時に再計算しないよう、差し替わるスロット数を求めて保持し、パネルを再描画する
+
+    Returns:
+        float: 次回の実行までの時間(繰り返さないため None)
+    """
+
+    # 監視中か確認する
+    if live_signature_index == None:
+        return None
+
+    # 差し替わるスロット数を求める
+    update_live_mergeable_count()
+
+    # 3Dビューを再描画する
+    window_manager = bpy.context.window_manager
+    if window_manager != None:
+        for check_window in window_manager.windows:
+            for check_area in check_window.screen.areas:
+                if check_area.type == 'VIEW_3D':
+                    check_area.tag_redraw()
+
+    return None
+
+# 再マージで差し替わるスロット数を求めて保持する
+def update_live_mergeable_count():
+    """再マージで差し替わるスロット数を求めて保持する
+    """
+
+    # 監視中か確認する
+    if live_signature_index == None:
+        return
+
+    # 索引を更新して差し替わるスロット数を保持する
+    live_signature_index["mergeable_count"] = len(get_live_mergeable_slots())
+
+    return
+
+# 最後に再計算した時点の再マージで差し替わるスロット数を取得する
+def get_live_mergeable_count() -> int:
+    """最後に再計算した時点の再マージで差し替わるスロット数を取得する
+    索引の再計算を行わないため、パネルの描画から呼び出すことができる
+
+    Returns:
+        int: 差し替わるスロット数(監視していない場合 0)
+    """
+
+    if live_signature_index == None:
+        return 0
+
+    return live_signature_index["mergeable_count"]
+
+# 変更されたマテリアルのシグネチャを再計算して索引を更新する
+def refresh_live_signature_index() -> set:
+    """変更されたマテリアルのシグネチャを再計算して索引を更新する
+    対象オブジェクトのスロットを走査し、新しく追加されたマテリアルと変更されたマテリアルのみ再計算する
+    スロットから外れたマテリアルは索引から削除する
+
+    Returns:
+        set: 前回の再マージ以降に構成が変化したシグネチャのキーの集合(監視していない場合 None)
+    """
+
+    # 監視中か確認する
+    if live_signature_index == None:
+        return None
+
+    # 対象オブジェクトのスロットのマテリアルを出現順に取得する
+    target_objects = get_live_target_objects()
+    slot_materials = comp_material_bsdf.get_slot_materials_unique(arg_objects=target_objects)
+    slot_dict = {check_mat.as_pointer(): check_mat for check_mat in slot_materials}
+
+    # 再計算が必要なマテリアルを取得する
+    dirty_pointers = live_signature_index["dirty"]
+    if dirty_pointers == None:
+        dirty_pointers = set(live_signature_index["materials"].keys())
+
+    # スロットから外れたマテリアル、または、再計算するマテリアルを索引から外す
+    for material_pointer in list(live_signature_index["materials"].keys()):
+        if material_pointer not in slot_dict or material_pointer in dirty_pointers:
+            remove_live_signature(arg_material_pointer=material_pointer)
+
+    # 索引に存在しないマテリアルのシグネチャを計算して追加する
+    for check_mat in slot_materials:
+        if check_mat.as_pointer() not in live_signature_index["materials"]:
+            add_live_signature(arg_material=check_mat)
+
+    # 再計算の記録を初期化する
+    live_signature_index["dirty"] = set()
+
+    return live_signature_index["affected"]
+
+# マテリアルのシグネチャを計算して索引に追加する
+def add_live_signature(arg_material:bpy.types.Material):
+    """マテリアルのシグネチャを計算して索引に追加する
+
+    Args:
+        arg_material (bpy.types.Material): 追加するマテリアル
+    """
+
+    # シグネチャのキーと参照するノードツリーを取得する
+    material_pointer = arg_material.as_pointer()
+    signature_key = comp_material_bsdf.get_material_signature_key(arg_material=arg_material)
+    tree_pointers = get_material_tree_pointers(arg_material=arg_material)
+
+    # 索引に追加する
+    live_signature_index["materials"][material_pointer] = arg_material
+    live_signature_index["signatures"][material_pointer] = signature_key
+    for tree_pointer in tree_pointers:
+        live_signature_index["trees"].setdefault(tree_pointer, set()).add(material_pointer)
+
+    # マージするシグネチャの場合は分類に追加する
+    if signature_key != None:
+        live_signature_index["classes"].setdefault(signature_key, []).append(material_pointer)
+        live_signature_index["affected"].add(signature_key)
+
+    return
+
+# マテリアルのシグネチャを索引から削除する
+def remove_live_signature(arg_material_pointer:int):
+    """マテリアルのシグネチャを索引から削除する
+
+    Args:
+        arg_material_pointer (int): 削除するマテリアルのポインタ値
+    """
+
+    # 索引から削除する
+    live_signature_index["materials"].pop(arg_material_pointer)
+    signature_key = live_signature_index["signatures"].pop(arg_material_pointer)
+    for tree_materials in live_signature_index["trees"].values():
+        tree_materials.discard(arg_material_pointer)
+
+    # 分類から削除する
+    if signature_key != None:
+        class_pointers = live_signature_index["classes"][signature_key]
+        class_pointers.remove(arg_material_pointer)
+        if len(class_pointers) == 0:
+            del live_signature_index["classes"][signature_key]
+        live_signature_index["affected"].add(signature_key)
+
+    return
+
+# マテリアルが参照するノードツリーのポインタ値を取得する
+def get_material_tree_pointers(arg_material:bpy.types.Material) -> list:
+    """マテリアルが参照するノードツリーのポインタ値を取得する
+    マテリアルのノードツリーと、ノードグループから参照されるノードツリーを含める
+
+    Args:
+        arg_material (bpy.types.Material): 指定マテリアル
+
+    Returns:
+        list: ノードツリーのポインタ値のリスト
+    """
+
+    # ノードツリーが存在しない場合は空とする
+    if arg_material.node_tree == None:
+        return []
+
+    # ノードツリーを順に走査する
+    tree_pointers = []
+    search_trees = [arg_material.node_tree]
+    while len(search_trees) > 0:
+        search_tree = search_trees.pop()
+
+        # 走査済みのノードツリーは処理しない
+        if search_tree.as_pointer() in tree_pointers:
+            continue
+        tree_pointers.append(search_tree.as_pointer())
+
+        # ノードグループは内部のノードツリーを走査する
+        for check_node in search_tree.nodes:
+            if check_node.bl_idname == 'ShaderNodeGroup' and check_node.node_tree != None:
+                search_trees.append(check_node.node_tree)
+
+    return tree_pointers
+
+# 監視中の対象オブジェクトを取得する
+def get_live_target_objects() -> list:
+    """監視中の対象オブジェクトを取得する
+    削除されたオブジェクトは含めない
+
+    Returns:
+        list: 対象オブジェクトのリスト
+    """
+
+    return [bpy.data.objects[object_name] for object_name in live_signature_index["objects"]
+        if bpy.data.objects.get(object_name) != None]
+
+# 再マージでマテリアルが差し替わるスロットを取得する
+def get_live_mergeable_slots() -> list:
+    """再マージでマテリアルが差し替わるスロットを取得する
+    前回の再マージ以降に構成が変化した分類のみを対象とし、分類で最初に登録されたマテリアルを代表とする
+
+    Returns:
+        list: (オブジェクト名, スロット番号, マテリアル名, 代表マテリアル名) のリスト
+    """
+
+    # 索引を更新して代表マテリアルを取得する
+    canonical_dict = get_live_canonical_dict()
+    if canonical_dict == None:
+        return []
+
+    # 差し替わるスロットを取得する
+    mergeable_slots = []
+    for target_object in get_live_target_objects():
+        for slot_num, check_material_slot in enumerate(target_object.material_slots):
+            check_mat = check_material_slot.material
+            if check_mat == None or check_mat.as_pointer() not in canonical_dict:
+                continue
+            mergeable_slots.append((target_object.name, slot_num, check_mat.name,
+                canonical_dict[check_mat.as_pointer()].name))
+
+    return mergeable_slots
+
+# 構成が変化した分類のマテリアル毎の代表マテリアルを取得する
+def get_live_canonical_dict() -> dict:
+    """構成が変化した分類のマテリアル毎の代表マテリアルを取得する
+
+    Returns:
+        dict: マテリアルのポインタ値をキーとした代表マテリアル(代表マテリアル自身は含まない、監視していない場合 None)
+    """
+
+    # 索引を更新する
+    affected_keys = refresh_live_signature_index()
+    if affected_keys == None:
+        return None
+
+    # 構成が変化した分類のみ代表マテリアルを求める
+    canonical_dict = {}
+    for signature_key in affected_keys:
+        class_pointers = live_signature_index["classes"].get(signature_key, [])
+        for material_pointer in class_pointers[1:]:
+            canonical_dict[material_pointer] = live_signature_index["materials"][class_pointers[0]]
+
+    return canonical_dict
+
+# 構成が変化した分類のマテリアルのみを再マージする
+def remerge_live_signature_index() -> bool:
+    """構成が変化した分類のマテリアルのみを再マージする
+    差し替わるマテリアルを持つオブジェクトのみスロットを書き換える
+
+    Returns:
+        bool: 実行正否(監視していない場合 False)
+    """
+
+    # 構成が変化した分類の代表マテリアルを取得する
+    canonical_dict = get_live_canonical_dict()
+    if canonical_dict == None:
+        return False
+
+    # 差し替わるマテリアルを持つオブジェクトを取得する
+    merge_materials = [live_signature_index["materials"][material_pointer] for material_pointer in canonical_dict]
+    merge_objects = [target_object for target_object in get_live_target_objects()
+        if any(check_material_slot.material != None and check_material_slot.material.as_pointer() in canonical_dict
+            for check_material_slot in target_object.material_slots)]
+
+    # 差し替わるマテリアルのみを対象としたマージ計画を作成して適用する
+    if len(merge_objects) > 0:
+        merge_plan = plan_material_merge.create_merge_plan_canonical(arg_objects=merge_objects,
+            arg_materials=merge_materials,
+            arg_canonical_materials=[canonical_dict[check_mat.as_pointer()] for check_mat in merge_materials])
+        if plan_material_merge.apply_merge_plan(arg_plan=merge_plan) == False:
+            return False
+
+    # スロットから外れたマテリアルを索引から外し、構成の変化の記録を初期化する
+    refresh_live_signature_index()
+    live_signature_index["affected"] = set()
+    live_signature_index["mergeable_count"] = 0
+
+    return True